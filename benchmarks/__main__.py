@@ -0,0 +1,68 @@
+"""
+Набор бенчмарков горячих путей.
+
+    python -m benchmarks                                  # все кейсы, размеры по умолчанию
+    python -m benchmarks --sizes 20x1000,200x50000 --cases allocator,http
+    python -m benchmarks --json current.json              # результаты в JSON
+    python -m benchmarks --compare baseline.json --threshold 0.2
+
+С --compare процесс завершается с кодом 1, если p50 или p95 какого-либо кейса
+выросли больше чем на threshold относительно базовой линии.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from .cases import CASES, Dataset
+from .harness import compare, format_table, load_json, to_json
+
+
+def _sizes(value: str):
+    sizes = []
+    for item in value.split(","):
+        tables, reservations = item.lower().split("x")
+        sizes.append(Dataset(tables=int(tables), reservations=int(reservations)))
+    return sizes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_sizes, default=_sizes("20x1000,100x20000"),
+                        help="столы x существующие брони, через запятую")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"из: {', '.join(CASES)}")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--json", dest="json_path", help="куда записать результаты")
+    parser.add_argument("--compare", dest="baseline_path", help="JSON базовой линии")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление, доля")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.cases.split(",")) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    results = []
+    for dataset in args.sizes:
+        for name in args.cases.split(","):
+            results.append(CASES[name](dataset, args.iterations))
+
+    print(format_table(results))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            f.write(to_json(results))
+
+    if args.baseline_path:
+        regressions = compare(load_json(args.baseline_path), results, args.threshold)
+        if regressions:
+            print(f"\nREGRESSIONS (threshold {args.threshold:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nno regressions (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Сравнение пакетного создания броней с N одиночными вызовами.
+
+Запуск из корня репозитория:
+    python -m benchmarks.batch_insert --size 500
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import CreateReservation, CreateReservationsBatch
+from src.booking.application.handlers import (
+    CreateReservationHandler,
+    CreateReservationsBatchHandler,
+)
+from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.uow import SqlAlchemyUnitOfWork
+
+
+def _commands(size: int):
+    # Один большой зал и брони "вплотную": у каждой свой непересекающийся слот
+    start = datetime(2030, 1, 1, 0, 0)
+    return [
+        CreateReservation(slot_start=start + timedelta(minutes=90 * i), duration_min=90,
+                          party_size=2)
+        for i in range(size)
+    ]
+
+
+def _session_factory(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine)
+
+
+def run_single(size: int, tables, path: str) -> float:
+    engine, session_factory = _session_factory(path)
+    allocator = TableAllocationService()
+
+    started = time.perf_counter()
+    for cmd in _commands(size):
+        session = session_factory()
+        CreateReservationHandler(SqlAlchemyUnitOfWork(session), allocator)(cmd, tables)
+        session.close()
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    return elapsed
+
+
+def run_batch(size: int, tables, path: str) -> float:
+    engine, session_factory = _session_factory(path)
+    allocator = TableAllocationService()
+    cmd = CreateReservationsBatch(items=tuple(_commands(size)))
+
+    started = time.perf_counter()
+    session = session_factory()
+    CreateReservationsBatchHandler(SqlAlchemyUnitOfWork(session), allocator)(cmd, tables)
+    session.close()
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    return elapsed
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=500, help="броней в пакете")
+    args = parser.parse_args(argv)
+
+    tables = [{"id": "T1", "capacity": 4}]
+    with tempfile.TemporaryDirectory() as tmp:
+        single = run_single(args.size, tables, os.path.join(tmp, "single.db"))
+        batch = run_batch(args.size, tables, os.path.join(tmp, "batch.db"))
+
+    print(f"{args.size} x CreateReservationHandler: {single * 1000:9.1f} ms "
+          f"({args.size / single:,.0f} res/s)")
+    print(f"1 x CreateReservationsBatch:      {batch * 1000:9.1f} ms "
+          f"({args.size / batch:,.0f} res/s)")
+    print(f"speedup: x{single / batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Горячие пути сервиса: аллокатор, хендлер, репозитории, POST /reservations.
+
+Каждый кейс получает Dataset (столы × уже существующие брони) и возвращает BenchResult.
+Всё работает офлайн: in-memory хранилище или временный файл SQLite.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import CreateReservation
+from src.booking.application.handlers import CreateReservationHandler
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from src.booking.domain.occupancy import OccupancyIndex
+from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.repositories import (
+    InMemoryReservationRepository,
+    SqlAlchemyReservationRepository,
+)
+from src.booking.infrastructure.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+
+from .harness import BenchResult, measure, summarize
+
+
+DAY_START = datetime(2030, 1, 1, 10, 0)
+TURN = timedelta(hours=2)          # шаг посадки за одним столом
+DURATION = timedelta(minutes=90)   # длительность существующих броней
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """tables столов и reservations уже существующих броней без пересечений."""
+    tables: int
+    reservations: int
+    seed: int = 42
+
+    @property
+    def params(self) -> Dict[str, int]:
+        return {"tables": self.tables, "reservations": self.reservations}
+
+    def catalog(self) -> CatalogSnapshot:
+        rnd = random.Random(self.seed)
+        return CatalogSnapshot([(f"T{i}", rnd.choice((2, 2, 4, 4, 6, 8)))
+                                for i in range(self.tables)])
+
+    def existing(self) -> List[Reservation]:
+        # k-я бронь — на столе k % tables, в (k // tables)-й посадке
+        result = []
+        for k in range(self.reservations):
+            start = DAY_START + TURN * (k // self.tables)
+            result.append(Reservation(
+                reservation_id=f"seed-{k}",
+                slot=TimeSlot(start, start + DURATION),
+                party_size=PartySize.of(2),
+                table_id=TableId.of(f"T{k % self.tables}"),
+                status=ReservationStatus.CONFIRMED,
+            ))
+        return result
+
+    @property
+    def horizon(self) -> datetime:
+        """Момент, после которого существующих броней нет."""
+        return DAY_START + TURN * (self.reservations // self.tables + 1)
+
+    def random_start(self, rnd: random.Random) -> datetime:
+        """Старт внутри уже заполненного периода с шагом 15 минут."""
+        span = max(1, int((self.horizon - DAY_START).total_seconds() // 900))
+        return DAY_START + timedelta(minutes=15 * rnd.randrange(span))
+
+    def fresh_command(self, i: int) -> CreateReservation:
+        """Заведомо выполнимая бронь: после horizon, у каждой итерации свой слот."""
+        return CreateReservation(slot_start=self.horizon + TURN * (i + 100), duration_min=60,
+                                 party_size=2)
+
+
+# ---------- кейсы ----------
+
+def bench_allocator(ds: Dataset, iterations: int) -> BenchResult:
+    existing = ds.existing()
+    allocator = TableAllocationService(OccupancyIndex.from_reservations(existing))
+    catalog = ds.catalog()
+    rnd = random.Random(ds.seed)
+    rejected = 0
+
+    requests = []
+    for _ in range(iterations + 10):
+        start = ds.random_start(rnd)
+        requests.append(Reservation(
+            reservation_id="probe",
+            slot=TimeSlot(start, start + timedelta(minutes=60)),
+            party_size=PartySize.of(rnd.randint(1, 6)),
+        ))
+
+    def op(i):
+        nonlocal rejected
+        try:
+            allocator.allocate(requests[i], catalog)
+        except ValueError:
+            rejected += 1
+
+    result = measure("allocator.allocate", ds.params, op, iterations)
+    result.extra["rejection_rate"] = rejected / (iterations + 10)
+    return result
+
+
+def bench_handler_memory(ds: Dataset, iterations: int) -> BenchResult:
+    existing = ds.existing()
+    store = InMemoryReservationRepository()
+    store.add_many(existing)
+    allocator = TableAllocationService(OccupancyIndex.from_reservations(existing))
+    catalog = ds.catalog()
+
+    def op(i):
+        CreateReservationHandler(InMemoryUnitOfWork(store), allocator)(ds.fresh_command(i), catalog)
+
+    return measure("handler.create[memory]", ds.params, op, iterations)
+
+
+def bench_handler_sqlite(ds: Dataset, iterations: int) -> BenchResult:
+    existing = ds.existing()
+    with _sqlite(existing) as session_factory:
+        allocator = TableAllocationService(OccupancyIndex.from_reservations(existing))
+        catalog = ds.catalog()
+
+        def op(i):
+            session = session_factory()
+            try:
+                handler = CreateReservationHandler(SqlAlchemyUnitOfWork(session), allocator)
+                handler(ds.fresh_command(i), catalog)
+            finally:
+                session.close()
+
+        return measure("handler.create[sqlite]", ds.params, op, iterations)
+
+
+def _repository_ops(ds: Dataset, repo) -> Callable[[int], object]:
+    rnd = random.Random(ds.seed)
+    probes = [(f"T{rnd.randrange(ds.tables)}", ds.random_start(rnd),
+               f"seed-{rnd.randrange(max(1, ds.reservations))}")
+              for _ in range(256)]
+
+    def op(i):
+        table_id, start, reservation_id = probes[i % len(probes)]
+        repo.get(reservation_id)
+        repo.list_overlapping(table_id, start, start + timedelta(hours=1))
+        repo.list_between(start, start + timedelta(minutes=30))
+
+    return op
+
+
+def bench_repository_memory(ds: Dataset, iterations: int) -> BenchResult:
+    repo = InMemoryReservationRepository()
+    repo.add_many(ds.existing())
+    return measure("repository.read[memory]", ds.params, _repository_ops(ds, repo), iterations)
+
+
+def bench_repository_sqlite(ds: Dataset, iterations: int) -> BenchResult:
+    with _sqlite(ds.existing()) as session_factory:
+        session = session_factory()
+        try:
+            ops = _repository_ops(ds, SqlAlchemyReservationRepository(session))
+            return measure("repository.read[sqlite]", ds.params, ops, iterations)
+        finally:
+            session.close()
+
+
+def bench_http(ds: Dataset, iterations: int) -> BenchResult:
+    from httpx import ASGITransport, AsyncClient
+
+    from src.booking.entrypoints.container import close_container, init_container
+    from src.booking.entrypoints.fastapi_app import app
+    from src.booking.infrastructure.available_tables import InMemoryTableSource, TableCatalog
+    from src.booking.infrastructure.settings import AppSettings
+
+    close_container()
+    container = init_container(AppSettings())
+    container.catalog = TableCatalog(InMemoryTableSource(ds.catalog().as_mappings()))
+    existing = ds.existing()
+    container.reservations.add_many(existing)
+    for reservation in existing:
+        container.allocator.occupancy.add(reservation)
+
+    async def run() -> List[float]:
+        samples = []
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for i in range(-10, iterations):
+                cmd = ds.fresh_command(i + 10)
+                body = {"slot_start": cmd.slot_start.isoformat(), "duration_min": cmd.duration_min,
+                        "party_size": cmd.party_size}
+                started = time.perf_counter()
+                response = await client.post("/reservations", json=body)
+                elapsed = time.perf_counter() - started
+                response.raise_for_status()
+                if i >= 0:
+                    samples.append(elapsed)
+        return samples
+
+    try:
+        return summarize("http.post_reservations[asgi]", ds.params, asyncio.run(run()))
+    finally:
+        close_container()
+
+
+@contextmanager
+def _sqlite(existing: List[Reservation]):
+    """Временная БД SQLite, заполненная существующими бронями; отдаёт фабрику сессий."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as session:
+            SqlAlchemyReservationRepository(session).add_many(existing)
+            session.commit()
+        try:
+            yield session_factory
+        finally:
+            engine.dispose()
+
+
+CASES: Dict[str, Callable[[Dataset, int], BenchResult]] = {
+    "allocator": bench_allocator,
+    "handler-memory": bench_handler_memory,
+    "handler-sqlite": bench_handler_sqlite,
+    "repository-memory": bench_repository_memory,
+    "repository-sqlite": bench_repository_sqlite,
+    "http": bench_http,
+}
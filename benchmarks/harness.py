@@ -0,0 +1,124 @@
+"""Замер, отчёт и сравнение с базовой линией для набора бенчмарков."""
+from __future__ import annotations
+
+import json
+import math
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchResult:
+    case: str
+    params: Dict[str, int]
+    ops: int
+    total_seconds: float
+    throughput: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    extra: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.case}[{params}]"
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """Перцентиль по nearest-rank; sorted_samples уже отсортированы."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, math.ceil(q * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(case: str, params: Dict[str, int], samples: List[float],
+              extra: Optional[Dict[str, float]] = None) -> BenchResult:
+    """samples — длительности отдельных операций в секундах."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return BenchResult(
+        case=case,
+        params=params,
+        ops=len(ordered),
+        total_seconds=total,
+        throughput=len(ordered) / total if total else 0.0,
+        p50_us=percentile(ordered, 0.50) * 1e6,
+        p95_us=percentile(ordered, 0.95) * 1e6,
+        p99_us=percentile(ordered, 0.99) * 1e6,
+        extra=extra or {},
+    )
+
+
+def measure(case: str, params: Dict[str, int], op: Callable[[int], object],
+            iterations: int, warmup: int = 10) -> BenchResult:
+    """Вызывает op(i) iterations раз (плюс warmup неучтённых) и меряет каждый вызов."""
+    for i in range(warmup):
+        op(-1 - i)
+
+    samples = []
+    clock = time.perf_counter
+    for i in range(iterations):
+        started = clock()
+        op(i)
+        samples.append(clock() - started)
+    return summarize(case, params, samples)
+
+
+# ---------- отчёт ----------
+
+def format_table(results: List[BenchResult]) -> str:
+    width = max([len(r.key) for r in results] + [4])
+    header = f"{'case':<{width}} {'ops/s':>12} {'p50 µs':>10} {'p95 µs':>10} {'p99 µs':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r.key:<{width}} {r.throughput:>12,.0f} "
+                     f"{r.p50_us:>10.1f} {r.p95_us:>10.1f} {r.p99_us:>10.1f}")
+    return "\n".join(lines)
+
+
+def to_json(results: List[BenchResult]) -> str:
+    return json.dumps({"results": [dict(asdict(r), key=r.key) for r in results]}, indent=2)
+
+
+def load_json(path: str) -> Dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        return {r["key"]: r for r in json.load(f)["results"]}
+
+
+# ---------- регрессии ----------
+
+@dataclass(frozen=True)
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def slowdown(self) -> float:
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.key}: {self.metric} {self.baseline:.1f} -> {self.current:.1f} µs "
+                f"(+{self.slowdown:.0%})")
+
+
+def compare(baseline: Dict[str, dict], results: List[BenchResult], threshold: float,
+            metrics=("p50_us", "p95_us")) -> List[Regression]:
+    """
+    Горячий путь считается замедлившимся, если метрика выросла больше чем на threshold
+    (0.2 = 20%).
+    """
+    regressions = []
+    for r in results:
+        base = baseline.get(r.key)
+        if base is None:
+            continue
+        for metric in metrics:
+            before, after = base[metric], getattr(r, metric)
+            if before and after > before * (1 + threshold):
+                regressions.append(Regression(r.key, metric, before, after))
+    return regressions
@@ -0,0 +1,106 @@
+"""
+Память на одну бронь: доменная модель до и после перехода на __slots__ и интернирование.
+
+"До" воспроизводится локальными копиями прежних классов (dataclass без slots,
+Entity с __dict__, новый PartySize/TableId на каждую бронь).
+
+Запуск из корня репозитория:
+    python -m benchmarks.memory_footprint --count 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+
+
+# ---------- прежняя модель ----------
+
+@dataclass(frozen=True)
+class LegacyTimeSlot:
+    start: datetime
+    end: datetime
+
+
+@dataclass(frozen=True)
+class LegacyPartySize:
+    value: int
+
+
+@dataclass(frozen=True)
+class LegacyTableId:
+    value: str
+
+
+class LegacyReservation:
+    def __init__(self, reservation_id, slot, party_size, table_id=None,
+                 status=ReservationStatus.CREATED):
+        self.reservation_id = reservation_id
+        self.slot = slot
+        self.party_size = party_size
+        self.table_id = table_id
+        self.status = status
+
+
+# ---------- замер ----------
+
+TABLES = [f"T{i}" for i in range(1, 51)]
+SEASON_START = datetime(2030, 1, 1, 12, 0)
+
+
+def _legacy(i: int):
+    start = SEASON_START + timedelta(minutes=15 * i)
+    return LegacyReservation(
+        reservation_id=str(uuid.UUID(int=i)),
+        slot=LegacyTimeSlot(start, start + timedelta(minutes=90)),
+        party_size=LegacyPartySize(2 + i % 6),
+        table_id=LegacyTableId(TABLES[i % len(TABLES)]),
+    )
+
+
+def _current(i: int):
+    start = SEASON_START + timedelta(minutes=15 * i)
+    return Reservation(
+        reservation_id=str(uuid.UUID(int=i)),
+        slot=TimeSlot(start, start + timedelta(minutes=90)),
+        party_size=PartySize.of(2 + i % 6),
+        table_id=TableId.of(TABLES[i % len(TABLES)]),
+    )
+
+
+def measure(build, count: int) -> float:
+    """Байт на бронь (включая id, datetime и все вложенные VO)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    gc.collect()
+    return (after - before) / count
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000, help="броней в памяти")
+    args = parser.parse_args(argv)
+
+    legacy = measure(_legacy, args.count)
+    current = measure(_current, args.count)
+
+    print(f"reservations:        {args.count:,}")
+    mib = args.count / 2**20
+    print(f"before (dict-based): {legacy:7.1f} B/reservation  ({legacy * mib:,.0f} MiB)")
+    print(f"after (slots+intern):{current:7.1f} B/reservation  ({current * mib:,.0f} MiB)")
+    print(f"saved:               {1 - current / legacy:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from ..domain.model import DEFAULT_RESTAURANT
 
 
 # Команда = входные данные use case (Input DTO)
@@ -10,3 +13,35 @@ class CreateReservation:
     slot_start: datetime
     duration_min: int
     party_size: int
+    # Заведение = ключ шарда: по нему UoW выбирает БД
+    restaurant_id: str = DEFAULT_RESTAURANT
+
+
+# Пакетная команда: групповые брони и импорт от партнёров
+@dataclass(frozen=True)
+class CreateReservationsBatch:
+    items: Tuple[CreateReservation, ...]
+
+
+# Смена статуса одной брони: action — "confirm" | "cancel" | "complete"
+@dataclass(frozen=True)
+class ChangeReservationStatus:
+    reservation_id: str
+    action: str
+
+
+# Массовая смена статуса: по списку id или по всем броням с началом в [start, end)
+# (закрытие зала на вечер, ночное завершение подтверждённых)
+@dataclass(frozen=True)
+class BulkChangeReservationStatus:
+    action: str
+    reservation_ids: Optional[Tuple[str, ...]] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+# Пересборка read model плана зала по броням в днях [start_day, end_day); None — без границы
+@dataclass(frozen=True)
+class RebuildDailySchedule:
+    start_day: Optional[date] = None
+    end_day: Optional[date] = None
@@ -1,12 +1,74 @@
 from __future__ import annotations
 
-from typing import Mapping, Iterable
+import itertools
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from .commands import CreateReservation
-from ..application.unit_of_work import UnitOfWork
+from .. import metrics
+from .commands import (
+    BulkChangeReservationStatus,
+    ChangeReservationStatus,
+    CreateReservation,
+    CreateReservationsBatch,
+    RebuildDailySchedule,
+)
+from .queries import (
+    AvailabilityCache,
+    DailyScheduleReadModel,
+    GetAvailability,
+    GetDailySchedule,
+    ListReservations,
+    ReservationPage,
+    ReservationView,
+    ScheduledSlot,
+    TableAvailability,
+    TableDaySchedule,
+)
+from ..application.unit_of_work import UnitOfWork, AsyncUnitOfWork
 from ..domain.factory import ReservationFactory
-from ..domain.model import ReservationAggregate
-from ..domain.services import TableAllocationService
+from ..domain.availability import DaySchedule, availability
+from ..domain.catalog import CatalogSnapshot
+from ..domain.events import WaitlistPromoted
+from ..domain.model import (
+    PartySize,
+    Reservation,
+    ReservationAggregate,
+    ReservationStatus,
+    TableId,
+    TimeSlot,
+)
+from ..domain.occupancy import OCCUPYING_STATUSES, part_keys, table_key
+from ..domain.repository import ReservationNotFound, TableConflict
+from ..domain.services import (
+    NO_TABLE,
+    AvailableTables,
+    NoTableAvailable,
+    TableAllocationService,
+    as_snapshot,
+)
+from ..domain.transitions import TRANSITIONS, StatusTransition
+from ..domain.waitlist import WaitlistEntry, WaitlistIndex
+
+
+# Вызывается после успешного commit с сохранёнными бронями (например, обновить кэш доступности)
+CommitListener = Callable[[Sequence[Reservation]], None]
+
+# Сколько раз выбрать стол заново, если при commit его занял другой воркер
+MAX_BOOKING_ATTEMPTS = 3
+
+# Сколько броней переводит один UPDATE массовой смены статуса (одна транзакция на пакет)
+BULK_STATUS_BATCH_SIZE = 1000
+
+STATUS_CHANGED_CONCURRENTLY = "Reservation status was changed concurrently"
+
+# Сколько гостей из листа ожидания повышается одной транзакцией
+WAITLIST_PROMOTION_BATCH = 200
+
+# Брони, начавшиеся раньше, чем за сутки до открытия, в день уже не попадают
+DAY_LOOKBACK = timedelta(days=1)
 
 
 class CreateReservationHandler:
@@ -15,27 +77,702 @@ class CreateReservationHandler:
 
     - создает агрегат (Factory)
     - вызывает доменные правила (Domain Service + методы Aggregate Root)
-    - сохраняет через UoW/Repository
+    - сохраняет через UoW/Repository, события агрегата — в outbox той же транзакцией
+    - стол удерживается в индексе занятости аллокатора с момента выбора;
+      если сохранить не удалось — освобождается, а claim снимается (repository.release:
+      in-memory хранилище записывает бронь уже на claim)
+    - индекс аллокатора знает только брони своего процесса, поэтому стол ещё
+      закрепляется в хранилище (repository.claim) в той же транзакции; если его
+      занял другой воркер — чужие брони учитываются и стол выбирается заново,
+      не больше max_attempts раз
+    - после commit сообщает о брони on_commit (кэш доступности)
+    """
+
+    def __init__(self, uow: UnitOfWork, allocator: TableAllocationService,
+                 on_commit: Optional[CommitListener] = None,
+                 max_attempts: int = MAX_BOOKING_ATTEMPTS):
+        self.uow = uow
+        self.allocator = allocator
+        self.on_commit = on_commit
+        self.max_attempts = max_attempts
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("create"))
+    def __call__(self, cmd: CreateReservation, available_tables: AvailableTables) -> str:
+        attempt = 1
+        while True:
+            reservation_aggregate = _allocate_reservation(cmd, self.allocator, available_tables)
+            reservation = reservation_aggregate.root
+            try:
+                with self.uow:
+                    self.uow.reservations.claim([reservation])
+                    self.uow.reservations.add(reservation)
+                    self.uow.reservations.add_events(reservation_aggregate.events)
+                    self.uow.commit()
+                break
+            except TableConflict as e:
+                self.uow.reservations.release([reservation])
+                self.allocator.release(reservation)
+                _table_conflict(self.allocator, e, attempt, self.max_attempts)
+            except Exception:
+                self.uow.reservations.release([reservation])
+                self.allocator.release(reservation)
+                raise
+            attempt += 1
+
+        metrics.RESERVATIONS_CREATED.inc()
+        if self.on_commit is not None:
+            self.on_commit([reservation])
+        return reservation.reservation_id
+
+
+class AsyncCreateReservationHandler:
+    """
+    Тот же use case, что CreateReservationHandler, но над AsyncUnitOfWork:
+    распределение стола — чистый CPU, ожидание БД — await.
+    """
+
+    def __init__(self, uow: AsyncUnitOfWork, allocator: TableAllocationService,
+                 on_commit: Optional[CommitListener] = None,
+                 max_attempts: int = MAX_BOOKING_ATTEMPTS):
+        self.uow = uow
+        self.allocator = allocator
+        self.on_commit = on_commit
+        self.max_attempts = max_attempts
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("create_async"))
+    async def __call__(self, cmd: CreateReservation, available_tables: AvailableTables) -> str:
+        attempt = 1
+        while True:
+            reservation_aggregate = _allocate_reservation(cmd, self.allocator, available_tables)
+            reservation = reservation_aggregate.root
+            try:
+                async with self.uow:
+                    await self.uow.reservations.claim([reservation])
+                    await self.uow.reservations.add(reservation)
+                    await self.uow.reservations.add_events(reservation_aggregate.events)
+                    await self.uow.commit()
+                break
+            except TableConflict as e:
+                self.allocator.release(reservation)
+                _table_conflict(self.allocator, e, attempt, self.max_attempts)
+            except Exception:
+                self.allocator.release(reservation)
+                raise
+            attempt += 1
+
+        metrics.RESERVATIONS_CREATED.inc()
+        if self.on_commit is not None:
+            self.on_commit([reservation])
+        return reservation.reservation_id
+
+
+# Output DTO для одного элемента пакета
+@dataclass(frozen=True)
+class BatchItemResult:
+    reservation_id: Optional[str]
+    table_id: Optional[str]
+    error: Optional[str] = None
+
+
+class CreateReservationsBatchHandler:
+    """
+    Use Case: пакетное создание броней.
+
+    - пакет — окно ожидающих броней: столы распределяются всем сразу
+      (TableAllocationService.hold_batch) с минимумом отказов и пустых мест,
+      с учётом сдвигаемых столов
+    - ошибки отдельных элементов (инварианты, нет стола) не валят пакет
+    - сохраняет принятые брони одной bulk-вставкой в одной транзакции, закрепив
+      их столы (repository.claim); если commit не удался — снимает claim и брони из
+      индекса занятости, а при TableConflict распределяет пакет заново (до max_attempts раз)
+    """
+
+    def __init__(self, uow: UnitOfWork, allocator: TableAllocationService,
+                 on_commit: Optional[CommitListener] = None,
+                 max_attempts: int = MAX_BOOKING_ATTEMPTS):
+        self.uow = uow
+        self.allocator = allocator
+        self.on_commit = on_commit
+        self.max_attempts = max_attempts
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("batch"))
+    def __call__(self, cmd: CreateReservationsBatch,
+                 available_tables: AvailableTables) -> List[BatchItemResult]:
+        attempt = 1
+        while True:
+            results, accepted, events = self._allocate(cmd, available_tables)
+            try:
+                if accepted:
+                    with self.uow:
+                        self.uow.reservations.claim(accepted)
+                        self.uow.reservations.add_many(accepted)
+                        self.uow.reservations.add_events(events)
+                        self.uow.commit()
+                break
+            except TableConflict as e:
+                self.uow.reservations.release(accepted)
+                for reservation in accepted:
+                    self.allocator.release(reservation)
+                _table_conflict(self.allocator, e, attempt, self.max_attempts)
+            except Exception:
+                self.uow.reservations.release(accepted)
+                for reservation in accepted:
+                    self.allocator.release(reservation)
+                raise
+            attempt += 1
+
+        metrics.RESERVATIONS_CREATED.inc(len(accepted))
+        if accepted and self.on_commit is not None:
+            self.on_commit(accepted)
+        return results
+
+    def _allocate(self, cmd: CreateReservationsBatch, available_tables: AvailableTables):
+        results: List[Optional[BatchItemResult]] = [None] * len(cmd.items)
+        pending = []  # (позиция в пакете, агрегат)
+        for position, item in enumerate(cmd.items):
+            try:
+                pending.append((position, _new_aggregate(item)))
+            except ValueError as e:
+                results[position] = BatchItemResult(reservation_id=None, table_id=None,
+                                                    error=str(e))
+
+        table_ids = _hold_batch(self.allocator, [a for _, a in pending], available_tables)
+
+        accepted = []
+        events = []
+        for (position, reservation_aggregate), table_id in zip(pending, table_ids):
+            if table_id is None:
+                results[position] = BatchItemResult(reservation_id=None, table_id=None,
+                                                    error=NO_TABLE)
+                continue
+            reservation = reservation_aggregate.root
+            accepted.append(reservation)
+            events.extend(reservation_aggregate.events)
+            results[position] = BatchItemResult(reservation_id=reservation.reservation_id,
+                                                table_id=table_id.value)
+        return results, accepted, events
+
+
+class ChangeReservationStatusHandler:
+    """
+    Use Case: подтвердить / отменить / завершить одну бронь.
+
+    - инварианты и событие — в методе агрегата (confirm, cancel, mark_completed)
+    - запись — тем же guarded UPDATE, что и массовая смена: если между чтением
+      и записью статус успели поменять, ничего не пишется
+    - отменённая / завершённая бронь освобождает стол в индексе занятости
+    """
+
+    def __init__(self, uow: UnitOfWork, allocator: TableAllocationService,
+                 on_commit: Optional[CommitListener] = None):
+        self.uow = uow
+        self.allocator = allocator
+        self.on_commit = on_commit
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("change_status"))
+    def __call__(self, cmd: ChangeReservationStatus) -> str:
+        transition = TRANSITIONS[cmd.action]
+        with self.uow:
+            reservation = self.uow.reservations.get(cmd.reservation_id)
+            if reservation is None:
+                raise ReservationNotFound(cmd.reservation_id)
+            reservation_aggregate = ReservationAggregate(reservation)
+            transition.apply(reservation_aggregate)
+            if not reservation_aggregate.events:
+                # Повторная отмена: идемпотентна, менять нечего
+                return reservation.status.value
+
+            changed = self.uow.reservations.transition_status(
+                transition, [reservation.reservation_id])
+            if not changed:
+                raise ValueError(STATUS_CHANGED_CONCURRENTLY)
+            self.uow.reservations.add_events(reservation_aggregate.events)
+            self.uow.commit()
+
+        _transitioned(self.allocator, self.on_commit, transition, changed)
+        return changed[0].status.value
+
+
+# Output DTO массовой смены статуса: skipped — id из запроса,
+# которым переход не разрешён (или их нет)
+@dataclass(frozen=True)
+class BulkStatusResult:
+    changed: int
+    skipped: Tuple[str, ...] = ()
+
+
+class BulkChangeReservationStatusHandler:
+    """
+    Use Case: массовая смена статуса (закрыть вечер, завершить все подтверждённые).
+
+    Агрегаты не поднимаются по одному: на пакет — один UPDATE ... RETURNING с инвариантами
+    перехода в WHERE (StatusTransition) и одна вставка событий в outbox, всё в одной
+    транзакции. Брони, которым переход не разрешён (например, отмена COMPLETED), не меняются.
+    """
+
+    def __init__(self, uow: UnitOfWork, allocator: TableAllocationService,
+                 on_commit: Optional[CommitListener] = None,
+                 batch_size: int = BULK_STATUS_BATCH_SIZE):
+        self.uow = uow
+        self.allocator = allocator
+        self.on_commit = on_commit
+        self.batch_size = batch_size
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("bulk_status"))
+    def __call__(self, cmd: BulkChangeReservationStatus) -> BulkStatusResult:
+        transition = TRANSITIONS[cmd.action]
+        if cmd.reservation_ids is not None:
+            ids = list(dict.fromkeys(cmd.reservation_ids))
+            changed = set()
+            for i in range(0, len(ids), self.batch_size):
+                batch = self._batch(transition, reservation_ids=ids[i:i + self.batch_size])
+                changed.update(r.reservation_id for r in batch)
+            return BulkStatusResult(changed=len(changed),
+                                    skipped=tuple(i for i in ids if i not in changed))
+
+        total = 0
+        while True:
+            # Переведённые брони из выборки выпадают, поэтому следующий пакет — снова "первые limit"
+            batch = self._batch(transition, start=cmd.start, end=cmd.end, limit=self.batch_size)
+            total += len(batch)
+            if len(batch) < self.batch_size:
+                return BulkStatusResult(changed=total)
+
+    def _batch(self, transition: StatusTransition, **target) -> List[Reservation]:
+        with self.uow:
+            changed = self.uow.reservations.transition_status(transition, **target)
+            if changed:
+                self.uow.reservations.add_events(transition.events_for(changed))
+            self.uow.commit()
+        _transitioned(self.allocator, self.on_commit, transition, changed)
+        return changed
+
+
+class JoinWaitlistHandler:
+    """
+    Use Case: поставить в лист ожидания запрос, которому не хватило стола
+    (CreateReservationHandler -> NoTableAvailable). Запись — в хранилище, затем в индекс процесса.
     """
 
-    def __init__(self, uow: UnitOfWork, allocator: TableAllocationService):
+    def __init__(self, uow: UnitOfWork, waitlist: WaitlistIndex):
+        self.uow = uow
+        self.waitlist = waitlist
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("waitlist_join"))
+    def __call__(self, cmd: CreateReservation) -> str:
+        slot = TimeSlot(cmd.slot_start, cmd.slot_start + timedelta(minutes=cmd.duration_min))
+        entry = WaitlistEntry(str(uuid.uuid4()), slot, PartySize.of(cmd.party_size).value,
+                              datetime.utcnow())
+        with self.uow:
+            self.uow.waitlist.add(entry)
+            self.uow.commit()
+        self.waitlist.add(entry)
+        return entry.entry_id
+
+
+class PromoteWaitlistHandler:
+    """
+    Use Case: отдать освободившиеся столы гостям из листа ожидания.
+
+    freed — брони, освободившие стол (отмена): кандидаты берутся из WaitlistIndex
+    только под их окна и вместимость; None — вырос каталог, кандидаты — весь лист.
+    Кандидаты идут в порядке очереди, стол выбирает обычный аллокатор; все повышенные
+    сохраняются одной транзакцией (брони + удаление из листа + события).
+
+    Если запись листа успел повысить другой воркер (DELETE её не вернул) или стол занят
+    (TableConflict), транзакция откатывается и пакет собирается заново без них.
+    Брони, уже закреплённые claim'ом, при откате снимаются (repository.release):
+    in-memory хранилище записывает их сразу, без транзакции.
+    """
+
+    def __init__(self, uow: UnitOfWork, allocator: TableAllocationService, waitlist: WaitlistIndex,
+                 on_commit: Optional[CommitListener] = None,
+                 batch_size: int = WAITLIST_PROMOTION_BATCH,
+                 max_attempts: int = MAX_BOOKING_ATTEMPTS):
         self.uow = uow
         self.allocator = allocator
+        self.waitlist = waitlist
+        self.on_commit = on_commit
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("waitlist_promote"))
+    def __call__(self, freed: Optional[Sequence[Reservation]],
+                 available_tables: AvailableTables) -> List[Reservation]:
+        if not len(self.waitlist):
+            return []
+        snapshot = as_snapshot(available_tables)
+        windows = []
+        for reservation in freed or ():
+            if reservation.table_id is None:
+                continue
+            capacity = _freed_capacity(snapshot, reservation.table_id)
+            if capacity:
+                windows.append((reservation.slot, capacity))
+        if freed is not None and not windows:
+            return []
+        entries = self.waitlist.take(windows, limit=self.batch_size)
+
+        promoted: List[Tuple[WaitlistEntry, ReservationAggregate]] = []
+        for _ in range(self.max_attempts):
+            promoted = []
+            for entry in entries:
+                reservation_aggregate = _waitlist_aggregate(entry)
+                try:
+                    self.allocator.hold(reservation_aggregate, snapshot)
+                except ValueError:
+                    continue
+                promoted.append((entry, reservation_aggregate))
+            if not promoted:
+                break
+            reservations = [a.root for _, a in promoted]
+            try:
+                with self.uow:
+                    self.uow.reservations.claim(reservations)
+                    removed = set(self.uow.waitlist.remove([e.entry_id for e, _ in promoted]))
+                    if len(removed) != len(promoted):
+                        raise _WaitlistChanged(removed)
+                    self.uow.reservations.add_many(reservations)
+                    self.uow.reservations.add_events(_promotion_events(promoted))
+                    self.uow.commit()
+                break
+            except (TableConflict, _WaitlistChanged) as e:
+                self.uow.reservations.release(reservations)
+                for reservation in reservations:
+                    self.allocator.release(reservation)
+                if isinstance(e, TableConflict):
+                    self.allocator.learn(e.conflicts)
+                else:
+                    # Повышенных другим воркером в лист не возвращаем
+                    gone = {entry.entry_id for entry, _ in promoted} - e.remaining
+                    entries = [entry for entry in entries if entry.entry_id not in gone]
+                promoted = []
+            except Exception:
+                self.uow.reservations.release(reservations)
+                for reservation in reservations:
+                    self.allocator.release(reservation)
+                self.waitlist.put_back(entries)
+                raise
+
+        promoted_ids = {e.entry_id for e, _ in promoted}
+        self.waitlist.put_back(e for e in entries if e.entry_id not in promoted_ids)
+        reservations = [a.root for _, a in promoted]
+        if reservations:
+            metrics.WAITLIST_PROMOTIONS.inc(len(reservations))
+            metrics.RESERVATIONS_CREATED.inc(len(reservations))
+            if self.on_commit is not None:
+                self.on_commit(reservations)
+        return reservations
 
-    def __call__(self, cmd: CreateReservation, available_tables: Iterable[Mapping]) -> str:
+
+class _WaitlistChanged(Exception):
+    """Часть записей листа уже удалена (повышена) другим воркером."""
+
+    def __init__(self, remaining: set) -> None:
+        super().__init__("Waitlist entries were promoted concurrently")
+        self.remaining = remaining
+
+
+def _waitlist_aggregate(entry: WaitlistEntry) -> ReservationAggregate:
+    duration_min = int((entry.slot.end - entry.slot.start).total_seconds() // 60)
+    return _new_aggregate(CreateReservation(entry.slot.start, duration_min, entry.party_size))
+
+
+def _promotion_events(
+        promoted: Sequence[Tuple[WaitlistEntry, ReservationAggregate]]) -> List[object]:
+    events = []
+    for entry, reservation_aggregate in promoted:
+        events.extend(reservation_aggregate.events)
+        events.append(WaitlistPromoted(entry.entry_id, reservation_aggregate.root.reservation_id,
+                                       datetime.utcnow()))
+    return events
+
+
+def _freed_capacity(snapshot: CatalogSnapshot, table_id: TableId) -> int:
+    # Освободившийся стол годится и в составе сдвинутых: берём самую вместительную группу с ним
+    parts = set(part_keys(table_id))
+    capacities = [snapshot.capacity_of(c) for c in snapshot.combinations
+                  if parts & set(part_keys(c))]
+    try:
+        capacities.append(snapshot.capacity_of(TableId.of(table_key(table_id))))
+    except ValueError:
+        pass  # стол уже убрали из плана зала
+    return max(capacities, default=0)
+
+
+class GetAvailabilityHandler:
+    """
+    Read-side use case: свободные старты по столам на день.
+
+    Расписание дня читается из репозитория одним range-запросом и кэшируется
+    по (день, версия каталога); ответ считается одним проходом sweep-line
+    по расписанию и тоже кэшируется до следующего commit в этот день.
+    """
+
+    def __init__(self, uow: UnitOfWork, cache: AvailabilityCache, opens, closes):
+        self.uow = uow
+        self.cache = cache
+        self.opens = opens
+        self.closes = closes
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("availability"))
+    def __call__(self, query: GetAvailability,
+                 snapshot: CatalogSnapshot) -> List[TableAvailability]:
+        key = _availability_key(query)
+        cached = self.cache.get_result(query.day, snapshot.version, key)
+        if cached is not None:
+            return cached
+
+        schedule = self.cache.get_schedule(query.day, snapshot.version)
+        if schedule is None:
+            token = self.cache.begin_load(query.day)
+            start, end = _day_bounds(query.day, self.opens, self.closes)
+            with self.uow:
+                reservations = self.uow.reservations.list_between(start - DAY_LOOKBACK, end)
+            schedule = self.cache.put_schedule(
+                DaySchedule.from_reservations(query.day, self.opens, self.closes, reservations),
+                snapshot.version, token,
+            )
+
+        return _answer(self.cache, schedule, query, snapshot, key)
+
+
+class AsyncGetAvailabilityHandler:
+    """Тот же read-side use case поверх AsyncUnitOfWork."""
+
+    def __init__(self, uow: AsyncUnitOfWork, cache: AvailabilityCache, opens, closes):
+        self.uow = uow
+        self.cache = cache
+        self.opens = opens
+        self.closes = closes
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("availability_async"))
+    async def __call__(self, query: GetAvailability,
+                       snapshot: CatalogSnapshot) -> List[TableAvailability]:
+        key = _availability_key(query)
+        cached = self.cache.get_result(query.day, snapshot.version, key)
+        if cached is not None:
+            return cached
+
+        schedule = self.cache.get_schedule(query.day, snapshot.version)
+        if schedule is None:
+            token = self.cache.begin_load(query.day)
+            start, end = _day_bounds(query.day, self.opens, self.closes)
+            async with self.uow:
+                reservations = await self.uow.reservations.list_between(start - DAY_LOOKBACK, end)
+            schedule = self.cache.put_schedule(
+                DaySchedule.from_reservations(query.day, self.opens, self.closes, reservations),
+                snapshot.version, token,
+            )
+
+        return _answer(self.cache, schedule, query, snapshot, key)
+
+
+class ListReservationsHandler:
+    """
+    Read-side use case: брони по дню / столу / статусу, страницами по (start_time, reservation_id).
+
+    Фильтр по столу включает сдвинутые группы с ним (из каталога): бронь на "T1+T3"
+    видна и в списке T1, и в списке T3.
+    """
+
+    def __init__(self, uow: UnitOfWork):
+        self.uow = uow
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("list"))
+    def __call__(self, query: ListReservations, snapshot: CatalogSnapshot) -> ReservationPage:
+        start, end = _list_bounds(query)
+        with self.uow:
+            # limit + 1: лишняя строка говорит, что следующая страница есть
+            rows = self.uow.reservations.list_page(start, end, _table_ids(query, snapshot),
+                                                   query.status, query.after, query.limit + 1)
+        return _page(rows, query.limit)
+
+
+class AsyncListReservationsHandler:
+    """Тот же read-side use case поверх AsyncUnitOfWork."""
+
+    def __init__(self, uow: AsyncUnitOfWork):
+        self.uow = uow
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("list_async"))
+    async def __call__(self, query: ListReservations, snapshot: CatalogSnapshot) -> ReservationPage:
+        start, end = _list_bounds(query)
+        async with self.uow:
+            rows = await self.uow.reservations.list_page(start, end, _table_ids(query, snapshot),
+                                                         query.status, query.after,
+                                                         query.limit + 1)
+        return _page(rows, query.limit)
+
+
+class GetDailyScheduleHandler:
+    """
+    Read-side use case: план зала на день для экранов хостес.
+
+    Читает только read model (одна запись на стол), брони и каталог не трогает;
+    read model поддерживает DailyScheduleProjection из событий outbox'а.
+    """
+
+    def __init__(self, read_model: DailyScheduleReadModel):
+        self.read_model = read_model
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("schedule"))
+    def __call__(self, query: GetDailySchedule) -> List[TableDaySchedule]:
+        return self.read_model.get_day(query.day, query.table_id)
+
+
+class RebuildDailyScheduleHandler:
+    """
+    Пересборка read model плана зала из броней: после сбоя проекции, при выкатке
+    новой read model, для записей outbox'а без слота в событиях.
+
+    Брони читаются потоком в порядке начала, документы дня собираются в памяти
+    и пишутся пачкой — на весь диапазон один проход по таблице броней.
+    """
+
+    def __init__(self, uow: UnitOfWork, read_model: DailyScheduleReadModel):
+        self.uow = uow
+        self.read_model = read_model
+
+    @metrics.timed(metrics.HANDLER_SECONDS.labels("rebuild_schedule"))
+    def __call__(self, cmd: RebuildDailySchedule) -> int:
+        start = (datetime.combine(cmd.start_day, datetime.min.time())
+                 if cmd.start_day else datetime.min)
+        end = datetime.combine(cmd.end_day, datetime.min.time()) if cmd.end_day else datetime.max
+        with self.uow:
+            reservations = self.uow.reservations.iter_reservations(start, end)
+            return self.read_model.rebuild(cmd.start_day, cmd.end_day,
+                                           table_day_schedules(reservations))
+
+
+def table_day_schedules(reservations: Iterable[Reservation]) -> Iterator[TableDaySchedule]:
+    """
+    Документы плана зала из броней, упорядоченных по началу:
+    дни идут подряд, в памяти — только текущий.
+    """
+    for day, same_day in itertools.groupby(reservations, key=lambda r: r.slot.start.date()):
+        by_table = {}
+        for r in same_day:
+            # Как в проекции: с плана бронь снимает только отмена, завершённая остаётся
+            if r.status == ReservationStatus.CANCELLED or r.table_id is None:
+                continue
+            slot = ScheduledSlot(r.reservation_id, r.slot.start, r.slot.end, r.party_size.value)
+            for key in part_keys(r.table_id):
+                by_table.setdefault(key, []).append(slot)
+        for table_id in sorted(by_table):
+            yield TableDaySchedule(day, table_id, tuple(by_table[table_id]))
+
+
+def _list_bounds(query: ListReservations):
+    if query.day is None:
+        return datetime.min, datetime.max
+    midnight = datetime.combine(query.day, datetime.min.time())
+    return midnight, midnight + timedelta(days=1)
+
+
+def _table_ids(query: ListReservations, snapshot: CatalogSnapshot):
+    if query.table_id is None:
+        return None
+    return [query.table_id] + [c.value for c in snapshot.combinations
+                               if query.table_id in part_keys(c)]
+
+
+def _page(rows: List[Reservation], limit: int) -> ReservationPage:
+    items = tuple(
+        ReservationView(reservation_id=r.reservation_id,
+                        table_id=r.table_id.value if r.table_id is not None else None,
+                        status=r.status.value, start_time=r.slot.start, end_time=r.slot.end,
+                        party_size=r.party_size.value)
+        for r in rows[:limit]
+    )
+    next_after = (items[-1].start_time, items[-1].reservation_id) if len(rows) > limit else None
+    return ReservationPage(items=items, next_after=next_after)
+
+
+def _availability_key(query: GetAvailability) -> tuple:
+    return query.party_size, query.duration_min, query.granularity_min
+
+
+def _day_bounds(day, opens, closes):
+    return datetime.combine(day, opens), datetime.combine(day, closes)
+
+
+def _answer(cache: AvailabilityCache, schedule: DaySchedule, query: GetAvailability,
+            snapshot: CatalogSnapshot, key: tuple) -> List[TableAvailability]:
+    result = [
+        TableAvailability(table_id=table_id.value, capacity=capacity, starts=tuple(starts))
+        for table_id, capacity, starts in availability(
+            schedule, snapshot, query.party_size,
+            timedelta(minutes=query.duration_min), timedelta(minutes=query.granularity_min),
+        )
+    ]
+    cache.put_result(query.day, snapshot.version, key, result)
+    return result
+
+
+def _new_aggregate(cmd: CreateReservation) -> ReservationAggregate:
+    started = time.perf_counter()
+    try:
         reservation = ReservationFactory.create(
             slot_start=cmd.slot_start,
             duration_min=cmd.duration_min,
             party_size=cmd.party_size,
+            restaurant_id=cmd.restaurant_id,
         )
+    finally:
+        metrics.FACTORY_SECONDS.observe(time.perf_counter() - started)
 
-        reservation_aggregate = ReservationAggregate(root=reservation)
+    return ReservationAggregate.new(root=reservation)
 
-        table_id = self.allocator.allocate(reservation, available_tables)
-        reservation_aggregate.assign_table(table_id)
 
-        with self.uow:
-            self.uow.reservations.add(reservation)
-            self.uow.commit()
+def _hold_batch(allocator: TableAllocationService,
+                reservation_aggregates: List[ReservationAggregate],
+                available_tables: AvailableTables) -> list:
+    if not reservation_aggregates:
+        return []
+    started = time.perf_counter()
+    try:
+        table_ids = allocator.hold_batch(reservation_aggregates, available_tables)
+    finally:
+        metrics.ALLOCATION_SECONDS.observe(time.perf_counter() - started)
+    rejected = sum(1 for t in table_ids if t is None)
+    if rejected:
+        metrics.ALLOCATION_FAILURES.inc(rejected)
+    return table_ids
 
-        return reservation.reservation_id
+
+def _transitioned(allocator: TableAllocationService, on_commit: Optional[CommitListener],
+                  transition: StatusTransition, changed: List[Reservation]) -> None:
+    if not changed:
+        return
+    metrics.STATUS_TRANSITIONS.labels(transition.name).inc(len(changed))
+    if transition.target not in OCCUPYING_STATUSES:
+        for reservation in changed:
+            allocator.release(reservation)
+    if on_commit is not None:
+        on_commit(changed)
+
+
+def _table_conflict(allocator: TableAllocationService, conflict: TableConflict,
+                    attempt: int, max_attempts: int) -> None:
+    # Стол уже освобождён вызывающим; чужие брони — в индекс, чтобы не выбрать его снова
+    metrics.BOOKING_CONFLICTS.inc()
+    allocator.learn(conflict.conflicts)
+    if attempt >= max_attempts:
+        raise conflict
+
+
+def _allocate_reservation(cmd: CreateReservation, allocator: TableAllocationService,
+                          available_tables: AvailableTables) -> ReservationAggregate:
+    reservation_aggregate = _new_aggregate(cmd)
+
+    # Стол выбирается и сразу удерживается: следующие запросы его не получат
+    started = time.perf_counter()
+    try:
+        allocator.hold(reservation_aggregate, available_tables)
+    except NoTableAvailable:
+        metrics.ALLOCATION_FAILURES.inc()
+        raise
+    finally:
+        metrics.ALLOCATION_SECONDS.observe(time.perf_counter() - started)
+    return reservation_aggregate
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Hashable, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from ..domain.availability import DaySchedule
+from ..domain.model import Reservation, ReservationStatus
+from ..domain.repository import Keyset
+
+
+# Запрос = входные данные read-side use case
+@dataclass(frozen=True)
+class GetAvailability:
+    day: date
+    party_size: int
+    duration_min: int
+    granularity_min: int = 15
+
+
+# Output DTO: свободные старты одного стола (или группы сдвинутых столов)
+@dataclass(frozen=True)
+class TableAvailability:
+    table_id: str
+    capacity: int
+    starts: Tuple[datetime, ...]
+
+
+# Запрос списка броней: фильтры + keyset-позиция (after) вместо номера страницы
+@dataclass(frozen=True)
+class ListReservations:
+    day: Optional[date] = None
+    table_id: Optional[str] = None
+    status: Optional[ReservationStatus] = None
+    limit: int = 50
+    after: Optional[Keyset] = None
+
+
+# Output DTO: бронь в списке
+@dataclass(frozen=True)
+class ReservationView:
+    reservation_id: str
+    table_id: Optional[str]
+    status: str
+    start_time: datetime
+    end_time: datetime
+    party_size: int
+
+
+# Output DTO: страница; next_after=None — дальше пусто
+@dataclass(frozen=True)
+class ReservationPage:
+    items: Tuple[ReservationView, ...]
+    next_after: Optional[Keyset]
+
+
+# Запрос плана зала на день (read model, без обращения к броням)
+@dataclass(frozen=True)
+class GetDailySchedule:
+    day: date
+    table_id: Optional[str] = None
+
+
+# Занятый слот в плане зала
+@dataclass(frozen=True)
+class ScheduledSlot:
+    reservation_id: str
+    start_time: datetime
+    end_time: datetime
+    party_size: int
+
+
+# Документ read model: занятые слоты одного физического стола за день, по времени
+@dataclass(frozen=True)
+class TableDaySchedule:
+    day: date
+    table_id: str
+    slots: Tuple[ScheduledSlot, ...]
+
+
+# Порт read model "план зала на день" (выходной порт): одна запись на (день, стол)
+class DailyScheduleReadModel(Protocol):
+    def get_day(self, day: date, table_id: Optional[str] = None) -> List[TableDaySchedule]: ...
+    def place(self, day: date, table_ids: Sequence[str], slot: ScheduledSlot) -> None: ...
+    def remove(self, day: date, table_ids: Sequence[str], reservation_id: str) -> None: ...
+    def rebuild(self, start_day: Optional[date], end_day: Optional[date],
+                schedules: Iterable[TableDaySchedule]) -> int: ...
+
+
+# Порт кэша доступности (выходной порт): расписания дней и готовые ответы
+class AvailabilityCache(Protocol):
+    def begin_load(self, day: date) -> int: ...
+    def get_schedule(self, day: date, version: int) -> Optional[DaySchedule]: ...
+    def put_schedule(self, schedule: DaySchedule, version: int, token: int) -> DaySchedule: ...
+    def get_result(self, day: date, version: int,
+                   key: Hashable) -> Optional[List[TableAvailability]]: ...
+    def put_result(self, day: date, version: int, key: Hashable,
+                   result: List[TableAvailability]) -> None: ...
+    def reservations_committed(self, reservations: Sequence[Reservation]) -> None: ...
@@ -2,15 +2,31 @@ from __future__ import annotations
 
 from typing import Protocol
 
-from ..domain.repository import ReservationRepository
+from ..domain.repository import (
+    AsyncReservationRepository,
+    ReservationRepository,
+    WaitlistRepository,
+)
 
 
 # Unit of Work Port (выходной порт)
 class UnitOfWork(Protocol):
     reservations: ReservationRepository
+    waitlist: WaitlistRepository
 
     def __enter__(self) -> "UnitOfWork": ...
     def __exit__(self, exc_type, exc, tb) -> None: ...
 
     def commit(self) -> None: ...
     def rollback(self) -> None: ...
+
+
+# Асинхронный Unit of Work Port: не держит поток на время обращения к БД
+class AsyncUnitOfWork(Protocol):
+    reservations: AsyncReservationRepository
+
+    async def __aenter__(self) -> "AsyncUnitOfWork": ...
+    async def __aexit__(self, exc_type, exc, tb) -> None: ...
+
+    async def commit(self) -> None: ...
+    async def rollback(self) -> None: ...
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .catalog import CatalogSnapshot
+from .model import Reservation, TableId
+from .occupancy import OccupancyIndex, part_keys
+
+
+# Стоимость плана сравнивается лексикографически:
+# (отказы, пустые места, число сдвинутых столов) — меньше лучше
+Cost = Tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class AllocationPlan:
+    """
+    Результат пакетного распределения.
+
+    optimal=False — перебор упёрся в бюджет времени; план тогда лучший из найденных
+    (не хуже жадного).
+    """
+    assignments: Dict[str, TableId]
+    rejected: Tuple[str, ...]
+    wasted_seats: int
+    optimal: bool
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class _Option:
+    __slots__ = ("table_id", "keys", "waste", "combined")
+
+    def __init__(self, table_id: TableId, capacity: int, party_size: int) -> None:
+        self.table_id = table_id
+        self.keys = part_keys(table_id)
+        self.waste = capacity - party_size
+        self.combined = 1 if len(self.keys) > 1 else 0
+
+
+class BatchAllocationSolver:
+    """
+    Распределяет окно ожидающих броней целиком, а не по одной.
+
+    Жадный выбор "самый маленький свободный стол" для каждой брони по очереди
+    отдаёт большие столы ранним маленьким компаниям и потом отказывает большим.
+    Здесь ищется назначение с минимумом отказов, затем — пустых мест, затем —
+    сдвинутых столов: branch and bound, стартуя с жадного решения как верхней оценки.
+
+    time_budget — жёсткий предел на один solve (секунды): по его истечении
+    возвращается лучший найденный план.
+    """
+
+    # Как часто (в узлах перебора) смотреть на часы
+    _CLOCK_EVERY = 64
+
+    def __init__(self, time_budget: float = 0.02) -> None:
+        self.time_budget = time_budget
+
+    def solve(self, reservations: Sequence[Reservation], snapshot: CatalogSnapshot,
+              occupancy: OccupancyIndex) -> AllocationPlan:
+        # Варианты каждой брони: подходящие по вместимости и свободные в уже принятом расписании
+        options: Dict[str, List[_Option]] = {}
+        for r in reservations:
+            party = r.party_size.value
+            options[r.reservation_id] = [
+                _Option(table_id, capacity, party)
+                for capacity, table_id in snapshot.options(party)
+                if occupancy.is_free(table_id, r.slot)
+            ]
+
+        # Сначала самые ограниченные: меньше вариантов, больше компания
+        order = sorted(reservations,
+                       key=lambda r: (len(options[r.reservation_id]), -r.party_size.value))
+        search = _Search(order, options, time.perf_counter() + self.time_budget, self._CLOCK_EVERY)
+        return search.run()
+
+
+class _Search:
+    def __init__(self, order: List[Reservation], options: Dict[str, List[_Option]],
+                 deadline: float, clock_every: int) -> None:
+        self.order = order
+        self.options = [options[r.reservation_id] for r in order]
+        self.deadline = deadline
+        self.clock_every = clock_every
+        self.nodes = 0
+
+        # Нижняя оценка хвоста: брони без вариантов точно отказаны,
+        # остальным нужно хотя бы минимальное число пустых мест
+        n = len(order)
+        self.rest_rejections = [0] * (n + 1)
+        self.rest_waste = [0] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            opts = self.options[k]
+            self.rest_rejections[k] = self.rest_rejections[k + 1] + (0 if opts else 1)
+            best = min(o.waste for o in opts) if opts else 0
+            self.rest_waste[k] = self.rest_waste[k + 1] + best
+
+        # Временные назначения внутри плана: ключ стола -> [(start, end)]
+        self.busy: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        self.current: List[Optional[_Option]] = [None] * n
+        self.best_cost: Optional[Cost] = None
+        self.best: List[Optional[_Option]] = [None] * n
+
+    def run(self) -> AllocationPlan:
+        self._greedy()
+        optimal = True
+        try:
+            self._branch(0, 0, 0, 0)
+        except _BudgetExceeded:
+            optimal = False
+
+        assignments = {}
+        rejected = []
+        for r, option in zip(self.order, self.best):
+            if option is None:
+                rejected.append(r.reservation_id)
+            else:
+                assignments[r.reservation_id] = option.table_id
+        return AllocationPlan(assignments=assignments, rejected=tuple(rejected),
+                              wasted_seats=self.best_cost[1], optimal=optimal)
+
+    # ---------- перебор ----------
+
+    def _greedy(self) -> None:
+        cost = [0, 0, 0]
+        for k, r in enumerate(self.order):
+            option = next((o for o in self.options[k] if self._fits(o, r)), None)
+            self.current[k] = option
+            if option is None:
+                cost[0] += 1
+            else:
+                self._take(option, r)
+                cost[1] += option.waste
+                cost[2] += option.combined
+        self._record(tuple(cost))
+        for k, r in enumerate(self.order):
+            if self.current[k] is not None:
+                self._release(self.current[k], r)
+                self.current[k] = None
+
+    def _branch(self, k: int, rejections: int, waste: int, combined: int) -> None:
+        self.nodes += 1
+        if self.nodes % self.clock_every == 0 and time.perf_counter() > self.deadline:
+            raise _BudgetExceeded
+
+        lower = (rejections + self.rest_rejections[k], waste + self.rest_waste[k], combined)
+        if lower >= self.best_cost:
+            return
+        if k == len(self.order):
+            self._record((rejections, waste, combined))
+            return
+
+        r = self.order[k]
+        for option in self.options[k]:
+            if not self._fits(option, r):
+                continue
+            self._take(option, r)
+            self.current[k] = option
+            self._branch(k + 1, rejections, waste + option.waste, combined + option.combined)
+            self.current[k] = None
+            self._release(option, r)
+
+        # Отказ этой брони: иногда он освобождает стол для двух других
+        self._branch(k + 1, rejections + 1, waste, combined)
+
+    def _record(self, cost: Cost) -> None:
+        if self.best_cost is None or cost < self.best_cost:
+            self.best_cost = cost
+            self.best = list(self.current)
+
+    # ---------- временная занятость ----------
+
+    def _fits(self, option: _Option, r: Reservation) -> bool:
+        start, end = r.slot.start, r.slot.end
+        for key in option.keys:
+            for s, e in self.busy.get(key, ()):
+                if s < end and start < e:
+                    return False
+        return True
+
+    def _take(self, option: _Option, r: Reservation) -> None:
+        for key in option.keys:
+            self.busy.setdefault(key, []).append((r.slot.start, r.slot.end))
+
+    def _release(self, option: _Option, r: Reservation) -> None:
+        for key in option.keys:
+            self.busy[key].remove((r.slot.start, r.slot.end))
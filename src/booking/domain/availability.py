@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import heapq
+from bisect import insort
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from .catalog import CatalogSnapshot
+from .model import Reservation, TableId
+from .occupancy import OCCUPYING_STATUSES, part_keys
+
+
+Interval = Tuple[datetime, datetime]
+
+
+class DaySchedule:
+    """
+    Занятость всех физических столов за один день: table_key -> отсортированные [start, end).
+
+    Не зависит от размера компании и длительности, поэтому один DaySchedule
+    обслуживает любые запросы доступности на этот день. Новая бронь
+    добавляется точечно (add), без перечитывания дня из репозитория.
+    """
+
+    __slots__ = ("day", "opens_at", "closes_at", "_busy")
+
+    def __init__(self, day: date, opens: time, closes: time) -> None:
+        self.day = day
+        self.opens_at = datetime.combine(day, opens)
+        self.closes_at = datetime.combine(day, closes)
+        self._busy: Dict[str, List[Interval]] = {}
+
+    @classmethod
+    def from_reservations(cls, day: date, opens: time, closes: time,
+                          reservations: Iterable[Reservation]) -> "DaySchedule":
+        schedule = cls(day, opens, closes)
+        for reservation in reservations:
+            schedule.add(reservation)
+        return schedule
+
+    def touches(self, reservation: Reservation) -> bool:
+        return reservation.slot.start < self.closes_at and reservation.slot.end > self.opens_at
+
+    def add(self, reservation: Reservation) -> None:
+        if (reservation.table_id is None or reservation.status not in OCCUPYING_STATUSES
+                or not self.touches(reservation)):
+            return
+        interval = (reservation.slot.start, reservation.slot.end)
+        for key in part_keys(reservation.table_id):
+            # Список заменяется, а не меняется на месте: параллельный читатель
+            # дочитывает свою (старую) версию без локов
+            busy = list(self._busy.get(key, ()))
+            insort(busy, interval)
+            self._busy[key] = busy
+
+    def busy(self, table_id: TableId) -> Iterable[Interval]:
+        """Занятые интервалы стола (для сдвинутых — объединение по всем его столам), по началу."""
+        keys = part_keys(table_id)
+        if len(keys) == 1:
+            return self._busy.get(keys[0], ())
+        return heapq.merge(*(self._busy.get(k, ()) for k in keys))
+
+    def bookable_starts(self, table_id: TableId, duration: timedelta,
+                        granularity: timedelta) -> List[datetime]:
+        """
+        Sweep-line: один проход по занятым интервалам стола.
+        Между занятыми интервалами выдаём все старты сетки с шагом granularity
+        (от открытия), при которых [start, start + duration) не задевает занятость
+        и укладывается до закрытия.
+        """
+        starts: List[datetime] = []
+        free_from = self.opens_at
+        for busy_start, busy_end in self.busy(table_id):
+            if busy_end <= free_from:
+                continue
+            self._emit(starts, free_from, busy_start - duration, granularity)
+            free_from = busy_end
+            if free_from >= self.closes_at:
+                return starts
+        self._emit(starts, free_from, self.closes_at - duration, granularity)
+        return starts
+
+    def _emit(self, starts: List[datetime], earliest: datetime, latest: datetime,
+              granularity: timedelta) -> None:
+        # первый узел сетки не раньше earliest
+        steps = -((self.opens_at - earliest) // granularity)
+        t = self.opens_at + granularity * max(steps, 0)
+        while t <= latest:
+            starts.append(t)
+            t += granularity
+
+
+def availability(schedule: DaySchedule, snapshot: CatalogSnapshot, party_size: int,
+                 duration: timedelta,
+                 granularity: timedelta) -> List[Tuple[TableId, int, List[datetime]]]:
+    """(стол, вместимость, старты) для каждого стола и группы столов, вмещающих party_size."""
+    return [
+        (table_id, capacity, schedule.bookable_starts(table_id, duration, granularity))
+        for capacity, table_id in snapshot.options(party_size)
+    ]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Iterable, List, Mapping, Sequence, Tuple
+
+from .model import TableId
+
+
+class CatalogSnapshot:
+    """
+    Неизменяемый снимок каталога столов, отсортированный по вместимости.
+
+    Строится один раз на версию каталога; распределение стола по нему —
+    bisect по вместимости без разбора mapping'ов и без сортировки на каждый запрос.
+
+    combinations — группы соседних столов, которые можно сдвинуть под одну компанию
+    (например, ("T1", "T3")). Вместимость группы — сумма вместимостей её столов;
+    группы с неизвестными столами пропускаются.
+    """
+
+    __slots__ = ("version", "_capacities", "_table_ids", "_combined_capacities", "_combined_ids")
+
+    def __init__(self, tables: Iterable[Tuple[str, int]], version: int = 0,
+                 combinations: Iterable[Sequence[str]] = ()) -> None:
+        ordered = sorted((int(capacity), str(table_id)) for table_id, capacity in tables)
+        self.version = version
+        self._capacities: Tuple[int, ...] = tuple(c for c, _ in ordered)
+        self._table_ids: Tuple[TableId, ...] = tuple(TableId.of(t) for _, t in ordered)
+
+        capacity_by_id = {t: c for c, t in ordered}
+        combined = sorted(
+            ((sum(capacity_by_id[str(m)] for m in group), TableId.combined(group))
+             for group in combinations
+             if len(group) > 1 and all(str(m) in capacity_by_id for m in group)),
+            key=lambda item: (item[0], item[1].value),
+        )
+        self._combined_capacities: Tuple[int, ...] = tuple(c for c, _ in combined)
+        self._combined_ids: Tuple[TableId, ...] = tuple(t for _, t in combined)
+
+    @classmethod
+    def from_mappings(cls, tables: Iterable[Mapping], version: int = 0) -> "CatalogSnapshot":
+        """available_tables в старом формате: [{"id": "T1", "capacity": 4}, ...]"""
+        return cls(((t["id"], t["capacity"]) for t in tables), version=version)
+
+    def candidates(self, party_size: int) -> Tuple[TableId, ...]:
+        """Столы вместимостью >= party_size, по возрастанию вместимости."""
+        return self._table_ids[bisect_left(self._capacities, party_size):]
+
+    def combined_candidates(self, party_size: int) -> Tuple[TableId, ...]:
+        """Группы сдвинутых столов вместимостью >= party_size, по возрастанию вместимости."""
+        return self._combined_ids[bisect_left(self._combined_capacities, party_size):]
+
+    def options(self, party_size: int) -> List[Tuple[int, TableId]]:
+        """
+        Все варианты посадки (вместимость, стол): одиночные и сдвинутые,
+        по возрастанию вместимости.
+        """
+        singles = bisect_left(self._capacities, party_size)
+        combined = bisect_left(self._combined_capacities, party_size)
+        # при равной вместимости одиночный стол раньше сдвинутых (sorted стабилен)
+        return sorted(
+            list(zip(self._capacities[singles:], self._table_ids[singles:]))
+            + list(zip(self._combined_capacities[combined:], self._combined_ids[combined:])),
+            key=lambda option: option[0],
+        )
+
+    @property
+    def combinations(self) -> Tuple[TableId, ...]:
+        return self._combined_ids
+
+    def capacity_of(self, table_id: TableId) -> int:
+        if table_id.is_combined:
+            return self._combined_capacities[self._combined_ids.index(table_id)]
+        return self._capacities[self._table_ids.index(table_id)]
+
+    def as_mappings(self) -> list:
+        return [{"id": t.value, "capacity": c} for t, c in zip(self._table_ids, self._capacities)]
+
+    def __len__(self) -> int:
+        return len(self._table_ids)
+
+    def __iter__(self):
+        return iter(zip(self._table_ids, self._capacities))
@@ -2,29 +2,58 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 
 
-# Domain Events = факты, которые произошли в домене
-@dataclass(frozen=True)
+# Domain Events = факты, которые произошли в домене.
+# Слот и размер компании в событиях — для подписчиков вне агрегата (проекции расписания):
+# им не нужно перечитывать бронь. В старых записях outbox'а этих полей нет — None.
+# restaurant_id: заведение брони (None в старых записях — заведение по умолчанию).
+@dataclass(frozen=True, slots=True)
 class ReservationCreated:
     reservation_id: str
     occurred_at: datetime
+    slot_start: Optional[datetime] = None
+    slot_end: Optional[datetime] = None
+    party_size: Optional[int] = None
+    restaurant_id: Optional[str] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReservationConfirmed:
     reservation_id: str
     occurred_at: datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReservationCancelled:
     reservation_id: str
     occurred_at: datetime
+    table_id: Optional[str] = None
+    slot_start: Optional[datetime] = None
+    restaurant_id: Optional[str] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class ReservationCompleted:
+    reservation_id: str
+    occurred_at: datetime
+
+
+# Гость из листа ожидания получил бронь (для уведомления гостя)
+@dataclass(frozen=True, slots=True)
+class WaitlistPromoted:
+    entry_id: str
+    reservation_id: str
+    occurred_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
 class TableAssigned:
     reservation_id: str
     table_id: str
     occurred_at: datetime
+    slot_start: Optional[datetime] = None
+    slot_end: Optional[datetime] = None
+    party_size: Optional[int] = None
+    restaurant_id: Optional[str] = None
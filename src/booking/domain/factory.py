@@ -1,16 +1,17 @@
 import uuid
 from datetime import timedelta
 
-from .model import Reservation, TimeSlot, PartySize, TableId, ReservationStatus
+from .model import DEFAULT_RESTAURANT, Reservation, TimeSlot, PartySize, TableId, ReservationStatus
 
 
 class ReservationFactory:
     @staticmethod
-    def create(slot_start, duration_min, party_size):
+    def create(slot_start, duration_min, party_size, restaurant_id=DEFAULT_RESTAURANT):
         return Reservation(
             reservation_id=str(uuid.uuid4()),  # ← генерируем id
             slot=TimeSlot(start=slot_start, end=slot_start + timedelta(minutes=duration_min)),
-            party_size=PartySize(value=party_size),
+            party_size=PartySize.of(party_size),
             status=ReservationStatus.CREATED,
             table_id=None,
+            restaurant_id=restaurant_id,
         )
\ No newline at end of file
@@ -9,14 +9,32 @@ from .events import (
     ReservationCreated,
     ReservationConfirmed,
     ReservationCancelled,
+    ReservationCompleted,
     TableAssigned,
 )
 
 # =============================================================================
 # VALUE OBJECTS (VO)
 # =============================================================================
+# slots=True: у VO нет __dict__ — в памяти держим сезон броней, это заметно.
+# Мелкие PartySize и известные TableId интернируются (PartySize.of / TableId.of):
+# одинаковые значения — один и тот же объект.
+# =============================================================================
+
+# Интернируем гостей 1..MAX_INTERNED_PARTY_SIZE: это почти все реальные брони
+MAX_INTERNED_PARTY_SIZE = 32
+
+_party_sizes: dict = {}
+_table_ids: dict = {}
+
+# Сдвинутые столы: TableId("T1+T3") занимает T1 и T3 одновременно
+COMBINED_TABLE_SEPARATOR = "+"
+
+# Заведение, если его не указали: однозальная установка и старые данные
+DEFAULT_RESTAURANT = "default"
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TimeSlot:
     start: datetime
     end: datetime
@@ -26,7 +44,7 @@ class TimeSlot:
             raise ValueError("TimeSlot invariant: start must be < end")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PartySize:
     value: int
 
@@ -34,11 +52,45 @@ class PartySize:
         if self.value < 1:
             raise ValueError("PartySize invariant: must be >= 1")
 
+    @classmethod
+    def of(cls, value: int) -> PartySize:
+        cached = _party_sizes.get(value)
+        if cached is not None:
+            return cached
+        party_size = cls(value)
+        if value <= MAX_INTERNED_PARTY_SIZE:
+            _party_sizes[value] = party_size
+        return party_size
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TableId:
     value: str
 
+    @classmethod
+    def of(cls, value: str) -> TableId:
+        # Столов в каталоге немного, поэтому кэш не ограничиваем
+        cached = _table_ids.get(value)
+        if cached is None:
+            cached = _table_ids[value] = cls(value)
+        return cached
+
+    @classmethod
+    def combined(cls, parts) -> TableId:
+        return cls.of(COMBINED_TABLE_SEPARATOR.join(
+            p.value if isinstance(p, TableId) else str(p) for p in parts))
+
+    @property
+    def is_combined(self) -> bool:
+        return COMBINED_TABLE_SEPARATOR in self.value
+
+    @property
+    def parts(self) -> tuple:
+        """Физические столы: (self,) для обычного стола, члены группы — для сдвинутых."""
+        if COMBINED_TABLE_SEPARATOR not in self.value:
+            return (self,)
+        return tuple(TableId.of(p) for p in self.value.split(COMBINED_TABLE_SEPARATOR))
+
 
 class ReservationStatus(str, Enum):
     CREATED = "CREATED"
@@ -60,10 +112,13 @@ class Reservation:
     Entity:
     - имеет устойчивую идентичность: id
     - содержит состояние: slot, party_size, table_id, status
+    - restaurant_id — ключ партиционирования: бронь живёт в шарде своего заведения
     - сама по себе НЕ является границей согласованности.
       Граница (Aggregate) будет отдельным объектом.
     """
 
+    __slots__ = ("reservation_id", "slot", "party_size", "table_id", "status", "restaurant_id")
+
     def __init__(
             self,
             reservation_id: str,
@@ -71,12 +126,14 @@ class Reservation:
             party_size: PartySize,
             table_id=None,
             status=ReservationStatus.CREATED,
+            restaurant_id: str = DEFAULT_RESTAURANT,
     ):
         self.reservation_id = reservation_id  # ← теперь обязательное поле
         self.slot = slot
         self.party_size = party_size
         self.table_id = table_id
         self.status = status
+        self.restaurant_id = restaurant_id
 
 
 # =============================================================================
@@ -102,6 +159,8 @@ class ReservationAggregate:
     Внешний код вызывает методы агрегата, а агрегат меняет root.
     """
 
+    __slots__ = ("_root", "events")
+
     def __init__(self, root: Reservation) -> None:
         self._root = root
         self.events: List[Any] = []
@@ -115,8 +174,15 @@ class ReservationAggregate:
     @classmethod
     def create(cls, reservation_id: str, slot: TimeSlot, party_size: PartySize) -> ReservationAggregate:
         root = Reservation(reservation_id=reservation_id, slot=slot, party_size=party_size)
+        return cls.new(root)
+
+    @classmethod
+    def new(cls, root: Reservation) -> ReservationAggregate:
+        # Агрегат для только что созданной (Factory) брони: фиксируем факт создания
         agg = cls(root)
-        agg.events.append(ReservationCreated(root.id, datetime.utcnow()))
+        agg.events.append(ReservationCreated(root.reservation_id, datetime.utcnow(),
+                                             root.slot.start, root.slot.end,
+                                             root.party_size.value, root.restaurant_id))
         return agg
 
     # ---------- Operations (изменяют root и защищают инварианты) ----------
@@ -127,7 +193,10 @@ class ReservationAggregate:
             raise ValueError("Invariant: can assign table only for CREATED reservation")
 
         self._root.table_id = table_id
-        self.events.append(TableAssigned(self._root.reservation_id, table_id.value, datetime.utcnow()))
+        self.events.append(TableAssigned(self._root.reservation_id, table_id.value,
+                                         datetime.utcnow(), self._root.slot.start,
+                                         self._root.slot.end, self._root.party_size.value,
+                                         self._root.restaurant_id))
 
     def confirm(self) -> None:
         # Invariant: confirm only from CREATED
@@ -151,7 +220,7 @@ class ReservationAggregate:
             return
 
         self._root.status = ReservationStatus.CANCELLED
-        self.events.append(ReservationCancelled(self._root.id, datetime.utcnow()))
+        self.events.append(cancelled(self._root, datetime.utcnow()))
 
     def mark_completed(self) -> None:
         # Invariant: can complete only CONFIRMED
@@ -159,3 +228,11 @@ class ReservationAggregate:
             raise ValueError("Invariant: can complete only CONFIRMED reservation")
 
         self._root.status = ReservationStatus.COMPLETED
+        self.events.append(ReservationCompleted(self._root.reservation_id, datetime.utcnow()))
+
+
+def cancelled(reservation: Reservation, occurred_at: datetime) -> ReservationCancelled:
+    # Стол и начало слота — чтобы проекции сняли бронь со своего (дня, стола) без чтения БД
+    table_id = reservation.table_id.value if reservation.table_id is not None else None
+    return ReservationCancelled(reservation.reservation_id, occurred_at, table_id,
+                                reservation.slot.start, reservation.restaurant_id)
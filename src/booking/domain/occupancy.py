@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from .model import COMBINED_TABLE_SEPARATOR, Reservation, ReservationStatus, TableId, TimeSlot
+
+
+# Статусы, при которых бронь занимает стол
+OCCUPYING_STATUSES = frozenset({ReservationStatus.CREATED, ReservationStatus.CONFIRMED})
+
+
+def table_key(table_id) -> str:
+    """
+    Ключ стола в индексе.
+    SqlAlchemy-репозиторий исторически отдаёт table_id строкой, домен — TableId.
+    """
+    if isinstance(table_id, TableId):
+        return table_id.value
+    return str(table_id)
+
+
+def part_keys(table_id) -> List[str]:
+    """Ключи физических столов: сдвинутые столы "T1+T3" занимают и T1, и T3."""
+    key = table_key(table_id)
+    if COMBINED_TABLE_SEPARATOR not in key:
+        return [key]
+    return key.split(COMBINED_TABLE_SEPARATOR)
+
+
+class TableSchedule:
+    """
+    Расписание одного стола: отсортированные по началу НЕпересекающиеся интервалы [start, end).
+
+    Раз интервалы не пересекаются, концы отсортированы так же, как начала,
+    поэтому проверка "свободен ли стол на [start, end)" — это один bisect: O(log n).
+    """
+
+    __slots__ = ("_starts", "_ends", "_ids")
+
+    def __init__(self) -> None:
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        self._ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def reservation_ids(self) -> Iterable[str]:
+        return iter(self._ids)
+
+    def _conflict_position(self, start: datetime, end: datetime) -> Optional[int]:
+        # Первый интервал, который начинается не раньше end, — все левее начинаются раньше end.
+        i = bisect_left(self._starts, end)
+        # Из них пересекаться может только последний: у него самый поздний конец.
+        if i > 0 and self._ends[i - 1] > start:
+            return i - 1
+        return None
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        return self._conflict_position(start, end) is None
+
+    def add(self, reservation_id: str, start: datetime, end: datetime) -> None:
+        if not self.is_free(start, end):
+            raise ValueError("Invariant: table is already booked for an overlapping slot")
+
+        i = bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._ids.insert(i, reservation_id)
+
+    def remove(self, reservation_id: str, start: datetime) -> bool:
+        i = bisect_left(self._starts, start)
+        while i < len(self._starts) and self._starts[i] == start:
+            if self._ids[i] == reservation_id:
+                del self._starts[i]
+                del self._ends[i]
+                del self._ids[i]
+                return True
+            i += 1
+        return False
+
+
+class OccupancyIndex:
+    """
+    Индекс занятости: table_id -> TableSchedule.
+
+    Расписания ведутся по физическим столам: бронь на сдвинутые столы "T1+T3"
+    лежит и в расписании T1, и в расписании T3.
+
+    Наполняется из репозитория (from_reservations) и поддерживается
+    в актуальном состоянии хендлером после каждого commit.
+    """
+
+    def __init__(self) -> None:
+        self._schedules: Dict[str, TableSchedule] = {}
+
+    @classmethod
+    def from_reservations(cls, reservations: Iterable[Reservation]) -> "OccupancyIndex":
+        index = cls()
+        for reservation in sorted(reservations, key=lambda r: r.slot.start):
+            index.add(reservation)
+        return index
+
+    def is_free(self, table_id, slot: TimeSlot) -> bool:
+        for key in part_keys(table_id):
+            schedule = self._schedules.get(key)
+            if schedule is not None and not schedule.is_free(slot.start, slot.end):
+                return False
+        return True
+
+    def add(self, reservation: Reservation) -> None:
+        if reservation.table_id is None or reservation.status not in OCCUPYING_STATUSES:
+            return
+        keys = part_keys(reservation.table_id)
+        # Сначала проверяем все столы группы, чтобы не занять её частично
+        if len(keys) > 1 and not self.is_free(reservation.table_id, reservation.slot):
+            raise ValueError("Invariant: table is already booked for an overlapping slot")
+        for key in keys:
+            schedule = self._schedules.get(key)
+            if schedule is None:
+                schedule = self._schedules[key] = TableSchedule()
+            schedule.add(reservation.reservation_id, reservation.slot.start, reservation.slot.end)
+
+    def remove(self, reservation: Reservation) -> bool:
+        if reservation.table_id is None:
+            return False
+        removed = False
+        for key in part_keys(reservation.table_id):
+            schedule = self._schedules.get(key)
+            if (schedule is not None
+                    and schedule.remove(reservation.reservation_id, reservation.slot.start)):
+                removed = True
+        return removed
+
+    def __len__(self) -> int:
+        # Бронь на сдвинутые столы считается один раз
+        return len({i for s in self._schedules.values() for i in s.reservation_ids()})
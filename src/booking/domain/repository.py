@@ -1,12 +1,109 @@
 from __future__ import annotations
 
-from typing import Protocol, Optional, List
+from datetime import datetime
+from typing import AsyncIterator, Protocol, Optional, Iterator, List, Iterable, Sequence, Tuple
 
-from .model import Reservation, TimeSlot
+from .model import Reservation, ReservationStatus, TimeSlot
+from .transitions import StatusTransition
+from .waitlist import WaitlistEntry
+
+
+# Позиция в выборке, упорядоченной по (start_time, reservation_id): keyset-пагинация
+Keyset = Tuple[datetime, str]
+
+
+class TableConflict(ValueError):
+    """
+    Стол брони уже занят на пересекающийся слот другой бронью
+    (её закоммитил другой воркер/процесс, пока мы выбирали стол).
+    conflicts — мешающие брони: аллокатор учитывает их при повторном выборе.
+    """
+
+    def __init__(self, conflicts: Sequence[Reservation] = ()) -> None:
+        super().__init__("Table is already booked for an overlapping slot")
+        self.conflicts = list(conflicts)
+
+
+class ReservationNotFound(LookupError):
+    def __init__(self, reservation_id: str) -> None:
+        super().__init__(f"Reservation {reservation_id} not found")
+        self.reservation_id = reservation_id
+
+
+# Порт листа ожидания: записи — в хранилище, поиск кандидатов — WaitlistIndex в процессе
+class WaitlistRepository(Protocol):
+    def add(self, entry: WaitlistEntry) -> None: ...
+    # Возвращает id реально удалённых: запись, которую уже повысил другой воркер, не вернётся
+    def remove(self, entry_ids: Sequence[str]) -> List[str]: ...
+    def list_all(self) -> List[WaitlistEntry]: ...
+    # Записи, поставленные в лист позже after (по created_at): дозагрузка индекса процесса
+    def list_since(self, after: datetime) -> List[WaitlistEntry]: ...
 
 
 # Repository Port (выходной порт)
 class ReservationRepository(Protocol):
     def get(self, reservation_id: str) -> Optional[Reservation]: ...
     def add(self, reservation: Reservation) -> None: ...
+    def add_many(self, reservations: Iterable[Reservation]) -> None: ...
+    # Доменные события агрегата — в outbox, в той же транзакции, что и сама бронь
+    def add_events(self, events: Iterable[object]) -> None: ...
     def list_for_slot(self, slot: TimeSlot) -> List[Reservation]: ...
+
+    # Закрепляет столы броней за их слотами в текущей транзакции, все или ни одного:
+    # после claim до commit никто другой не займёт их на пересекающееся время.
+    # Иначе — TableConflict.
+    def claim(self, reservations: Sequence[Reservation]) -> None: ...
+
+    # Снять claim броней, чья транзакция откатилась. Нужно хранилищу без транзакций
+    # (in-memory записывает брони уже в claim); остальные снимают его откатом сами
+    def release(self, reservations: Sequence[Reservation]) -> None: ...
+
+    # Брони стола (включая сдвинутые столы с ним), пересекающиеся с [start, end),
+    # по возрастанию начала
+    def list_overlapping(self, table_id: str, start: datetime,
+                         end: datetime) -> List[Reservation]: ...
+
+    # Брони, начинающиеся в [start, end), по возрастанию начала
+    def list_between(self, start: datetime, end: datetime) -> List[Reservation]: ...
+
+    # Set-based смена статуса: переводит только брони, которым переход разрешён, и отдаёт их
+    # уже в новом статусе. reservation_ids — эти брони;
+    # иначе — до limit броней с началом в [start, end)
+    def transition_status(self, transition: StatusTransition,
+                          reservation_ids: Optional[Sequence[str]] = None,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          limit: Optional[int] = None) -> List[Reservation]: ...
+
+    # Страница броней с началом в [start, end) по (start_time, reservation_id) строго после after.
+    # table_ids — точные table_id (стол и сдвинутые группы с ним), status — только в этом статусе
+    def list_page(self, start: datetime, end: datetime, table_ids: Optional[Sequence[str]] = None,
+                  status: Optional[ReservationStatus] = None, after: Optional[Keyset] = None,
+                  limit: int = 50) -> List[Reservation]: ...
+
+    # То же потоком, пачками по batch_size: для больших диапазонов и выгрузок.
+    # after — продолжить строго после этого ключа (возобновление выгрузки)
+    def iter_reservations(self, start: datetime, end: datetime, batch_size: int = ...,
+                          after: Optional[Keyset] = None) -> Iterator[Reservation]: ...
+
+
+# Асинхронный вариант порта (AsyncSession и т.п.) — те же операции, но awaitable
+class AsyncReservationRepository(Protocol):
+    async def get(self, reservation_id: str) -> Optional[Reservation]: ...
+    async def add(self, reservation: Reservation) -> None: ...
+    async def add_many(self, reservations: Iterable[Reservation]) -> None: ...
+    async def add_events(self, events: Iterable[object]) -> None: ...
+    async def list_for_slot(self, slot: TimeSlot) -> List[Reservation]: ...
+    async def claim(self, reservations: Sequence[Reservation]) -> None: ...
+    async def list_overlapping(self, table_id: str, start: datetime,
+                               end: datetime) -> List[Reservation]: ...
+    async def list_between(self, start: datetime, end: datetime) -> List[Reservation]: ...
+    async def transition_status(self, transition: StatusTransition,
+                                reservation_ids: Optional[Sequence[str]] = None,
+                                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                limit: Optional[int] = None) -> List[Reservation]: ...
+    async def list_page(self, start: datetime, end: datetime,
+                        table_ids: Optional[Sequence[str]] = None,
+                        status: Optional[ReservationStatus] = None, after: Optional[Keyset] = None,
+                        limit: int = 50) -> List[Reservation]: ...
+    def iter_reservations(self, start: datetime, end: datetime, batch_size: int = ...,
+                          after: Optional[Keyset] = None) -> AsyncIterator[Reservation]: ...
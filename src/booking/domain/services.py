@@ -1,28 +1,113 @@
 from __future__ import annotations
 
-from typing import Iterable, Mapping
+import threading
+from typing import Iterable, List, Mapping, Optional, Sequence, Union
 
-from .model import Reservation, TableId
+from .allocation import BatchAllocationSolver
+from .catalog import CatalogSnapshot
+from .model import Reservation, ReservationAggregate, TableId
+from .occupancy import OccupancyIndex
+
+
+AvailableTables = Union[CatalogSnapshot, Iterable[Mapping]]
+
+NO_TABLE = "No suitable table available"
+
+
+class NoTableAvailable(ValueError):
+    """Под слот и размер компании нет свободного стола — ни одиночного, ни сдвинутых."""
+
+    def __init__(self) -> None:
+        super().__init__(NO_TABLE)
 
 
 # Domain Service = доменная логика, не принадлежащая одной сущности.
 class TableAllocationService:
-    def allocate(self, reservation: Reservation, available_tables: Iterable[Mapping]) -> TableId:
+    def __init__(self, occupancy: Optional[OccupancyIndex] = None,
+                 solver: Optional[BatchAllocationSolver] = None) -> None:
+        # Индекс занятости столов; без него каждый запрос попадал бы на один и тот же стол.
+        self.occupancy = occupancy if occupancy is not None else OccupancyIndex()
+        # Пакетный оптимизатор для окна броней (hold_batch)
+        self.solver = solver if solver is not None else BatchAllocationSolver()
+        # Сервис общий на всё приложение: выбор стола и его удержание — атомарно
+        self._lock = threading.Lock()
+
+    def allocate(self, reservation: Reservation, available_tables: AvailableTables) -> TableId:
         """
-        Выбираем стол для брони.
+        Выбираем стол для брони: самый маленький подходящий по вместимости
+        и свободный на весь слот брони.
 
-        available_tables: iterable of mappings like:
+        available_tables: CatalogSnapshot (основной путь) или iterable of mappings like:
           {"id": "T1", "capacity": 4}
 
         В реальном проекте это мог бы быть запрос в Seating Context,
         но внутри Booking мы потребляем лишь нужную проекцию (Published Language).
         """
-        suitable = [
-            t for t in available_tables
-            if int(t["capacity"]) >= reservation.party_size.value
-        ]
-        if not suitable:
-            raise ValueError("No suitable table available")
+        snapshot = as_snapshot(available_tables)
+
+        # bisect: пропускаем все столы меньше party_size, дальше идём по возрастанию вместимости
+        for table_id in snapshot.candidates(reservation.party_size.value):
+            if self.occupancy.is_free(table_id, reservation.slot):
+                return table_id
+
+        # Отдельного стола нет (или компания больше любого стола) — сдвигаем соседние
+        for table_id in snapshot.combined_candidates(reservation.party_size.value):
+            if self.occupancy.is_free(table_id, reservation.slot):
+                return table_id
+
+        raise NoTableAvailable()
+
+    def hold(self, reservation_aggregate: ReservationAggregate,
+             available_tables: AvailableTables) -> TableId:
+        """
+        allocate + assign_table + отметка стола занятым — под одним коротким локом,
+        чтобы параллельные запросы не получили один и тот же стол.
+        Если бронь затем не удалось сохранить, стол возвращают через release().
+        """
+        with self._lock:
+            table_id = self.allocate(reservation_aggregate.root, available_tables)
+            reservation_aggregate.assign_table(table_id)
+            self.occupancy.add(reservation_aggregate.root)
+        return table_id
+
+    def hold_batch(self, reservation_aggregates: Sequence[ReservationAggregate],
+                   available_tables: AvailableTables) -> List[Optional[TableId]]:
+        """
+        Распределение окна броней целиком (BatchAllocationSolver): минимум отказов,
+        затем пустых мест. Под тем же локом, что и hold; время решения ограничено
+        бюджетом солвера. Возвращает стол для каждой брони по порядку (None — отказ).
+        """
+        snapshot = as_snapshot(available_tables)
+        with self._lock:
+            roots = [a.root for a in reservation_aggregates]
+            plan = self.solver.solve(roots, snapshot, self.occupancy)
+            result = []
+            for aggregate in reservation_aggregates:
+                table_id = plan.assignments.get(aggregate.root.reservation_id)
+                if table_id is not None:
+                    aggregate.assign_table(table_id)
+                    self.occupancy.add(aggregate.root)
+                result.append(table_id)
+        return result
+
+    def release(self, reservation: Reservation) -> None:
+        with self._lock:
+            self.occupancy.remove(reservation)
+
+    def learn(self, reservations: Iterable[Reservation]) -> None:
+        """
+        Учесть брони, сохранённые в обход этого сервиса (другой воркер/процесс):
+        их показал TableConflict при commit. Уже известные пропускаются.
+        """
+        with self._lock:
+            for reservation in reservations:
+                try:
+                    self.occupancy.add(reservation)
+                except ValueError:
+                    pass
+
 
-        chosen = min(suitable, key=lambda t: int(t["capacity"]))
-        return TableId(str(chosen["id"]))
+def as_snapshot(available_tables: AvailableTables) -> CatalogSnapshot:
+    if isinstance(available_tables, CatalogSnapshot):
+        return available_tables
+    return CatalogSnapshot.from_mappings(available_tables)
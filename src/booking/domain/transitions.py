@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence
+
+from .events import ReservationCompleted, ReservationConfirmed
+from .model import Reservation, ReservationAggregate, ReservationStatus, cancelled
+
+
+@dataclass(frozen=True)
+class StatusTransition:
+    """
+    Смена статуса как данные: те же инварианты, что в методах ReservationAggregate,
+    но в виде, пригодном для одного set-based UPDATE по многим броням
+    (WHERE status IN allowed_from [AND table_id IS NOT NULL]).
+    """
+    name: str
+    allowed_from: FrozenSet[ReservationStatus]
+    target: ReservationStatus
+    # Событие по уже переведённой брони: (reservation, occurred_at)
+    event: Callable[[Reservation, datetime], object]
+    # Операция над одним агрегатом (со всеми проверками и событием)
+    apply: Callable[[ReservationAggregate], None]
+    requires_table: bool = False
+
+    def allows(self, reservation: Reservation) -> bool:
+        return (reservation.status in self.allowed_from
+                and (not self.requires_table or reservation.table_id is not None))
+
+    def events_for(self, reservations: Sequence[Reservation],
+                   occurred_at: Optional[datetime] = None) -> List[object]:
+        """События пакета, уже переведённого UPDATE'ом: по одному на бронь, с общим временем."""
+        occurred_at = occurred_at or datetime.utcnow()
+        return [self.event(r, occurred_at) for r in reservations]
+
+
+CONFIRM = StatusTransition("confirm", frozenset({ReservationStatus.CREATED}),
+                           ReservationStatus.CONFIRMED,
+                           lambda r, at: ReservationConfirmed(r.reservation_id, at),
+                           ReservationAggregate.confirm,
+                           requires_table=True)
+# CANCELLED -> CANCELLED — не ошибка (cancel идемпотентна), но и не изменение: в UPDATE не попадает
+CANCEL = StatusTransition("cancel",
+                          frozenset({ReservationStatus.CREATED, ReservationStatus.CONFIRMED}),
+                          ReservationStatus.CANCELLED, cancelled, ReservationAggregate.cancel)
+COMPLETE = StatusTransition("complete", frozenset({ReservationStatus.CONFIRMED}),
+                            ReservationStatus.COMPLETED,
+                            lambda r, at: ReservationCompleted(r.reservation_id, at),
+                            ReservationAggregate.mark_completed)
+
+TRANSITIONS: Dict[str, StatusTransition] = {t.name: t for t in (CONFIRM, CANCEL, COMPLETE)}
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .model import TimeSlot
+
+
+@dataclass(frozen=True)
+class WaitlistEntry:
+    """
+    Гость, которому не хватило стола: ждёт слот [slot.start, slot.end) на party_size.
+    Очерёдность — по времени постановки (created_at), при равенстве — по id.
+    """
+    entry_id: str
+    slot: TimeSlot
+    party_size: int
+    created_at: datetime
+
+    @property
+    def priority(self) -> Tuple[datetime, str]:
+        return self.created_at, self.entry_id
+
+
+class WaitlistIndex:
+    """
+    Индекс листа ожидания в процессе.
+
+    Записи разложены по размеру компании, внутри — отсортированы по началу слота.
+    Освободился стол вместимостью C на [start, end) — кандидаты ищутся bisect'ом
+    только в корзинах party_size <= C и только среди слотов, пересекающих окно:
+    O(P · log n + k), где P — число различных размеров компании (единицы).
+    Найденные отдаются в порядке очереди через heap (priority queue), без пересмотра
+    всего листа на каждую отмену.
+
+    take/put_back: кандидат забирается из индекса на время попытки повышения, чтобы
+    параллельная отмена в этом же процессе не повысила его второй раз.
+    """
+
+    def __init__(self, entries: Iterable[WaitlistEntry] = ()) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, WaitlistEntry] = {}
+        # party_size -> [(start, end, entry_id)] по возрастанию
+        self._by_party: Dict[int, List[Tuple[datetime, datetime, str]]] = {}
+        # party_size -> самая длинная длительность: нижняя граница начала пересекающих слотов
+        self._longest: Dict[int, timedelta] = {}
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._entries
+
+    def add(self, entry: WaitlistEntry) -> None:
+        with self._lock:
+            if entry.entry_id in self._entries:
+                return
+            self._entries[entry.entry_id] = entry
+            insort(self._by_party.setdefault(entry.party_size, []),
+                   (entry.slot.start, entry.slot.end, entry.entry_id))
+            duration = entry.slot.end - entry.slot.start
+            if duration > self._longest.get(entry.party_size, timedelta(0)):
+                self._longest[entry.party_size] = duration
+
+    def remove(self, entry_ids: Iterable[str]) -> List[WaitlistEntry]:
+        with self._lock:
+            return [e for e in (self._remove(i) for i in entry_ids) if e is not None]
+
+    def sync(self, entries: Iterable[WaitlistEntry]) -> None:
+        """
+        Дополнить индекс записями, поставленными в лист другими воркерами (уже известные
+        пропускаются). Повышенные другими воркерами отсеиваются лениво: их DELETE при
+        повышении ничего не вернёт, и PromoteWaitlistHandler не вернёт их в индекс.
+        """
+        for entry in entries:
+            self.add(entry)
+
+    def take(self, windows: Sequence[Tuple[TimeSlot, int]],
+             limit: Optional[int] = None) -> List[WaitlistEntry]:
+        """
+        Забрать кандидатов под освободившиеся окна (слот, вместимость) в порядке очереди.
+        Без окон — весь лист (каталог вырос: подойти может кто угодно).
+        """
+        with self._lock:
+            if windows:
+                found: Dict[str, WaitlistEntry] = {}
+                for slot, capacity in windows:
+                    for entry in self._overlapping(slot, capacity):
+                        found[entry.entry_id] = entry
+                heap = [(e.priority, e) for e in found.values()]
+            else:
+                heap = [(e.priority, e) for e in self._entries.values()]
+            heapq.heapify(heap)
+            taken = []
+            while heap and (limit is None or len(taken) < limit):
+                taken.append(self._remove(heapq.heappop(heap)[1].entry_id))
+            return taken
+
+    def put_back(self, entries: Iterable[WaitlistEntry]) -> None:
+        for entry in entries:
+            self.add(entry)
+
+    def _overlapping(self, slot: TimeSlot, capacity: int) -> Iterable[WaitlistEntry]:
+        for party_size, bucket in self._by_party.items():
+            if party_size > capacity:
+                continue
+            # Пересекают окно слоты с началом в (slot.start - longest, slot.end)
+            lo = bisect_left(bucket, (slot.start - self._longest[party_size],))
+            hi = bisect_left(bucket, (slot.end,))
+            for start, end, entry_id in bucket[lo:hi]:
+                if end > slot.start:
+                    yield self._entries[entry_id]
+
+    def _remove(self, entry_id: str) -> Optional[WaitlistEntry]:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        bucket = self._by_party[entry.party_size]
+        i = bisect_left(bucket, (entry.slot.start, entry.slot.end, entry.entry_id))
+        del bucket[i]
+        if not bucket:
+            del self._by_party[entry.party_size]
+            del self._longest[entry.party_size]
+        return entry
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.booking.application.handlers import PromoteWaitlistHandler
+from src.booking.domain.allocation import BatchAllocationSolver
+from src.booking.domain.model import DEFAULT_RESTAURANT, Reservation
+from src.booking.domain.occupancy import OCCUPYING_STATUSES, OccupancyIndex
+from src.booking.domain.services import TableAllocationService
+from src.booking.domain.waitlist import WaitlistIndex
+from src.booking.infrastructure.available_tables import (
+    InMemoryTableSource,
+    SqlAlchemyTableSource,
+    TableCatalog,
+)
+from src.booking.infrastructure.availability_cache import InMemoryAvailabilityCache
+from src.booking.infrastructure.database import (
+    SessionLocal,
+    create_async_session_factory,
+    dispose_engine,
+    init_engine,
+)
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.event_log import EventLogStore
+from src.booking.infrastructure.outbox import OutboxDispatcher, SqlAlchemyOutbox
+from src.booking.infrastructure.repositories import (
+    InMemoryReservationRepository,
+    InMemoryWaitlistRepository,
+    SqlAlchemyReservationRepository,
+    SqlAlchemyWaitlistRepository,
+)
+from src.booking.infrastructure.reservation_cache import ReservationCache
+from src.booking.infrastructure.schedule import (
+    DailyScheduleProjection,
+    InMemoryDailySchedule,
+    SqlAlchemyDailySchedule,
+)
+from src.booking.infrastructure.settings import (
+    AppSettings,
+    STORAGE_EVENTLOG,
+    STORAGE_SQLALCHEMY,
+    STORAGE_SQLALCHEMY_ASYNC,
+)
+from src.booking.infrastructure.sharding import (
+    MAIN_SHARD,
+    DirectoryShardRouter,
+    HashShardRouter,
+    ShardedDatabase,
+)
+from src.booking.infrastructure.uow import (
+    AsyncSqlAlchemyUnitOfWork,
+    EventLogUnitOfWork,
+    InMemoryUnitOfWork,
+    ShardedUnitOfWork,
+)
+
+
+# Брони, закончившиеся раньше, на распределение столов уже не влияют
+OCCUPANCY_LOOKBACK = timedelta(days=1)
+# Дозагрузка листа ожидания перечитывает записи не старше watermark минус это окно:
+# created_at ставит воркер до commit, запись с меньшим временем может стать видна позже
+WAITLIST_SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class Venue:
+    """
+    Заведение (кроме заведения по умолчанию): свой каталог столов, аллокатор с индексом
+    занятости и кэш доступности; UoW открывается на шарде заведения.
+
+    Заведение по умолчанию — сам Container (те же атрибуты); лист ожидания
+    и план зала (GET /schedule) ведутся только для него.
+    """
+
+    def __init__(self, restaurant_id: str, catalog: TableCatalog,
+                 allocator: TableAllocationService, availability: InMemoryAvailabilityCache,
+                 uow_factory: Callable[[], object]) -> None:
+        self.restaurant_id = restaurant_id
+        self.catalog = catalog
+        self.allocator = allocator
+        self.availability = availability
+        self._uow_factory = uow_factory
+
+    def uow(self):
+        return self._uow_factory()
+
+    def async_uow(self):
+        # AsyncSession есть только у основной БД заведения по умолчанию
+        return None
+
+    def reservations_changed(self, reservations: Sequence[Reservation]) -> None:
+        self.availability.reservations_committed(reservations)
+
+
+def shard_router(settings: AppSettings) -> DirectoryShardRouter:
+    """
+    Явная карта shard_map, остальные заведения — rendezvous-хешем по всем шардам.
+    Заведение по умолчанию всегда в основной БД: там его лист ожидания и план зала.
+    """
+    names = [MAIN_SHARD, *(name for name, _ in settings.shards)]
+    directory = {**dict(settings.shard_map), DEFAULT_RESTAURANT: MAIN_SHARD}
+    return DirectoryShardRouter(directory, fallback=HashShardRouter(names))
+
+
+class Container:
+    """
+    Composition Root: всё тяжёлое (движок, фабрика сессий, каталог столов, аллокатор
+    с индексом занятости) создаётся один раз на процесс.
+    На запрос выдаётся только дешёвый UoW поверх общего хранилища.
+
+    storage=memory     — общее потокобезопасное in-memory хранилище (демо, тесты)
+    storage=sqlalchemy — БД из настроек; общая для всех воркеров
+    storage=sqlalchemy-async — то же; создание брони, доступность и список броней
+                         заведения по умолчанию идут через AsyncSession, без threadpool
+    storage=eventlog   — состояние в памяти, долговечность — журнал событий со снапшотами
+                         (один процесс на каталог журнала, одно заведение)
+
+    Заведения (restaurant_id) — venue(), только из реестра settings.venues / shard_map
+    (неизвестный id не заводит новое заведение): при storage=sqlalchemy каждое в своём шарде
+    (settings.shards / shard_map), при storage=memory — в своём хранилище в памяти.
+    """
+
+    restaurant_id = DEFAULT_RESTAURANT
+
+    def __init__(self, settings: AppSettings) -> None:
+        self.settings = settings
+        self.shards: Optional[ShardedDatabase] = None
+        self._venues: Dict[str, Venue] = {}
+        self._venues_lock = threading.Lock()
+        self._served = {DEFAULT_RESTAURANT, *settings.venues,
+                        *(venue for venue, _ in settings.shard_map)}
+
+        self.async_engine = self.async_session_factory = None
+        if settings.storage in (STORAGE_SQLALCHEMY, STORAGE_SQLALCHEMY_ASYNC):
+            self.engine = init_engine(settings.database)
+            Base.metadata.create_all(self.engine)
+            self.session_factory = SessionLocal
+            self.shards = ShardedDatabase(shard_router(settings), dict(settings.shards),
+                                          settings.database, main=self.session_factory)
+            self.event_store = None
+            self.reservations = None
+            self.catalog = TableCatalog(SqlAlchemyTableSource(self.session_factory),
+                                        settings.table_combinations, ttl=settings.catalog_ttl)
+            outbox = SqlAlchemyOutbox(self.session_factory)
+            self.schedule = SqlAlchemyDailySchedule(self.session_factory)
+            occupancy = self._load_occupancy(self.session_factory, DEFAULT_RESTAURANT)
+            self.waitlist_entries = None
+            if settings.storage == STORAGE_SQLALCHEMY_ASYNC:
+                self.async_engine, self.async_session_factory = create_async_session_factory(
+                    settings=settings.database)
+            # Горячие брони по id (подтверждение, отмена, ресепшен) — без похода в БД
+            self.reservation_cache = (ReservationCache(settings.reservation_cache_size,
+                                                       settings.reservation_cache_ttl)
+                                      if settings.reservation_cache_size > 0 else None)
+        else:
+            self.engine = None
+            self.session_factory = None
+            self.reservation_cache = None
+            self.event_store = None
+            if settings.storage == STORAGE_EVENTLOG:
+                self.event_store = EventLogStore(settings.event_log_dir,
+                                                 settings.event_log_snapshot_every)
+                self.reservations = self.event_store.state
+            else:
+                self.reservations = InMemoryReservationRepository()
+            self.catalog = TableCatalog(InMemoryTableSource(), settings.table_combinations)
+            outbox = self.reservations.outbox
+            # storage=eventlog: проигранные при старте события в outbox не попадают —
+            # день плана зала собирается из восстановленных броней при первом чтении
+            self.schedule = InMemoryDailySchedule(
+                self.reservations.iter_reservations if self.event_store is not None else None)
+            if self.event_store is not None:
+                self.waitlist_entries = self.event_store.waitlist
+                occupancy = OccupancyIndex.from_reservations(self.reservations.iter_reservations(
+                    datetime.now() - OCCUPANCY_LOOKBACK, datetime.max))
+            else:
+                self.waitlist_entries = InMemoryWaitlistRepository()
+                occupancy = OccupancyIndex()
+
+        self.allocator = self._allocator(occupancy)
+        # Доступность по дням; обновляется после каждого commit новых броней
+        self.availability = self._availability_cache()
+        # Лист ожидания: записи в хранилище, индекс подбора — в процессе
+        self._waitlist_watermark: Optional[datetime] = None
+        self.waitlist = WaitlistIndex(self._load_waitlist())
+        self.catalog.subscribe(self.promote_waitlist)
+        # Подписчики (уведомления, проекции) регистрируются через outbox_dispatcher.subscribe
+        self.outbox_dispatcher = OutboxDispatcher(outbox, batch_size=settings.outbox_batch_size)
+        # У каждого дополнительного шарда свой outbox — и свой разборщик
+        self.shard_dispatchers = [
+            OutboxDispatcher(SqlAlchemyOutbox(self.shards.shard(name)),
+                             batch_size=settings.outbox_batch_size)
+            for name, _ in (settings.shards if self.shards is not None else ())
+        ]
+        # Read model плана зала (GET /schedule) догоняет брони через outbox
+        projection = DailyScheduleProjection(self.schedule)
+        for dispatcher in (self.outbox_dispatcher, *self.shard_dispatchers):
+            projection.subscribe(dispatcher)
+
+    def start(self) -> None:
+        """Фоновые задачи; запускаются из lifespan (в тестах без lifespan — не стартуют)."""
+        for dispatcher in (self.outbox_dispatcher, *self.shard_dispatchers):
+            dispatcher.start(self.settings.outbox_interval)
+
+    def _allocator(self, occupancy: OccupancyIndex) -> TableAllocationService:
+        solver = BatchAllocationSolver(self.settings.allocation_time_budget)
+        return TableAllocationService(occupancy, solver)
+
+    def _availability_cache(self) -> InMemoryAvailabilityCache:
+        return InMemoryAvailabilityCache(max_days=self.settings.availability_cache_days,
+                                         ttl=self.settings.availability_cache_ttl)
+
+    @staticmethod
+    def _load_occupancy(session_factory, restaurant_id: str) -> OccupancyIndex:
+        session = session_factory()
+        try:
+            repo = SqlAlchemyReservationRepository(session, restaurant_id=restaurant_id)
+            return OccupancyIndex.from_reservations(
+                repo.iter_reservations(datetime.now() - OCCUPANCY_LOOKBACK, datetime.max)
+            )
+        finally:
+            session.close()
+
+    def _load_waitlist(self, after: Optional[datetime] = None):
+        """
+        Без after — лист целиком (старт), иначе только записи новее after (created_at),
+        чтобы повышение не перечитывало весь лист на каждую отмену.
+        """
+        if self.session_factory is None:
+            return self.waitlist_entries.list_all()
+        with self.session_factory() as session:
+            repo = SqlAlchemyWaitlistRepository(session)
+            entries = repo.list_all() if after is None else repo.list_since(after)
+        if entries:
+            newest = max(entry.created_at for entry in entries)
+            if self._waitlist_watermark is None or newest > self._waitlist_watermark:
+                self._waitlist_watermark = newest
+        return entries
+
+    def uow(self):
+        if self.shards is not None:
+            return ShardedUnitOfWork(self.shards, DEFAULT_RESTAURANT, self.reservation_cache,
+                                     self.settings.table_combinations)
+        if self.event_store is not None:
+            return EventLogUnitOfWork(self.event_store)
+        return InMemoryUnitOfWork(self.reservations, self.waitlist_entries)
+
+    def async_uow(self) -> Optional[AsyncSqlAlchemyUnitOfWork]:
+        """AsyncUnitOfWork на основной БД (storage=sqlalchemy-async), иначе None."""
+        if self.async_session_factory is None:
+            return None
+        return AsyncSqlAlchemyUnitOfWork(self.async_session_factory(), self.reservation_cache,
+                                         self.settings.table_combinations,
+                                         restaurant_id=DEFAULT_RESTAURANT)
+
+    def venue(self, restaurant_id: str):
+        """Заведение по id; LookupError — заведение здесь не обслуживается."""
+        if restaurant_id == DEFAULT_RESTAURANT:
+            return self
+        if restaurant_id not in self._served:
+            raise LookupError(f"Unknown restaurant {restaurant_id!r}")
+        venue = self._venues.get(restaurant_id)
+        if venue is None:
+            with self._venues_lock:
+                venue = self._venues.get(restaurant_id)
+                if venue is None:
+                    venue = self._venues[restaurant_id] = self._new_venue(restaurant_id)
+        return venue
+
+    def _new_venue(self, restaurant_id: str) -> Venue:
+        combinations = self.settings.table_combinations
+        if self.shards is not None:
+            session_factory = self.shards.session_factory(restaurant_id)
+            catalog = TableCatalog(SqlAlchemyTableSource(session_factory, restaurant_id),
+                                   combinations, ttl=self.settings.catalog_ttl)
+            occupancy = self._load_occupancy(session_factory, restaurant_id)
+
+            def uow():
+                return ShardedUnitOfWork(self.shards, restaurant_id, self.reservation_cache,
+                                         combinations)
+        elif self.event_store is None:
+            # storage=memory: отдельное хранилище на заведение, outbox общий
+            reservations = InMemoryReservationRepository(self.reservations.outbox)
+            catalog = TableCatalog(InMemoryTableSource(), combinations)
+            occupancy = OccupancyIndex()
+
+            def uow():
+                return InMemoryUnitOfWork(reservations)
+        else:
+            raise LookupError(f"Restaurant {restaurant_id!r} is not served by storage=eventlog")
+        return Venue(restaurant_id, catalog, self._allocator(occupancy),
+                     self._availability_cache(), uow)
+
+    def reservations_changed(self, reservations: Sequence[Reservation]) -> None:
+        """
+        Слушатель commit смены статуса: кэш доступности + освободившиеся столы —
+        листу ожидания.
+        """
+        self.availability.reservations_committed(reservations)
+        freed = [r for r in reservations if r.status not in OCCUPYING_STATUSES]
+        if freed:
+            self.promote_waitlist(freed)
+
+    def promote_waitlist(self, freed: Optional[Sequence[Reservation]] = None) -> List[Reservation]:
+        if self.session_factory is not None:
+            # Лист в БД общий для воркеров: записи, добавленные другими, индекс процесса
+            # дозагружает по watermark; повышенные другими отсеются на DELETE при повышении
+            watermark = self._waitlist_watermark
+            self.waitlist.sync(self._load_waitlist(
+                datetime.min if watermark is None else watermark - WAITLIST_SYNC_OVERLAP))
+        if not len(self.waitlist):
+            return []
+        uow = self.uow()
+        try:
+            handler = PromoteWaitlistHandler(uow, self.allocator, self.waitlist,
+                                             on_commit=self.availability.reservations_committed,
+                                             max_attempts=self.settings.booking_max_attempts)
+            return handler(freed, self.catalog.snapshot())
+        finally:
+            session = getattr(uow, "session", None)
+            if session is not None:
+                session.close()
+
+    async def close_async(self) -> None:
+        """Async-движок закрывается в event loop (из lifespan), до close()."""
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+            self.async_engine = self.async_session_factory = None
+
+    def close(self) -> None:
+        for dispatcher in (self.outbox_dispatcher, *self.shard_dispatchers):
+            dispatcher.stop()
+        if self.event_store is not None:
+            self.event_store.close()
+        if self.shards is not None:
+            self.shards.dispose()
+        if self.engine is not None:
+            dispose_engine()
+
+
+_container: Optional[Container] = None
+_container_lock = threading.Lock()
+
+
+def init_container(settings: Optional[AppSettings] = None) -> Container:
+    global _container
+    with _container_lock:
+        if _container is None:
+            _container = Container(settings or AppSettings.from_env())
+        return _container
+
+
+def get_container() -> Container:
+    # Обычно контейнер создаёт lifespan; без него (ASGITransport в тестах) — лениво
+    return _container if _container is not None else init_container()
+
+
+def close_container() -> None:
+    global _container
+    with _container_lock:
+        if _container is not None:
+            _container.close()
+            _container = None
@@ -0,0 +1,31 @@
+"""
+Непрозрачные курсоры keyset-пагинации для HTTP: (start_time, reservation_id) <-> строка.
+
+Клиент курсор не разбирает, а только передаёт обратно; формат можно менять,
+не ломая API.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+
+from src.booking.domain.repository import Keyset
+
+
+_SEPARATOR = "|"
+
+
+def encode_cursor(start_time: datetime, reservation_id: str) -> str:
+    raw = f"{start_time.isoformat()}{_SEPARATOR}{reservation_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """ValueError — курсор повреждён или не наш."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, reservation_id = raw.split(_SEPARATOR, 1)
+        return datetime.fromisoformat(start_time), reservation_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,83 @@
+"""
+Потоковая выгрузка истории броней (GET /reservations/export): NDJSON или CSV.
+
+Брони читаются из репозитория потоком (iter_reservations) и сериализуются
+пачками сразу в текст, без промежуточных dict: память не зависит от диапазона.
+Каждая строка несёт курсор — с него выгрузку можно продолжить после обрыва.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from json.encoder import encode_basestring
+from typing import Callable, Iterable, Iterator
+
+from src.booking.domain.model import Reservation
+from src.booking.entrypoints.cursors import encode_cursor
+
+
+# Сколько броней сериализуется в один кусок ответа
+EXPORT_CHUNK_ROWS = 1000
+
+CSV_COLUMNS = ("reservation_id", "table_id", "status", "start_time", "end_time", "party_size",
+               "cursor")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def ndjson_chunks(reservations: Iterable[Reservation],
+                  chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    def line(r: Reservation) -> str:
+        table_id = encode_basestring(r.table_id.value) if r.table_id is not None else "null"
+        start = r.slot.start.isoformat()
+        end = r.slot.end.isoformat()
+        cursor = encode_cursor(r.slot.start, r.reservation_id)
+        return (f'{{"reservation_id":{encode_basestring(r.reservation_id)},"table_id":{table_id},'
+                f'"status":"{r.status.value}","start_time":"{start}","end_time":"{end}",'
+                f'"party_size":{r.party_size.value},"cursor":"{cursor}"}}\n')
+
+    return _chunks(reservations, line, chunk_rows)
+
+
+def csv_chunks(reservations: Iterable[Reservation],
+               chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue().encode()
+
+    def line(r: Reservation) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow((r.reservation_id, r.table_id.value if r.table_id is not None else "",
+                         r.status.value, r.slot.start.isoformat(), r.slot.end.isoformat(),
+                         r.party_size.value, encode_cursor(r.slot.start, r.reservation_id)))
+        return buffer.getvalue()
+
+    yield from _chunks(reservations, line, chunk_rows)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Сжатие потоком: один gzip-член на весь ответ, пустые куски не отдаются."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _chunks(reservations: Iterable[Reservation], line: Callable[[Reservation], str],
+            chunk_rows: int) -> Iterator[bytes]:
+    lines = []
+    for reservation in reservations:
+        lines.append(line(reservation))
+        if len(lines) >= chunk_rows:
+            yield "".join(lines).encode()
+            lines.clear()
+    if lines:
+        yield "".join(lines).encode()
@@ -1,20 +1,107 @@
-from fastapi import FastAPI, Depends
-from pydantic import BaseModel
-from datetime import datetime
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import List, Optional
 
-from src.booking.application.commands import CreateReservation
-from src.booking.application.handlers import CreateReservationHandler
-from src.booking.domain.services import TableAllocationService
-from src.booking.infrastructure.available_tables import get_available_tables
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime
 
+from src.booking.application.commands import (
+    BulkChangeReservationStatus,
+    ChangeReservationStatus,
+    CreateReservation,
+    CreateReservationsBatch,
+)
+from src.booking.application.handlers import (
+    AsyncCreateReservationHandler,
+    AsyncGetAvailabilityHandler,
+    AsyncListReservationsHandler,
+    BulkChangeReservationStatusHandler,
+    ChangeReservationStatusHandler,
+    CreateReservationHandler,
+    CreateReservationsBatchHandler,
+    GetAvailabilityHandler,
+    GetDailyScheduleHandler,
+    JoinWaitlistHandler,
+    ListReservationsHandler,
+)
+from src.booking.application.queries import GetAvailability, GetDailySchedule, ListReservations
+from src.booking.domain.model import DEFAULT_RESTAURANT, ReservationStatus
+from src.booking.domain.repository import ReservationNotFound, TableConflict
+from src.booking.domain.services import NoTableAvailable
+from src.booking.domain.transitions import TRANSITIONS
+from src.booking import metrics
+from src.booking.entrypoints.container import (
+    Container,
+    close_container,
+    get_container,
+    init_container,
+)
+from src.booking.entrypoints.cursors import decode_cursor, encode_cursor
+from src.booking.entrypoints.export import MEDIA_TYPES, csv_chunks, gzip_chunks, ndjson_chunks
+from src.booking.infrastructure.settings import AppSettings
 
-# Глобальная зависимость
-def get_uow():
-    from src.booking.infrastructure.uow import InMemoryUnitOfWork
-    return InMemoryUnitOfWork()
 
+# Зависимости — async def: синхронные FastAPI запускает в threadpool
+async def get_app_container() -> Container:
+    return get_container()
 
-app = FastAPI()
+
+# Заведение запроса (?restaurant_id=...): его каталог, аллокатор и шард БД.
+# Заведение создаётся один раз на процесс; дальше это поиск в словаре
+async def get_venue(restaurant_id: str = Query(default=DEFAULT_RESTAURANT),
+                    container: Container = Depends(get_app_container)):
+    try:
+        return container.venue(restaurant_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+# Глобальная зависимость: дешёвый UoW на запрос поверх хранилища (шарда) заведения.
+# При storage=sqlalchemy-async — AsyncUnitOfWork: эндпоинты с async-веткой ждут БД через await
+async def get_uow(venue=Depends(get_venue)):
+    uow = venue.async_uow() or venue.uow()
+    try:
+        yield uow
+    finally:
+        if _is_async(uow):
+            await uow.session.close()
+        else:
+            await run_in_threadpool(_close, uow)
+
+
+# UoW для эндпоинтов только с синхронными хендлерами
+def get_sync_uow(venue=Depends(get_venue)):
+    uow = venue.uow()
+    try:
+        yield uow
+    finally:
+        _close(uow)
+
+
+def _is_async(uow) -> bool:
+    return hasattr(uow, "__aenter__")
+
+
+def _close(uow) -> None:
+    session = getattr(uow, "session", None)
+    if session is not None:
+        session.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Движок, каталог столов и аллокатор создаются один раз при старте приложения
+    app.state.container = init_container()
+    app.state.container.start()
+    yield
+    await app.state.container.close_async()
+    close_container()
+
+
+app = FastAPI(lifespan=lifespan)
 
 class CreateReservationDTO(BaseModel):
     slot_start: datetime
@@ -22,10 +109,242 @@ class CreateReservationDTO(BaseModel):
     party_size: int
 
 
+class CreateOrWaitlistDTO(CreateReservationDTO):
+    # true: если стола нет — в лист ожидания (202) вместо отказа
+    waitlist: bool = False
+
+
+class CreateReservationsBatchDTO(BaseModel):
+    items: List[CreateReservationDTO]
+
+
+class BatchItemResultDTO(BaseModel):
+    reservation_id: Optional[str]
+    table_id: Optional[str]
+    error: Optional[str]
+
+
+class ReservationDTO(BaseModel):
+    reservation_id: str
+    table_id: Optional[str]
+    status: str
+    start_time: datetime
+    end_time: datetime
+    party_size: int
+
+
+class BulkStatusDTO(BaseModel):
+    # Либо явный список id, либо диапазон начала броней [from, to)
+    reservation_ids: Optional[List[str]] = None
+    start: Optional[datetime] = Field(default=None, alias="from")
+    end: Optional[datetime] = Field(default=None, alias="to")
+
+
+class TableAvailabilityDTO(BaseModel):
+    table_id: str
+    capacity: int
+    starts: List[datetime]
+
+
 @app.post("/reservations")
-def create_reservation(dto: CreateReservationDTO, uow=Depends(get_uow)):
-    service = TableAllocationService()
-    handler = CreateReservationHandler(uow=uow, allocator=service)
-    cmd = CreateReservation(**dto.dict())
-    reservation_id = handler(cmd, available_tables=get_available_tables())
-    return {"reservation_id": reservation_id}
\ No newline at end of file
+async def create_reservation(dto: CreateOrWaitlistDTO, uow=Depends(get_uow),
+                             venue=Depends(get_venue),
+                             container: Container = Depends(get_app_container)):
+    if dto.waitlist and venue is not container:
+        raise HTTPException(status_code=400,
+                            detail="Waitlist is kept for the default restaurant only")
+    cmd = CreateReservation(**dto.model_dump(exclude={"waitlist"}),
+                            restaurant_id=venue.restaurant_id)
+    try:
+        reservation_id = await _create(cmd, uow, venue, container.settings)
+    except (NoTableAvailable, TableConflict) as e:
+        # Зал полон или стол раз за разом занимали другие воркеры (попытки кончились):
+        # отказ — штатный исход, а не сбой сервера
+        if not dto.waitlist:
+            raise HTTPException(status_code=409, detail=str(e))
+        entry_id = await run_in_threadpool(_join_waitlist, cmd, container)
+        return JSONResponse({"reservation_id": None, "waitlist_entry_id": entry_id},
+                            status_code=202)
+    return {"reservation_id": reservation_id}
+
+
+def _join_waitlist(cmd: CreateReservation, container: Container) -> str:
+    uow = container.uow()
+    try:
+        return JoinWaitlistHandler(uow, container.waitlist)(cmd)
+    finally:
+        _close(uow)
+
+
+async def _create(cmd: CreateReservation, uow, venue, settings: AppSettings) -> str:
+    if _is_async(uow):
+        handler = AsyncCreateReservationHandler(uow=uow, allocator=venue.allocator,
+                                                on_commit=venue.availability.reservations_committed,
+                                                max_attempts=settings.booking_max_attempts)
+        return await handler(cmd, available_tables=venue.catalog.snapshot())
+    else:
+        # Синхронный UoW блокирует поток на время запроса к БД — уводим его в threadpool
+        handler = CreateReservationHandler(uow=uow, allocator=venue.allocator,
+                                           on_commit=venue.availability.reservations_committed,
+                                           max_attempts=settings.booking_max_attempts)
+        return await run_in_threadpool(handler, cmd, venue.catalog.snapshot())
+
+
+@app.post("/reservations:batch")
+def create_reservations_batch(dto: CreateReservationsBatchDTO, uow=Depends(get_sync_uow),
+                              venue=Depends(get_venue),
+                              container: Container = Depends(get_app_container)):
+    handler = CreateReservationsBatchHandler(uow=uow, allocator=venue.allocator,
+                                             on_commit=venue.availability.reservations_committed,
+                                             max_attempts=container.settings.booking_max_attempts)
+    cmd = CreateReservationsBatch(items=tuple(
+        CreateReservation(**item.model_dump(), restaurant_id=venue.restaurant_id)
+        for item in dto.items))
+    results = handler(cmd, available_tables=venue.catalog.snapshot())
+    return {"results": [BatchItemResultDTO(**asdict(r)) for r in results]}
+
+
+def _transition(action: str):
+    if action not in TRANSITIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown action {action}")
+    return action
+
+
+# Объявлен раньше /reservations/{reservation_id}/{action}, иначе "bulk" сойдёт за id
+@app.post("/reservations/bulk/{action}")
+def bulk_change_reservation_status(action: str, dto: BulkStatusDTO, uow=Depends(get_sync_uow),
+                                   venue=Depends(get_venue)):
+    if (dto.reservation_ids is None) == (dto.start is None or dto.end is None):
+        raise HTTPException(status_code=400, detail="Pass either reservation_ids or from/to")
+    reservation_ids = tuple(dto.reservation_ids) if dto.reservation_ids is not None else None
+    cmd = BulkChangeReservationStatus(action=_transition(action), reservation_ids=reservation_ids,
+                                      start=dto.start, end=dto.end)
+    handler = BulkChangeReservationStatusHandler(uow=uow, allocator=venue.allocator,
+                                                 on_commit=venue.reservations_changed)
+    return asdict(handler(cmd))
+
+
+@app.post("/reservations/{reservation_id}/{action}")
+def change_reservation_status(reservation_id: str, action: str, uow=Depends(get_sync_uow),
+                              venue=Depends(get_venue)):
+    cmd = ChangeReservationStatus(reservation_id=reservation_id, action=_transition(action))
+    handler = ChangeReservationStatusHandler(uow=uow, allocator=venue.allocator,
+                                             on_commit=venue.reservations_changed)
+    try:
+        status = handler(cmd)
+    except ReservationNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        # Переход запрещён инвариантами агрегата (например, отмена завершённой брони)
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"reservation_id": reservation_id, "status": status}
+
+
+@app.get("/availability")
+async def get_availability(date: date, party_size: int = Query(ge=1),
+                           duration_min: int = Query(ge=1),
+                           granularity_min: Optional[int] = Query(default=None, ge=1),
+                           uow=Depends(get_uow), venue=Depends(get_venue),
+                           container: Container = Depends(get_app_container)):
+    settings = container.settings
+    granularity_min = granularity_min or settings.availability_granularity_min
+    query = GetAvailability(day=date, party_size=party_size, duration_min=duration_min,
+                            granularity_min=granularity_min)
+    snapshot = venue.catalog.snapshot()
+
+    if _is_async(uow):
+        handler = AsyncGetAvailabilityHandler(uow, venue.availability, settings.opens_at,
+                                              settings.closes_at)
+        tables = await handler(query, snapshot)
+    else:
+        handler = GetAvailabilityHandler(uow, venue.availability, settings.opens_at,
+                                         settings.closes_at)
+        tables = await run_in_threadpool(handler, query, snapshot)
+    return {
+        "date": query.day,
+        "party_size": query.party_size,
+        "duration_min": query.duration_min,
+        "granularity_min": query.granularity_min,
+        "tables": [TableAvailabilityDTO(**asdict(t)) for t in tables],
+    }
+
+
+@app.get("/schedule")
+def get_daily_schedule(day: date, table_id: Optional[str] = None,
+                       container: Container = Depends(get_app_container)):
+    # Read model отдаётся как есть: без UoW, броней и pydantic-валидации на каждый слот
+    handler = GetDailyScheduleHandler(container.schedule)
+    tables = handler(GetDailySchedule(day=day, table_id=table_id))
+    return {
+        "day": day,
+        "tables": [{"table_id": t.table_id,
+                    "slots": [{"reservation_id": s.reservation_id, "start_time": s.start_time,
+                               "end_time": s.end_time, "party_size": s.party_size}
+                              for s in t.slots]}
+                   for t in tables],
+    }
+
+
+@app.get("/reservations")
+async def list_reservations(day: Optional[date] = None, table_id: Optional[str] = None,
+                            status: Optional[ReservationStatus] = None,
+                            limit: int = Query(default=50, ge=1, le=500),
+                            cursor: Optional[str] = None,
+                            uow=Depends(get_uow), venue=Depends(get_venue)):
+    """Брони по фильтрам, по (start_time, reservation_id); next_cursor — на следующую страницу."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query = ListReservations(day=day, table_id=table_id, status=status, limit=limit, after=after)
+    snapshot = venue.catalog.snapshot()
+
+    if _is_async(uow):
+        page = await AsyncListReservationsHandler(uow)(query, snapshot)
+    else:
+        page = await run_in_threadpool(ListReservationsHandler(uow), query, snapshot)
+    return {
+        "items": [ReservationDTO(**asdict(item)) for item in page.items],
+        "next_cursor": encode_cursor(*page.next_after) if page.next_after is not None else None,
+    }
+
+
+@app.get("/reservations/export")
+def export_reservations(request: Request, start: datetime = Query(alias="from"),
+                        end: datetime = Query(alias="to"),
+                        export_format: str = Query(default="ndjson", alias="format",
+                                                   pattern="^(ndjson|csv)$"),
+                        cursor: Optional[str] = None, venue=Depends(get_venue)):
+    """
+    Брони с началом в [from, to), по (start_time, reservation_id), потоком.
+    cursor — значение поля cursor последней полученной строки: выгрузка продолжится после неё.
+    Accept-Encoding: gzip — ответ сжимается на лету.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    serialize = ndjson_chunks if export_format == "ndjson" else csv_chunks
+    body = serialize(_stream_reservations(venue, start, end, after))
+    headers = {"Content-Disposition": f'attachment; filename="reservations.{export_format}"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[export_format], headers=headers)
+
+
+def _stream_reservations(venue, start: datetime, end: datetime, after):
+    # Свой UoW на время ответа: зависимость get_uow закрывается раньше, чем дочитается поток
+    uow = venue.uow()
+    try:
+        yield from uow.reservations.iter_reservations(start, end, after=after)
+    finally:
+        _close(uow)
+
+
+# Prometheus text exposition format; рендер только здесь, пробы на горячем пути его не касаются
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,452 @@
+"""
+Генератор нагрузки: синтетический поток броней для планирования мощности.
+
+    booking-loadgen --requests 5000 --rate 200 --concurrency 32
+    python -m src.booking.entrypoints.loadgen --target asgi --days 7 --seed 1 --json run.json
+    python -m src.booking.entrypoints.loadgen --target uvicorn --rate 0 --concurrency 64
+
+Поток запросов:
+- поступление — пуассоновский процесс с интенсивностью --rate запросов/с
+  (0 — без пауз: закрытый цикл, сколько выдержит сервис при --concurrency);
+- время брони — смесь обеда и ужина с пиком в --dinner-peak, шаг 15 минут,
+  в пределах часов работы (BOOKING_OPENS_AT / BOOKING_CLOSES_AT);
+- дата — равномерно на --days дней начиная с --start-day;
+- размер компании — по --party-mix ("2:45,4:25": размер:вес), длительность зависит от размера.
+
+Цели (--target):
+- inprocess — CreateReservationHandler напрямую, в пуле потоков (как синхронный путь API);
+- asgi      — приложение FastAPI через httpx.ASGITransport, без сети;
+- uvicorn   — локальный uvicorn на свободном порту, запросы по HTTP.
+
+Хранилище — из тех же переменных окружения, что и у приложения (BOOKING_*).
+Отчёт: пропускная способность, перцентили задержки, доля отказов (нет стола),
+ошибки и загрузка столов за период генерации.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time as time_of_day, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.booking.application.commands import CreateReservation
+from src.booking.application.handlers import CreateReservationHandler
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.model import DEFAULT_RESTAURANT, Reservation
+from src.booking.domain.occupancy import OCCUPYING_STATUSES, part_keys
+from src.booking.domain.repository import TableConflict
+from src.booking.domain.services import NoTableAvailable
+from src.booking.entrypoints.container import Container, close_container, init_container
+
+
+TARGETS = ("inprocess", "asgi", "uvicorn")
+
+# Исходы запроса
+OK, REJECTED, ERROR = "ok", "rejected", "error"
+
+# Размер компании: вес (доля запросов); пары и четвёрки — основная масса
+DEFAULT_PARTY_MIX: Tuple[Tuple[int, float], ...] = (
+    (1, 4), (2, 45), (3, 10), (4, 25), (5, 6), (6, 6), (8, 4))
+
+# Сколько ждать старта локального uvicorn, секунды
+UVICORN_START_TIMEOUT = 10.0
+
+
+@dataclass(frozen=True)
+class TrafficProfile:
+    """Параметры синтетического потока: когда приходят запросы и что в них."""
+    rate: float = 100.0
+    start_day: date = field(default_factory=lambda: date.today() + timedelta(days=1))
+    days: int = 14
+    opens_at: time_of_day = time_of_day(10, 0)
+    closes_at: time_of_day = time_of_day(23, 0)
+    dinner_peak: time_of_day = time_of_day(19, 30)
+    dinner_spread_min: float = 75.0
+    lunch_peak: time_of_day = time_of_day(13, 0)
+    lunch_spread_min: float = 45.0
+    lunch_share: float = 0.25
+    party_mix: Tuple[Tuple[int, float], ...] = DEFAULT_PARTY_MIX
+    granularity_min: int = 15
+    restaurant_id: str = DEFAULT_RESTAURANT
+
+    @property
+    def open_minutes(self) -> int:
+        return _minutes(self.closes_at) - _minutes(self.opens_at)
+
+    @property
+    def end_day(self) -> date:
+        return self.start_day + timedelta(days=self.days)
+
+
+@dataclass(frozen=True)
+class Arrival:
+    at: float  # секунды от начала прогона
+    command: CreateReservation
+
+
+def duration_for(party_size: int) -> int:
+    """Длительность брони, минуты: большие компании сидят дольше."""
+    if party_size <= 2:
+        return 90
+    if party_size <= 6:
+        return 120
+    return 150
+
+
+def generate(profile: TrafficProfile, requests: int, seed: int = 0) -> List[Arrival]:
+    """requests запросов по профилю; одинаковый seed — одинаковый поток."""
+    rnd = random.Random(seed)
+    sizes = [size for size, _ in profile.party_mix]
+    weights = [weight for _, weight in profile.party_mix]
+    arrivals = []
+    at = 0.0
+    for _ in range(requests):
+        if profile.rate > 0:
+            # Промежутки пуассоновского потока распределены экспоненциально
+            at += rnd.expovariate(profile.rate)
+        party_size = rnd.choices(sizes, weights)[0]
+        duration = duration_for(party_size)
+        day = profile.start_day + timedelta(days=rnd.randrange(profile.days))
+        minute = _start_minute(profile, duration, rnd)
+        start = datetime.combine(day, time_of_day()) + timedelta(minutes=minute)
+        arrivals.append(Arrival(at, CreateReservation(slot_start=start, duration_min=duration,
+                                                      party_size=party_size,
+                                                      restaurant_id=profile.restaurant_id)))
+    return arrivals
+
+
+def _start_minute(profile: TrafficProfile, duration: int, rnd: random.Random) -> int:
+    if rnd.random() < profile.lunch_share:
+        minute = rnd.gauss(_minutes(profile.lunch_peak), profile.lunch_spread_min)
+    else:
+        minute = rnd.gauss(_minutes(profile.dinner_peak), profile.dinner_spread_min)
+    step = profile.granularity_min
+    first = _minutes(profile.opens_at)
+    last = max(first, _minutes(profile.closes_at) - duration)
+    minute = round(minute / step) * step
+    return min(max(minute, first + (-first) % step), last - last % step)
+
+
+def _minutes(value: time_of_day) -> int:
+    return value.hour * 60 + value.minute
+
+
+# ---------- цели ----------
+
+Target = Callable[[CreateReservation], Awaitable[str]]
+
+
+class InProcessTarget:
+    """Хендлер без HTTP: сколько стоит сам use case с хранилищем."""
+
+    def __init__(self, container: Container) -> None:
+        self.container = container
+
+    async def __call__(self, cmd: CreateReservation) -> str:
+        return await asyncio.to_thread(self._create, cmd)
+
+    def _create(self, cmd: CreateReservation) -> str:
+        venue = self.container.venue(cmd.restaurant_id)
+        uow = venue.uow()
+        handler = CreateReservationHandler(
+            uow, venue.allocator, on_commit=venue.availability.reservations_committed,
+            max_attempts=self.container.settings.booking_max_attempts)
+        try:
+            handler(cmd, venue.catalog.snapshot())
+            return OK
+        except (NoTableAvailable, TableConflict):
+            return REJECTED
+        finally:
+            session = getattr(uow, "session", None)
+            if session is not None:
+                session.close()
+
+
+class HttpTarget:
+    """POST /reservations через httpx-клиент (ASGITransport или сеть)."""
+
+    def __init__(self, client) -> None:
+        self.client = client
+
+    async def __call__(self, cmd: CreateReservation) -> str:
+        params = ({"restaurant_id": cmd.restaurant_id}
+                  if cmd.restaurant_id != DEFAULT_RESTAURANT else None)
+        response = await self.client.post("/reservations", params=params, json={
+            "slot_start": cmd.slot_start.isoformat(),
+            "duration_min": cmd.duration_min,
+            "party_size": cmd.party_size,
+        })
+        if response.status_code == 200:
+            return OK
+        if response.status_code == 409:
+            return REJECTED
+        return ERROR
+
+
+# ---------- прогон ----------
+
+@dataclass
+class RunResult:
+    outcomes: Dict[str, int]
+    latencies: List[float]
+    elapsed: float
+
+
+async def run(arrivals: Sequence[Arrival], target: Target, concurrency: int) -> RunResult:
+    """
+    Отправляет запросы в моменты arrival.at, не больше concurrency одновременно.
+
+    Открытый цикл (rate > 0): задержка считается от запланированного момента прихода,
+    а не от отправки — иначе очередь перед перегруженным сервисом не попала бы
+    в перцентили (coordinated omission). Закрытый цикл (все at == 0) — от отправки.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes = {OK: 0, REJECTED: 0, ERROR: 0}
+    latencies: List[float] = []
+    open_loop = any(a.at > 0 for a in arrivals)
+    started = time.perf_counter()
+
+    async def one(arrival: Arrival) -> None:
+        async with semaphore:
+            sent = time.perf_counter()
+            try:
+                outcome = await target(arrival.command)
+            except Exception:
+                outcome = ERROR
+            finished = time.perf_counter()
+        outcomes[outcome] += 1
+        latencies.append(finished - (started + arrival.at if open_loop else sent))
+
+    tasks = []
+    for arrival in arrivals:
+        delay = started + arrival.at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(arrival)))
+    await asyncio.gather(*tasks)
+    return RunResult(outcomes, latencies, time.perf_counter() - started)
+
+
+# ---------- отчёт ----------
+
+@dataclass
+class LoadReport:
+    target: str
+    requests: int
+    concurrency: int
+    rate: float
+    ok: int
+    rejected: int
+    errors: int
+    elapsed_seconds: float
+    throughput: float
+    rejection_rate: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    table_utilization: float
+    seat_utilization: float
+
+    def format(self) -> str:
+        arrivals = f"rate {self.rate:g}/s" if self.rate > 0 else "closed loop"
+        return "\n".join([
+            f"target {self.target}: {self.requests} requests, "
+            f"concurrency {self.concurrency}, {arrivals}",
+            f"  throughput   {self.throughput:,.1f} req/s ({self.elapsed_seconds:.2f}s)",
+            f"  latency ms   p50 {self.p50_ms:.2f}  p90 {self.p90_ms:.2f}  p99 {self.p99_ms:.2f}  "
+            f"max {self.max_ms:.2f}",
+            f"  outcomes     ok {self.ok}  rejected {self.rejected} ({self.rejection_rate:.1%})  "
+            f"errors {self.errors}",
+            f"  utilization  tables {self.table_utilization:.1%}  "
+            f"seats {self.seat_utilization:.1%}",
+        ])
+
+
+def percentile(sorted_samples: Sequence[float], q: float) -> float:
+    """Перцентиль по nearest-rank; sorted_samples уже отсортированы."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, math.ceil(q * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+
+def utilization(reservations: Iterable[Reservation], catalog: CatalogSnapshot,
+                profile: TrafficProfile) -> Tuple[float, float]:
+    """
+    (столы, места) за дни профиля в часы работы: доля стол-минут, занятых бронями,
+    и доля место-минут, занятых гостями. Сдвинутые столы занимают каждый стол группы.
+    """
+    tables = list(catalog)
+    table_minutes = len(tables) * profile.open_minutes * profile.days
+    seat_minutes = sum(capacity for _, capacity in tables) * profile.open_minutes * profile.days
+    if not table_minutes:
+        return 0.0, 0.0
+    booked_tables = booked_seats = 0.0
+    for reservation in reservations:
+        if reservation.status not in OCCUPYING_STATUSES or reservation.table_id is None:
+            continue
+        minutes = (reservation.slot.end - reservation.slot.start).total_seconds() / 60
+        booked_tables += minutes * len(part_keys(reservation.table_id))
+        booked_seats += minutes * reservation.party_size.value
+    return booked_tables / table_minutes, booked_seats / seat_minutes
+
+
+def report(target: str, result: RunResult, concurrency: int, profile: TrafficProfile,
+           container: Container) -> LoadReport:
+    ordered = sorted(result.latencies)
+    requests = sum(result.outcomes.values())
+    venue = container.venue(profile.restaurant_id)
+    uow = venue.uow()
+    try:
+        tables, seats = utilization(
+            uow.reservations.iter_reservations(datetime.combine(profile.start_day, time_of_day()),
+                                               datetime.combine(profile.end_day, time_of_day())),
+            venue.catalog.snapshot(), profile)
+    finally:
+        session = getattr(uow, "session", None)
+        if session is not None:
+            session.close()
+    return LoadReport(
+        target=target,
+        requests=requests,
+        concurrency=concurrency,
+        rate=profile.rate,
+        ok=result.outcomes[OK],
+        rejected=result.outcomes[REJECTED],
+        errors=result.outcomes[ERROR],
+        elapsed_seconds=result.elapsed,
+        throughput=requests / result.elapsed if result.elapsed else 0.0,
+        rejection_rate=result.outcomes[REJECTED] / requests if requests else 0.0,
+        p50_ms=percentile(ordered, 0.50) * 1e3,
+        p90_ms=percentile(ordered, 0.90) * 1e3,
+        p99_ms=percentile(ordered, 0.99) * 1e3,
+        max_ms=(ordered[-1] if ordered else 0.0) * 1e3,
+        table_utilization=tables,
+        seat_utilization=seats,
+    )
+
+
+# ---------- запуск целей ----------
+
+async def _run_target(target: str, arrivals: Sequence[Arrival], concurrency: int,
+                      container: Container, base_url: Optional[str]) -> RunResult:
+    if target == "inprocess":
+        return await run(arrivals, InProcessTarget(container), concurrency)
+
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if target == "asgi":
+        from src.booking.entrypoints.fastapi_app import app
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadgen", limits=limits)
+    else:
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0)
+    async with client:
+        return await run(arrivals, HttpTarget(client), concurrency)
+
+
+@contextmanager
+def local_uvicorn(host: str = "127.0.0.1") -> Iterator[str]:
+    """uvicorn с приложением в фоновом потоке этого процесса; отдаёт base URL."""
+    import uvicorn
+
+    from src.booking.entrypoints.fastapi_app import app
+
+    with socket.socket() as probe:
+        probe.bind((host, 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadgen-uvicorn", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + UVICORN_START_TIMEOUT
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def load_test(target: str, profile: TrafficProfile, requests: int, concurrency: int,
+              seed: int = 0, container: Optional[Container] = None) -> LoadReport:
+    """Прогон целиком: поток по профилю -> цель -> отчёт (загрузка — по хранилищу контейнера)."""
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target {target!r}")
+    container = container or init_container()
+    arrivals = generate(profile, requests, seed)
+    if target == "uvicorn":
+        # Отчёт — до остановки сервера: lifespan при остановке закрывает контейнер
+        with local_uvicorn() as base_url:
+            result = asyncio.run(_run_target(target, arrivals, concurrency, container, base_url))
+            return report(target, result, concurrency, profile, container)
+    result = asyncio.run(_run_target(target, arrivals, concurrency, container, None))
+    return report(target, result, concurrency, profile, container)
+
+
+def _party_mix(value: str) -> Tuple[Tuple[int, float], ...]:
+    # "2:45,4:25,6:5" -> ((2, 45.0), (4, 25.0), (6, 5.0))
+    mix = []
+    for item in value.split(","):
+        size, weight = item.split(":")
+        mix.append((int(size), float(weight)))
+    return tuple(mix)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="booking-loadgen", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=TARGETS, default="inprocess")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=100.0,
+                        help="запросов в секунду; 0 — без пауз")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="запросов в полёте одновременно")
+    parser.add_argument("--start-day", type=date.fromisoformat,
+                        help="первый день броней (по умолчанию завтра)")
+    parser.add_argument("--days", type=int, default=14, help="на сколько дней вперёд бронируют")
+    parser.add_argument("--dinner-peak", type=time_of_day.fromisoformat,
+                        default=time_of_day(19, 30))
+    parser.add_argument("--lunch-share", type=float, default=0.25, help="доля обеденных броней")
+    parser.add_argument("--party-mix", type=_party_mix, default=DEFAULT_PARTY_MIX,
+                        help='"размер:вес,..."')
+    parser.add_argument("--restaurant-id", default=DEFAULT_RESTAURANT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="куда записать отчёт")
+    args = parser.parse_args(argv)
+
+    container = init_container()
+    try:
+        settings = container.settings
+        profile = TrafficProfile(rate=args.rate, days=args.days,
+                                 opens_at=settings.opens_at, closes_at=settings.closes_at,
+                                 dinner_peak=args.dinner_peak, lunch_share=args.lunch_share,
+                                 party_mix=args.party_mix, restaurant_id=args.restaurant_id,
+                                 granularity_min=settings.availability_granularity_min,
+                                 **({"start_day": args.start_day} if args.start_day else {}))
+        result = load_test(args.target, profile, args.requests, args.concurrency, args.seed,
+                           container)
+    finally:
+        close_container()
+
+    print(result.format())
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(result), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,42 @@
+"""
+Пересборка read model плана зала из броней.
+
+    python -m src.booking.entrypoints.rebuild_schedule                       # вся история
+    python -m src.booking.entrypoints.rebuild_schedule --from 2026-01-01 --to 2026-02-01
+
+Хранилище и БД — из тех же переменных окружения, что и у приложения (BOOKING_*).
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+
+from src.booking.application.commands import RebuildDailySchedule
+from src.booking.application.handlers import RebuildDailyScheduleHandler
+from src.booking.entrypoints.container import close_container, init_container
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.booking.entrypoints.rebuild_schedule",
+                                     description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="start_day", type=date.fromisoformat,
+                        help="первый день (включительно)")
+    parser.add_argument("--to", dest="end_day", type=date.fromisoformat,
+                        help="последний день (не включая)")
+    args = parser.parse_args(argv)
+
+    container = init_container()
+    try:
+        started = time.perf_counter()
+        documents = RebuildDailyScheduleHandler(container.uow(), container.schedule)(
+            RebuildDailySchedule(start_day=args.start_day, end_day=args.end_day))
+        print(f"rebuilt {documents} table-day documents in {time.perf_counter() - started:.2f}s")
+    finally:
+        close_container()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from ..application.queries import TableAvailability
+from ..domain.availability import DaySchedule
+from ..domain.model import Reservation
+from ..domain.occupancy import OCCUPYING_STATUSES
+
+
+class _Entry:
+    __slots__ = ("schedule", "loaded_at", "results")
+
+    def __init__(self, schedule: DaySchedule, loaded_at: float) -> None:
+        self.schedule = schedule
+        self.loaded_at = loaded_at
+        self.results: Dict[Hashable, List[TableAvailability]] = {}
+
+
+class InMemoryAvailabilityCache:
+    """
+    Кэш доступности в процессе: ключ — (день, версия каталога столов).
+
+    - расписание дня (DaySchedule) читается из репозитория один раз на ключ;
+    - готовые ответы на (party_size, duration, granularity) кэшируются поверх него;
+    - commit новой брони (reservations_committed) точечно дописывает её в расписание
+      затронутого дня и сбрасывает только ответы этого дня; отменённая или завершённая
+      бронь освобождает стол — расписание её дня перечитывается;
+    - смена версии каталога = новый ключ, старые записи вытесняются LRU;
+    - ttl ограничивает устаревание при нескольких воркерах: чужие commit'ы
+      сюда не приходят.
+
+    Гонка "прочитали день, а тем временем закоммитили бронь" закрыта токеном:
+    begin_load отдаёт поколение дня, и put_schedule не сохраняет расписание,
+    если день с тех пор менялся.
+    """
+
+    def __init__(self, max_days: int = 64, ttl: float = 30.0, max_results_per_day: int = 256,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_days = max_days
+        self.ttl = ttl
+        self.max_results_per_day = max_results_per_day
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[date, int], _Entry]" = OrderedDict()
+        self._generations: Dict[date, int] = {}
+
+    def begin_load(self, day: date) -> int:
+        with self._lock:
+            return self._generations.get(day, 0)
+
+    def get_schedule(self, day: date, version: int) -> Optional[DaySchedule]:
+        entry = self._entry(day, version)
+        return entry.schedule if entry is not None else None
+
+    def put_schedule(self, schedule: DaySchedule, version: int, token: int) -> DaySchedule:
+        with self._lock:
+            if self._generations.get(schedule.day, 0) != token:
+                # День поменялся, пока мы его читали: отдаём прочитанное, но не кэшируем
+                return schedule
+            key = (schedule.day, version)
+            self._entries[key] = _Entry(schedule, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_days:
+                self._entries.popitem(last=False)
+        return schedule
+
+    def get_result(self, day: date, version: int,
+                   key: Hashable) -> Optional[List[TableAvailability]]:
+        entry = self._entry(day, version)
+        return entry.results.get(key) if entry is not None else None
+
+    def put_result(self, day: date, version: int, key: Hashable,
+                   result: List[TableAvailability]) -> None:
+        with self._lock:
+            entry = self._entries.get((day, version))
+            if entry is None:
+                return
+            if len(entry.results) >= self.max_results_per_day:
+                entry.results.clear()
+            entry.results[key] = result
+
+    def reservations_committed(self, reservations: Sequence[Reservation]) -> None:
+        with self._lock:
+            for reservation in reservations:
+                for day in _days(reservation):
+                    self._generations[day] = self._generations.get(day, 0) + 1
+                if reservation.status not in OCCUPYING_STATUSES:
+                    stale = [k for k, e in self._entries.items()
+                             if e.schedule.touches(reservation)]
+                    for key in stale:
+                        del self._entries[key]
+                    continue
+                for (day, _), entry in self._entries.items():
+                    if entry.schedule.touches(reservation):
+                        entry.schedule.add(reservation)
+                        entry.results.clear()
+
+    def invalidate(self, day: Optional[date] = None) -> None:
+        with self._lock:
+            if day is None:
+                self._entries.clear()
+                self._generations.clear()
+                return
+            self._generations[day] = self._generations.get(day, 0) + 1
+            for key in [k for k in self._entries if k[0] == day]:
+                del self._entries[key]
+
+    def _entry(self, day: date, version: int) -> Optional[_Entry]:
+        key = (day, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._clock() - entry.loaded_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+
+def _days(reservation: Reservation) -> List[date]:
+    first, last = reservation.slot.start.date(), reservation.slot.end.date()
+    days = [first]
+    while days[-1] < last:
+        days.append(date.fromordinal(days[-1].toordinal() + 1))
+    return days
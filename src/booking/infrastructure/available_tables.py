@@ -1,6 +1,18 @@
+from __future__ import annotations
 
+import threading
+import time
+from typing import Callable, List, Optional, Protocol, Sequence, Tuple
 
-#TODO:: По-хорошему надо тоже вынести в БД, но пока так
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from .db_models import TableModel
+from ..domain.catalog import CatalogSnapshot
+from ..domain.model import DEFAULT_RESTAURANT
+
+
+# План зала по умолчанию: им заполняется пустая таблица tables и in-memory каталог
 _available_tables = [
     {"id": "T1", "capacity": 4},
     {"id": "T2", "capacity": 1},
@@ -9,9 +21,165 @@ _available_tables = [
     {"id": "T5", "capacity": 4},
 ]
 
+# Соседние столы, которые можно сдвинуть под большую компанию
+_table_combinations = [
+    ("T1", "T3"),
+    ("T4", "T5"),
+]
+
+
 def get_available_tables():
     """
     Простая защита от дурака
     Исходный список не должен меняться
     """
-    return _available_tables.copy()
\ No newline at end of file
+    return _available_tables.copy()
+
+
+# (table_id, capacity)
+TableRow = Tuple[str, int]
+
+
+class TableSource(Protocol):
+    """Откуда каталог читает и куда пишет план зала."""
+
+    def load(self) -> List[TableRow]: ...
+    def upsert(self, table_id: str, capacity: int) -> None: ...
+    def remove(self, table_id: str) -> None: ...
+
+
+class InMemoryTableSource:
+    def __init__(self, tables=None) -> None:
+        rows = tables if tables is not None else get_available_tables()
+        self._tables = {str(t["id"]): int(t["capacity"]) for t in rows}
+
+    def load(self) -> List[TableRow]:
+        return list(self._tables.items())
+
+    def upsert(self, table_id: str, capacity: int) -> None:
+        self._tables[table_id] = capacity
+
+    def remove(self, table_id: str) -> None:
+        self._tables.pop(table_id, None)
+
+
+class SqlAlchemyTableSource:
+    """
+    Каталог заведения restaurant_id в таблице tables (в шарде заведения);
+    пустой каталог заполняется планом по умолчанию.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session],
+                 restaurant_id: str = DEFAULT_RESTAURANT) -> None:
+        self.session_factory = session_factory
+        self.restaurant_id = restaurant_id
+
+    def load(self) -> List[TableRow]:
+        venue = TableModel.restaurant_id == self.restaurant_id
+        with self.session_factory() as session:
+            if not session.scalar(select(func.count()).select_from(TableModel).where(venue)):
+                session.add_all(TableModel(restaurant_id=self.restaurant_id, table_id=t["id"],
+                                           capacity=t["capacity"])
+                                for t in _available_tables)
+                session.commit()
+            return [tuple(row) for row in session.execute(
+                select(TableModel.table_id, TableModel.capacity).where(venue))]
+
+    def upsert(self, table_id: str, capacity: int) -> None:
+        with self.session_factory() as session:
+            session.merge(TableModel(restaurant_id=self.restaurant_id, table_id=table_id,
+                                     capacity=capacity))
+            session.commit()
+
+    def remove(self, table_id: str) -> None:
+        with self.session_factory() as session:
+            session.execute(delete(TableModel).where(TableModel.restaurant_id == self.restaurant_id,
+                                                     TableModel.table_id == table_id))
+            session.commit()
+
+
+class TableCatalog:
+    """
+    Каталог столов в процессе.
+
+    combinations — группы соседних столов, которые можно сдвинуть
+    (по умолчанию _table_combinations).
+
+    snapshot() отдаёт закэшированный неизменяемый CatalogSnapshot; он пересобирается,
+    только когда меняется версия — при изменении плана зала через этот каталог
+    или по refresh().
+
+    Версия живёт в процессе. План, изменённый другим воркером, каталог видит через
+    ttl секунд: после этого snapshot() перечитывает план и поднимает версию, только
+    если он действительно поменялся (кэш доступности привязан к версии). ttl=None —
+    без перечитывания (in-memory план других процессов не бывает).
+
+    subscribe: слушатели добавления/расширения стола (лист ожидания), зовутся после изменения.
+    """
+
+    def __init__(self, source: TableSource,
+                 combinations: Optional[Sequence[Sequence[str]]] = None,
+                 ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.source = source
+        self.ttl = ttl
+        self._clock = clock
+        self.combinations = tuple(tuple(g) for g in (
+            combinations if combinations is not None else _table_combinations
+        ))
+        self._lock = threading.Lock()
+        self._version = 1
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._rows: List[TableRow] = []
+        self._loaded_at = 0.0
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def snapshot(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version and not self._expired():
+            return snapshot
+
+        with self._lock:
+            if (self._snapshot is not None and self._snapshot.version == self._version
+                    and self._expired()):
+                rows = sorted(self.source.load())
+                self._loaded_at = self._clock()
+                if rows != self._rows:
+                    self._version += 1
+                    self._publish(rows)
+            elif self._snapshot is None or self._snapshot.version != self._version:
+                self._publish(sorted(self.source.load()))
+                self._loaded_at = self._clock()
+            return self._snapshot
+
+    def _expired(self) -> bool:
+        return self.ttl is not None and self._clock() - self._loaded_at >= self.ttl
+
+    def _publish(self, rows: List[TableRow]) -> None:
+        self._rows = rows
+        self._snapshot = CatalogSnapshot(rows, version=self._version,
+                                         combinations=self.combinations)
+
+    def upsert_table(self, table_id: str, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("Table capacity must be >= 1")
+        with self._lock:
+            self.source.upsert(table_id, capacity)
+            self._version += 1
+        for listener in self._listeners:
+            listener()
+
+    def subscribe(self, listener: Callable[[], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_table(self, table_id: str) -> None:
+        with self._lock:
+            self.source.remove(table_id)
+            self._version += 1
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._version += 1
@@ -1,18 +1,154 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from __future__ import annotations
+
+import threading
+import time
 from typing import Optional
 
-# TODO:: Движок БД (используем SQLite для простоты, в проме вынести в конфиг)
-engine = create_engine("sqlite:///bookings.db", echo=True)
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+
+from .settings import DatabaseSettings
+
+
+class PoolWaitStats:
+    """Сколько ждали соединение из пула: по этим цифрам подбираем pool_size/max_overflow."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            if seconds > self.max_seconds:
+                self.max_seconds = seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "total_seconds": self.total_seconds,
+                "max_seconds": self.max_seconds,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, который замеряет время checkout (ожидание свободного соединения)."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
+
+    def recreate(self) -> "TimedQueuePool":
+        # engine.dispose() пересоздаёт пул — статистику не теряем
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def _apply_sqlite_pragmas(engine: Engine, settings: DatabaseSettings) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.close()
+
 
-# Фабрика сессий
-SessionLocal = sessionmaker(bind=engine)
+def create_db_engine(settings: DatabaseSettings) -> Engine:
+    """Фабрика движка по настройкам: пул, pre-ping, echo и PRAGMA для SQLite."""
+    url = make_url(settings.url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and url.database in (None, "", ":memory:")
+
+    kwargs = {"echo": settings.echo, "pool_pre_ping": settings.pool_pre_ping}
+    if not in_memory:
+        # in-memory SQLite живёт в одном соединении — там пул по умолчанию
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+        )
+
+    engine = create_engine(url, **kwargs)
+    if is_sqlite and not in_memory:
+        _apply_sqlite_pragmas(engine, settings)
+    return engine
+
+
+# Движок создаётся лениво (в lifespan приложения), а не при импорте модуля
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+# Фабрика сессий; bind выставляется в init_engine()
+SessionLocal = sessionmaker()
+
+
+def init_engine(settings: Optional[DatabaseSettings] = None) -> Engine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine(settings or DatabaseSettings.from_env())
+            SessionLocal.configure(bind=_engine)
+        return _engine
+
+
+def get_engine() -> Engine:
+    return _engine if _engine is not None else init_engine()
+
+
+def dispose_engine() -> None:
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def pool_wait_stats() -> Optional[PoolWaitStats]:
+    if _engine is None:
+        return None
+    return getattr(_engine.pool, "wait_stats", None)
 
 
 # Зависимость для получения сессии (полезно при интеграции с FastAPI и т.п.)
 def get_db_session() -> Session:
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def create_async_session_factory(url: Optional[str] = None,
+                                 settings: Optional[DatabaseSettings] = None):
+    """
+    Возвращает (engine, async_sessionmaker).
+    Импорт ленивый: asyncio-часть SQLAlchemy нужна не всем.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    settings = settings or DatabaseSettings.from_env()
+    url = make_url(url or settings.async_url)
+    async_engine = create_async_engine(url, echo=settings.echo,
+                                       pool_pre_ping=settings.pool_pre_ping)
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        _apply_sqlite_pragmas(async_engine.sync_engine, settings)
+    # expire_on_commit=False: после commit не нужен повторный SELECT на чтение атрибутов
+    return async_engine, async_sessionmaker(async_engine, expire_on_commit=False)
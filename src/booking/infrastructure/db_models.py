@@ -1,14 +1,95 @@
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Column, Date, String, Integer, DateTime, Index, Text
 from sqlalchemy.ext.declarative import declarative_base
 
+from ..domain.model import DEFAULT_RESTAURANT
+
 Base = declarative_base()
 
 class ReservationModel(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # list_overlapping: равенство по столу + диапазон по времени, end_time берётся из индекса
+        Index("ix_reservations_table_slot", "table_id", "start_time", "end_time"),
+        # list_between и list_page: диапазон по времени начала; keyset-пагинация
+        # по (start_time, reservation_id) — сразу в порядке выдачи
+        Index("ix_reservations_keyset", "start_time", "reservation_id"),
+        # list_page с фильтром по статусу
+        Index("ix_reservations_status_keyset", "status", "start_time", "reservation_id"),
+    )
 
     reservation_id = Column(String, primary_key=True)  # ← должен быть заполнен!
     table_id = Column(String, nullable=False)
     status = Column(String, nullable=False)
     start_time = Column(DateTime, nullable=False)
     end_time = Column(DateTime, nullable=False)
-    party_size = Column(Integer, nullable=False)
\ No newline at end of file
+    party_size = Column(Integer, nullable=False)
+    # Ключ партиционирования: заведение определяет шард (infrastructure/sharding.py)
+    restaurant_id = Column(String, nullable=False, default=DEFAULT_RESTAURANT,
+                           server_default=DEFAULT_RESTAURANT)
+
+
+class TableModel(Base):
+    """Каталог столов (план зала); у каждого заведения свой."""
+    __tablename__ = "tables"
+
+    restaurant_id = Column(String, primary_key=True, default=DEFAULT_RESTAURANT,
+                           server_default=DEFAULT_RESTAURANT)
+    table_id = Column(String, primary_key=True)
+    capacity = Column(Integer, nullable=False)
+
+
+class TableClaimModel(Base):
+    """
+    Версия стола: транзакция, которая пишет бронь на стол, сначала увеличивает version.
+    Это блокирует строку (в SQLite — БД на запись) до commit, поэтому проверка
+    пересечений и вставка брони на один стол идут строго по очереди во всех воркерах,
+    а на разные столы — параллельно.
+    """
+    __tablename__ = "table_claims"
+
+    table_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class OutboxMessageModel(Base):
+    """Transactional outbox: доменные события, записанные в одной транзакции с бронью."""
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # выборка очередной пачки: dispatched_at IS NULL ORDER BY id
+        Index("ix_outbox_pending", "dispatched_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    dispatched_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+
+class WaitlistEntryModel(Base):
+    """Лист ожидания: гости, которым не хватило стола; индекс для подбора строится в процессе."""
+    __tablename__ = "waitlist"
+
+    entry_id = Column(String, primary_key=True)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    party_size = Column(Integer, nullable=False)
+    # Индекс: воркеры дозагружают лист по created_at (list_since), без полного SELECT
+    created_at = Column(DateTime, nullable=False, index=True)
+
+
+class DailyScheduleModel(Base):
+    """
+    Read model плана зала: одна строка на (день, физический стол), слоты — компактный JSON
+    [[start, end, reservation_id, party_size], ...] по времени; если на столе были отмены —
+    {"slots": [...], "cancelled": [reservation_id, ...]}. Пишет только проекция.
+    """
+    __tablename__ = "daily_schedule"
+
+    day = Column(Date, primary_key=True)
+    table_id = Column(String, primary_key=True)
+    slots = Column(Text, nullable=False)
+    # Оптимистическая блокировка: несколько воркеров разбирают один outbox
+    version = Column(Integer, nullable=False, default=0)
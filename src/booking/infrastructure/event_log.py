@@ -0,0 +1,564 @@
+"""
+Хранилище броней на журнале событий (storage=eventlog) — альтернатива SQLite-адаптеру.
+
+- Состояние броней живёт в памяти (InMemoryReservationRepository со всеми индексами).
+- Долговечность — append-only журнал доменных событий (domain/events.py): записи
+  с префиксом длины и CRC32, поля в компактном бинарном виде.
+- Изменения UoW копятся до commit; commit под одним локом применяет их к состоянию
+  и ставит события в очередь журнала: порядок журнала совпадает с порядком изменений.
+- Commit'ы пишутся группой: пока идёт один fsync, следующие commit'ы копятся
+  и уходят одной записью с одним fsync (group commit).
+- Время от времени состояние сохраняется компактным снапшотом со смещением журнала;
+  при старте снапшот читается через mmap, и проигрывается только хвост журнала после него.
+"""
+from __future__ import annotations
+
+import glob
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .repositories import (
+    InMemoryReservationRepository,
+    InMemoryWaitlistRepository,
+    _copy,
+    _raise_on_conflict,
+)
+from ..application.handlers import STATUS_CHANGED_CONCURRENTLY
+from ..domain import events as domain_events
+from ..domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from ..domain.repository import Keyset, ReservationRepository
+from ..domain.transitions import StatusTransition
+
+
+logger = logging.getLogger(__name__)
+
+# Снапшот после стольких событий с предыдущего
+SNAPSHOT_EVERY = 100_000
+
+LOG_FILE = "events.log"
+SNAPSHOT_PATTERN = "snapshot-*.bin"
+SNAPSHOT_MAGIC = b"BKSNAP01"
+
+# Коды событий в журнале: только дописывать, номера не переиспользовать
+EVENT_CODES = {
+    domain_events.ReservationCreated: 1,
+    domain_events.ReservationConfirmed: 2,
+    domain_events.ReservationCancelled: 3,
+    domain_events.ReservationCompleted: 4,
+    domain_events.TableAssigned: 5,
+    domain_events.WaitlistPromoted: 6,
+}
+_EVENT_TYPES = {code: cls for cls, code in EVENT_CODES.items()}
+_EVENT_FIELDS = {cls: tuple(cls.__dataclass_fields__) for cls in EVENT_CODES}
+
+_STATUSES = tuple(ReservationStatus)
+_STATUS_CODES = {status: i for i, status in enumerate(_STATUSES)}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_HEADER = struct.Struct("<II")  # длина записи, crc32
+_Q = struct.Struct("<q")
+_H = struct.Struct("<H")
+_SNAPSHOT_HEADER = struct.Struct("<QI")  # смещение журнала, число броней
+_SNAPSHOT_ROW = struct.Struct("<qqiB")  # start, end, party_size, status
+
+# Теги полей события
+_NONE, _STR, _DATETIME, _INT = 0, 1, 2, 3
+
+
+# ---------- кодек ----------
+
+def _micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _datetime(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode()
+    return _H.pack(len(data)) + data
+
+
+def encode_event(event) -> bytes:
+    """Запись журнала: длина, crc32, код события и поля по порядку объявления."""
+    parts = [bytes((EVENT_CODES[type(event)],))]
+    for name in _EVENT_FIELDS[type(event)]:
+        value = getattr(event, name)
+        if value is None:
+            parts.append(bytes((_NONE,)))
+        elif isinstance(value, str):
+            parts.append(bytes((_STR,)) + _pack_str(value))
+        elif isinstance(value, datetime):
+            parts.append(bytes((_DATETIME,)) + _Q.pack(_micros(value)))
+        else:
+            parts.append(bytes((_INT,)) + _Q.pack(value))
+    payload = b"".join(parts)
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode_payload(buffer, offset: int, end: int):
+    cls = _EVENT_TYPES[buffer[offset]]
+    offset += 1
+    values = []
+    while offset < end:
+        tag = buffer[offset]
+        offset += 1
+        if tag == _NONE:
+            values.append(None)
+        elif tag == _STR:
+            (size,) = _H.unpack_from(buffer, offset)
+            values.append(bytes(buffer[offset + 2:offset + 2 + size]).decode())
+            offset += 2 + size
+        else:
+            (value,) = _Q.unpack_from(buffer, offset)
+            values.append(_datetime(value) if tag == _DATETIME else value)
+            offset += 8
+    return cls(*values)
+
+
+def read_events(buffer, offset: int = 0) -> Iterator[Tuple[object, int]]:
+    """
+    События журнала начиная с offset: (событие, смещение после записи).
+    Останавливается на оборванной или испорченной записи (сбой посреди записи).
+    """
+    size = len(buffer)
+    while offset + _HEADER.size <= size:
+        length, crc = _HEADER.unpack_from(buffer, offset)
+        start = offset + _HEADER.size
+        end = start + length
+        if end > size or zlib.crc32(buffer[start:end]) != crc:
+            return
+        yield _decode_payload(buffer, start, end), end
+        offset = end
+
+
+# ---------- журнал ----------
+
+class EventLog:
+    """
+    Файл журнала с групповым commit: без отдельного потока, "ведущий" — тот,
+    кто застал журнал свободным; он пишет все накопленные пачки и делает один fsync,
+    остальные ждут, пока их пачка окажется на диске.
+    """
+
+    def __init__(self, path: str, fsync: bool = True) -> None:
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, "ab")
+        self.offset = self._file.tell()
+        # Смещение конца с учётом ещё не записанных пачек
+        self.end = self.offset
+        self.fsyncs = 0
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._queued = 0
+        self._durable = 0
+        self._flushing = False
+        self._failure: Optional[BaseException] = None
+
+    def append(self, records: Sequence[bytes]) -> int:
+        """Дописывает записи и возвращается, когда они на диске. Возвращает смещение конца."""
+        self.wait(self.enqueue(records))
+        return self.offset
+
+    def enqueue(self, records: Sequence[bytes]) -> int:
+        """
+        Ставит пачку в очередь, не дожидаясь записи; место в журнале определено сразу.
+        Возвращает билет.
+        """
+        data = b"".join(records)
+        with self._cond:
+            if self._failure is not None:
+                raise OSError("Event log is unavailable") from self._failure
+            self._pending.append(data)
+            self._queued += 1
+            self.end += len(data)
+            return self._queued
+
+    def wait(self, ticket: int) -> None:
+        """Ждёт, пока пачка с билетом ticket (и все до неё) окажется на диске."""
+        with self._cond:
+            while self._durable < ticket:
+                if self._failure is not None:
+                    raise OSError("Event log is unavailable") from self._failure
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._flush()
+
+    def _flush(self) -> None:
+        # Вызывается под self._cond; на время записи и fsync лок отпускается
+        batch, self._pending = b"".join(self._pending), []
+        upto = self._queued
+        self._flushing = True
+        self._cond.release()
+        try:
+            self._file.write(batch)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except BaseException as e:
+            self._cond.acquire()
+            self._failure = e
+            self._flushing = False
+            self._cond.notify_all()
+            raise
+        self._cond.acquire()
+        self._flushing = False
+        self._durable = upto
+        self.offset += len(batch)
+        self.fsyncs += 1
+        self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._file.close()
+
+
+# ---------- снапшоты ----------
+
+def write_snapshot(directory: str, reservations: Iterable[Reservation], log_offset: int) -> str:
+    """Снапшот состояния на смещение журнала: временный файл, fsync, атомарный rename."""
+    rows = []
+    for r in reservations:
+        rows.append(_pack_str(r.reservation_id)
+                    + _pack_str(r.table_id.value if r.table_id is not None else "")
+                    + _SNAPSHOT_ROW.pack(_micros(r.slot.start), _micros(r.slot.end),
+                                         r.party_size.value, _STATUS_CODES[r.status]))
+    path = os.path.join(directory, f"snapshot-{log_offset:016d}.bin")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + _SNAPSHOT_HEADER.pack(log_offset, len(rows)))
+        f.write(b"".join(rows))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    for old in glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)):
+        if old != path:
+            os.remove(old)
+    return path
+
+
+def read_snapshot(path: str) -> Tuple[int, List[Reservation]]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        if buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a snapshot: {path}")
+        log_offset, count = _SNAPSHOT_HEADER.unpack_from(buffer, len(SNAPSHOT_MAGIC))
+        offset = len(SNAPSHOT_MAGIC) + _SNAPSHOT_HEADER.size
+        reservations = []
+        for _ in range(count):
+            (size,) = _H.unpack_from(buffer, offset)
+            reservation_id = buffer[offset + 2:offset + 2 + size].decode()
+            offset += 2 + size
+            (size,) = _H.unpack_from(buffer, offset)
+            table_id = buffer[offset + 2:offset + 2 + size].decode()
+            offset += 2 + size
+            start, end, party_size, status = _SNAPSHOT_ROW.unpack_from(buffer, offset)
+            offset += _SNAPSHOT_ROW.size
+            slot = TimeSlot(_datetime(start), _datetime(end))
+            reservations.append(Reservation(reservation_id, slot, PartySize.of(party_size),
+                                            TableId.of(table_id) if table_id else None,
+                                            _STATUSES[status]))
+    return log_offset, reservations
+
+
+def _latest_snapshot(directory: str) -> Optional[str]:
+    snapshots = sorted(glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)))
+    return snapshots[-1] if snapshots else None
+
+
+# ---------- хранилище ----------
+
+# Смена статуса в UoW: переход и брони уже в новом статусе
+_Transition = Tuple[StatusTransition, List[Reservation]]
+
+class _Replay:
+    """Состояние броней по событиям; события — установка значений, повтор безвреден."""
+
+    def __init__(self, reservations: Iterable[Reservation] = ()) -> None:
+        self.items: Dict[str, Reservation] = {r.reservation_id: r for r in reservations}
+
+    def apply(self, event) -> None:
+        if isinstance(event, domain_events.ReservationCreated):
+            if event.slot_start is None:
+                logger.warning("ReservationCreated %s without slot is skipped",
+                               event.reservation_id)
+                return
+            self.items[event.reservation_id] = Reservation(
+                event.reservation_id, TimeSlot(event.slot_start, event.slot_end),
+                PartySize.of(event.party_size))
+            return
+        reservation = self.items.get(getattr(event, "reservation_id", None))
+        if reservation is None:
+            return
+        if isinstance(event, domain_events.TableAssigned):
+            reservation.table_id = TableId.of(event.table_id)
+        elif isinstance(event, domain_events.ReservationConfirmed):
+            reservation.status = ReservationStatus.CONFIRMED
+        elif isinstance(event, domain_events.ReservationCancelled):
+            reservation.status = ReservationStatus.CANCELLED
+        elif isinstance(event, domain_events.ReservationCompleted):
+            reservation.status = ReservationStatus.COMPLETED
+
+
+class EventLogStore:
+    """
+    Общее на процесс хранилище storage=eventlog: состояние в памяти + журнал + снапшоты.
+
+    commit: под self._lock изменения UoW проверяются и применяются к состоянию, а их события
+    получают место в журнале; fsync ждётся уже без лока (group commit). Так журнал
+    проигрывается в том же порядке, в каком менялось состояние. Если запись журнала
+    не удалась, хранилище дальше commit'ов не принимает (EventLog держит ошибку).
+
+    Снапшот пишется в фоне после snapshot_every событий. Состояние и смещение конца
+    журнала берутся вместе под тем же локом; файл пишется, когда журнал до этого
+    смещения уже на диске, — в снапшот не попадает ничего, чего нет в журнале.
+
+    Лист ожидания в журнал не пишется (только в памяти процесса).
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = SNAPSHOT_EVERY,
+                 fsync: bool = True) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.state = InMemoryReservationRepository()
+        self.waitlist = InMemoryWaitlistRepository()
+        self.replayed = self._recover()
+        self.log = EventLog(os.path.join(directory, LOG_FILE), fsync)
+        self._lock = threading.Lock()
+        self._last_ticket = 0
+        self._since_snapshot = self.replayed
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+    def _recover(self) -> int:
+        """
+        Снапшот + хвост журнала. Оборванную последнюю запись обрезает.
+        Возвращает число проигранных событий.
+        """
+        snapshot = _latest_snapshot(self.directory)
+        log_offset, reservations = read_snapshot(snapshot) if snapshot else (0, [])
+        replay = _Replay(reservations)
+
+        path = os.path.join(self.directory, LOG_FILE)
+        replayed, good_end = 0, log_offset
+        if os.path.exists(path) and os.path.getsize(path) > log_offset:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for event, good_end in read_events(buffer, log_offset):
+                    replay.apply(event)
+                    replayed += 1
+                size = len(buffer)
+            if good_end < size:
+                logger.warning("Event log %s: truncating %d bytes of a torn write",
+                               path, size - good_end)
+                with open(path, "r+b") as f:
+                    f.truncate(good_end)
+
+        self.state.add_many(replay.items.values())
+        return replayed
+
+    def commit(self, events: Sequence[object], claimed: Sequence[Reservation] = (),
+               added: Sequence[Reservation] = (), changed: Sequence["_Transition"] = ()) -> None:
+        """
+        Изменения одного UoW: claimed — брони с закреплёнными столами, added — прочие новые,
+        changed — смены статуса. Проверки повторяются на текущем состоянии: стол заняли —
+        TableConflict, статус успели сменить — ValueError; тогда не меняется ничего.
+        """
+        if not events and not claimed and not added and not changed:
+            return
+        records = [encode_event(e) for e in events]
+        with self._lock:
+            self._check(claimed, added, changed)
+            ticket = self._last_ticket = self.log.enqueue(records)
+            self.state.add_many([*claimed, *added])
+            self.state.add_many(r for _, updated in changed for r in updated)
+        self.log.wait(ticket)
+        # Подписчикам outbox'а (проекции, уведомления) — как у in-memory хранилища
+        self.state.add_events(events)
+        with self._snapshot_lock:
+            self._since_snapshot += len(events)
+            due = self._since_snapshot >= self.snapshot_every and self._snapshot_thread is None
+            if due:
+                self._since_snapshot = 0
+                self._snapshot_thread = threading.Thread(target=self._background_snapshot,
+                                                         name="eventlog-snapshot", daemon=True)
+                self._snapshot_thread.start()
+
+    def _check(self, claimed: Sequence[Reservation], added: Sequence[Reservation],
+               changed: Sequence["_Transition"]) -> None:
+        for reservation in claimed:
+            _raise_on_conflict(reservation, self.state.list_overlapping(
+                reservation.table_id, reservation.slot.start, reservation.slot.end))
+        new = {r.reservation_id: r for r in [*claimed, *added]}
+        for transition, updated in changed:
+            for reservation in updated:
+                current = (self.state.get(reservation.reservation_id)
+                           or new.get(reservation.reservation_id))
+                if current is None or not transition.allows(current):
+                    raise ValueError(STATUS_CHANGED_CONCURRENTLY)
+
+    def snapshot(self) -> str:
+        # Брони в состоянии не меняются на месте (смена статуса кладёт новый объект),
+        # поэтому списка ссылок, взятого под локом commit'а, достаточно
+        with self._lock:
+            reservations = list(self.state.iter_reservations(datetime.min, datetime.max))
+            log_offset = self.log.end
+            ticket = self._last_ticket
+        self.log.wait(ticket)
+        return write_snapshot(self.directory, reservations, log_offset)
+
+    def _background_snapshot(self) -> None:
+        try:
+            self.snapshot()
+        except Exception:
+            logger.exception("Event log snapshot failed")
+        finally:
+            with self._snapshot_lock:
+                self._snapshot_thread = None
+
+    def close(self) -> None:
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+        self.log.close()
+
+
+def _state_events(reservation: Reservation, occurred_at: datetime) -> List[object]:
+    # События для брони, записанной в обход агрегата (add/add_many без событий: импорт, тесты)
+    events = [domain_events.ReservationCreated(reservation.reservation_id, occurred_at,
+                                               reservation.slot.start, reservation.slot.end,
+                                               reservation.party_size.value)]
+    if reservation.table_id is not None:
+        events.append(domain_events.TableAssigned(reservation.reservation_id,
+                                                  reservation.table_id.value, occurred_at))
+    status_event = {
+        ReservationStatus.CONFIRMED: domain_events.ReservationConfirmed,
+        ReservationStatus.CANCELLED: domain_events.ReservationCancelled,
+        ReservationStatus.COMPLETED: domain_events.ReservationCompleted,
+    }.get(reservation.status)
+    if status_event is not None:
+        events.append(status_event(reservation.reservation_id, occurred_at))
+    return events
+
+
+class EventLogReservationRepository(ReservationRepository):
+    """
+    Репозиторий одного UoW поверх EventLogStore. Чтение — из общего (закоммиченного)
+    состояния плюс свои изменения; запись (claim, add, смена статуса) копится до commit
+    и применяется EventLogStore.commit вместе с постановкой событий в журнал.
+    Откат — просто забыть накопленное: общее состояние до commit не трогается.
+
+    claim проверяет стол сразу, а commit — ещё раз на текущем состоянии.
+    """
+
+    def __init__(self, store: EventLogStore) -> None:
+        self._state = store.state
+        self._events: List[object] = []
+        self._added: Dict[str, Reservation] = {}
+        self._claimed: Dict[str, Reservation] = {}
+        self._changed: List[_Transition] = []
+        # Последняя версия каждой брони, изменённой в этом UoW
+        self._own: Dict[str, Reservation] = {}
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        own = self._own.get(reservation_id)
+        return _copy(own) if own is not None else self._state.get(reservation_id)
+
+    def add(self, reservation: Reservation) -> None:
+        self.add_many([reservation])
+
+    def add_many(self, reservations: Iterable[Reservation]) -> None:
+        for reservation in reservations:
+            self._added[reservation.reservation_id] = reservation
+            self._own[reservation.reservation_id] = reservation
+
+    def add_events(self, events: Iterable[object]) -> None:
+        self._events.extend(events)
+
+    def list_for_slot(self, slot: TimeSlot) -> List[Reservation]:
+        return self._state.list_for_slot(slot)
+
+    def claim(self, reservations: Sequence[Reservation]) -> None:
+        for reservation in reservations:
+            _raise_on_conflict(reservation, self._state.list_overlapping(
+                reservation.table_id, reservation.slot.start, reservation.slot.end))
+        for reservation in reservations:
+            self._claimed[reservation.reservation_id] = reservation
+            self._own[reservation.reservation_id] = reservation
+
+    def release(self, reservations: Sequence[Reservation]) -> None:
+        # До commit брони только в этом UoW; откат их забывает
+        for reservation in reservations:
+            self._claimed.pop(reservation.reservation_id, None)
+            self._own.pop(reservation.reservation_id, None)
+
+    def list_overlapping(self, table_id, start: datetime, end: datetime) -> List[Reservation]:
+        return self._state.list_overlapping(table_id, start, end)
+
+    def list_between(self, start: datetime, end: datetime) -> List[Reservation]:
+        return self._state.list_between(start, end)
+
+    def transition_status(self, transition: StatusTransition,
+                          reservation_ids: Optional[Sequence[str]] = None,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          limit: Optional[int] = None) -> List[Reservation]:
+        if reservation_ids is not None:
+            candidates = [r for r in map(self.get, dict.fromkeys(reservation_ids)) if r is not None]
+        else:
+            candidates = [self._own.get(r.reservation_id, r)
+                          for r in self._state.list_between(start, end)]
+        changed = []
+        for reservation in candidates:
+            if limit is not None and len(changed) >= limit:
+                break
+            if transition.allows(reservation):
+                updated = _copy(reservation)
+                updated.status = transition.target
+                changed.append(updated)
+                self._own[updated.reservation_id] = updated
+        if changed:
+            self._changed.append((transition, changed))
+        return changed
+
+    def list_page(self, start: datetime, end: datetime, table_ids: Optional[Sequence[str]] = None,
+                  status: Optional[ReservationStatus] = None, after: Optional[Keyset] = None,
+                  limit: int = 50) -> List[Reservation]:
+        return self._state.list_page(start, end, table_ids, status, after, limit)
+
+    def iter_reservations(self, start: datetime, end: datetime, batch_size: Optional[int] = None,
+                          after: Optional[Keyset] = None) -> Iterator[Reservation]:
+        if batch_size is None:
+            return self._state.iter_reservations(start, end, after=after)
+        return self._state.iter_reservations(start, end, batch_size, after)
+
+    def pending_events(self) -> List[object]:
+        created = {e.reservation_id for e in self._events
+                   if isinstance(e, domain_events.ReservationCreated)}
+        now = datetime.utcnow()
+        new = {**self._claimed, **self._added}
+        events = [e for r in new.values() if r.reservation_id not in created
+                  for e in _state_events(r, now)]
+        events.extend(self._events)
+        return events
+
+    def commit(self, store: EventLogStore) -> None:
+        claimed = list(self._claimed.values())
+        added = [r for rid, r in self._added.items() if rid not in self._claimed]
+        store.commit(self.pending_events(), claimed, added, self._changed)
+
+    def clear(self) -> None:
+        self._events = []
+        self._added = {}
+        self._claimed = {}
+        self._changed = []
+        self._own = {}
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, fields
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Protocol, Sequence
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from .db_models import OutboxMessageModel
+from ..domain import events as domain_events
+
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[object], None]
+
+# Имя класса события -> класс (Published Language outbox'а)
+EVENT_TYPES = {
+    cls.__name__: cls
+    for cls in (
+        domain_events.ReservationCreated,
+        domain_events.ReservationConfirmed,
+        domain_events.ReservationCancelled,
+        domain_events.ReservationCompleted,
+        domain_events.TableAssigned,
+        domain_events.WaitlistPromoted,
+    )
+}
+
+
+# ---------- сериализация ----------
+
+def serialize_event(event) -> dict:
+    """Строка outbox'а для события (без id — его назначает хранилище)."""
+    payload = {}
+    for f in fields(event):
+        value = getattr(event, f.name)
+        payload[f.name] = value.isoformat() if isinstance(value, datetime) else value
+    return {
+        "event_type": type(event).__name__,
+        "payload": json.dumps(payload, separators=(",", ":")),
+        "occurred_at": event.occurred_at,
+    }
+
+
+# Аннотации событий — строки (from __future__ import annotations)
+_DATETIME_TYPES = ("datetime", "Optional[datetime]", datetime)
+
+
+def deserialize_event(event_type: str, payload: str):
+    cls = EVENT_TYPES[event_type]
+    data = json.loads(payload)
+    for f in fields(cls):
+        if f.type in _DATETIME_TYPES and data.get(f.name) is not None:
+            data[f.name] = datetime.fromisoformat(data[f.name])
+    return cls(**data)
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    id: int
+    event: object
+    attempts: int = 0
+
+
+# ---------- хранилища ----------
+
+class OutboxStore(Protocol):
+    def fetch_pending(self, limit: int) -> List[OutboxMessage]: ...
+    def mark_dispatched(self, ids: Sequence[int]) -> None: ...
+    def mark_failed(self, message_id: int, error: str) -> None: ...
+
+
+class InMemoryOutbox:
+    """
+    Outbox общего in-memory хранилища (см. InMemoryReservationRepository.add_events).
+
+    Доставленные сообщения не хранятся — только счётчик dispatched_count. Исчерпавшие
+    max_attempts уходят из очереди в dead_letters (последние dead_letter_limit штук),
+    чтобы fetch_pending не пересматривал их на каждом опросе.
+    """
+
+    def __init__(self, max_attempts: int = 10, dead_letter_limit: int = 1000) -> None:
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending: Dict[int, OutboxMessage] = {}
+        self.dispatched_count = 0
+        self.dead_letters: Deque[OutboxMessage] = deque(maxlen=dead_letter_limit)
+
+    def append(self, events: Iterable[object]) -> None:
+        with self._lock:
+            for event in events:
+                self._pending[self._next_id] = OutboxMessage(id=self._next_id, event=event)
+                self._next_id += 1
+
+    def fetch_pending(self, limit: int) -> List[OutboxMessage]:
+        with self._lock:
+            return list(islice(self._pending.values(), limit))
+
+    def mark_dispatched(self, ids: Sequence[int]) -> None:
+        with self._lock:
+            for message_id in ids:
+                if self._pending.pop(message_id, None) is not None:
+                    self.dispatched_count += 1
+
+    def mark_failed(self, message_id: int, error: str) -> None:
+        with self._lock:
+            message = self._pending.get(message_id)
+            if message is None:
+                return
+            message = OutboxMessage(message.id, message.event, message.attempts + 1)
+            if message.attempts < self.max_attempts:
+                self._pending[message_id] = message
+            else:
+                del self._pending[message_id]
+                self.dead_letters.append(message)
+
+
+def write_outbox_rows(session: Session, events: Iterable[object]) -> None:
+    """Пишет события в outbox в текущей транзакции сессии (один executemany)."""
+    rows = [serialize_event(e) for e in events]
+    if rows:
+        session.execute(insert(OutboxMessageModel), rows)
+
+
+class SqlAlchemyOutbox:
+    """Чтение outbox'а диспетчером: каждая операция — своя короткая транзакция."""
+
+    def __init__(self, session_factory: Callable[[], Session], max_attempts: int = 10) -> None:
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+
+    def fetch_pending(self, limit: int) -> List[OutboxMessage]:
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(OutboxMessageModel.id, OutboxMessageModel.event_type,
+                       OutboxMessageModel.payload, OutboxMessageModel.attempts)
+                .where(OutboxMessageModel.dispatched_at.is_(None))
+                .where(OutboxMessageModel.attempts < self.max_attempts)
+                .order_by(OutboxMessageModel.id)
+                .limit(limit)
+            )
+            return [OutboxMessage(id=r.id, event=deserialize_event(r.event_type, r.payload),
+                                  attempts=r.attempts)
+                    for r in rows]
+
+    def mark_dispatched(self, ids: Sequence[int]) -> None:
+        if not ids:
+            return
+        with self.session_factory() as session:
+            session.execute(
+                update(OutboxMessageModel)
+                .where(OutboxMessageModel.id.in_(list(ids)))
+                .values(dispatched_at=datetime.utcnow())
+            )
+            session.commit()
+
+    def mark_failed(self, message_id: int, error: str) -> None:
+        with self.session_factory() as session:
+            session.execute(
+                update(OutboxMessageModel)
+                .where(OutboxMessageModel.id == message_id)
+                .values(attempts=OutboxMessageModel.attempts + 1, last_error=error)
+            )
+            session.commit()
+
+
+# ---------- диспетчер ----------
+
+class OutboxDispatcher:
+    """
+    Разбирает outbox пачками и раздаёт события подписчикам.
+
+    Доставка at-least-once: сообщение помечается отправленным только после того,
+    как все его обработчики отработали без ошибок; иначе оно останется в outbox
+    и будет повторено (до max_attempts). Обработчики должны быть идемпотентными.
+    """
+
+    def __init__(self, store: OutboxStore, batch_size: int = 100) -> None:
+        self.store = store
+        self.batch_size = batch_size
+        self._handlers: Dict[type, List[EventHandler]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, event_type: type, handler: EventHandler) -> None:
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def dispatch_pending(self) -> int:
+        """Одна пачка. Возвращает число успешно доставленных сообщений."""
+        messages = self.store.fetch_pending(self.batch_size)
+        delivered = []
+        for message in messages:
+            try:
+                for handler in self._handlers.get(type(message.event), ()):
+                    handler(message.event)
+            except Exception as e:
+                logger.exception("Outbox message %s failed", message.id)
+                self.store.mark_failed(message.id, repr(e))
+            else:
+                delivered.append(message.id)
+
+        self.store.mark_dispatched(delivered)
+        return len(delivered)
+
+    def drain(self) -> int:
+        """Разбирает outbox до конца (пока пачки приходят полными)."""
+        total = 0
+        while True:
+            delivered = self.dispatch_pending()
+            total += delivered
+            if delivered < self.batch_size:
+                return total
+
+    # ---------- фоновый режим ----------
+
+    def start(self, interval: float = 0.5) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,),
+                                        name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+            self._stop.wait(interval)
@@ -1,68 +1,839 @@
 from __future__ import annotations
 
-from typing import Optional, List
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+from sqlalchemy import Select, and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from .db_models import ReservationModel, Base
-from ..domain.model import Reservation, TimeSlot
-from ..domain.repository import ReservationRepository
+from .. import metrics
+from .available_tables import _table_combinations
+from .db_models import (
+    Base,
+    OutboxMessageModel,
+    ReservationModel,
+    TableClaimModel,
+    WaitlistEntryModel,
+)
+from .outbox import InMemoryOutbox, serialize_event, write_outbox_rows
+from .reservation_cache import ReservationCache
+from ..domain.model import Reservation, TimeSlot, PartySize, TableId, ReservationStatus
+from ..domain.model import DEFAULT_RESTAURANT
+from ..domain.occupancy import OCCUPYING_STATUSES, part_keys, table_key
+from ..domain.repository import Keyset, ReservationRepository, TableConflict, WaitlistRepository
+from ..domain.transitions import StatusTransition
+from ..domain.waitlist import WaitlistEntry
+
+if TYPE_CHECKING:
+    # asyncio-расширение SQLAlchemy тянет greenlet — нужно только async-адаптеру
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Сколько строк держит в памяти iter_reservations за раз
+STREAM_BATCH_SIZE = 1000
+
+# Ключ временного индекса: (start, reservation_id) — уникален и сортируется по времени
+_TimeKey = Tuple[datetime, str]
 
 
 class InMemoryReservationRepository(ReservationRepository):
-    def __init__(self) -> None:
+    """
+    Помимо словаря по id держит два отсортированных индекса:
+    - _by_start: все брони по времени начала (для list_between / list_for_slot)
+    - _by_table: брони каждого стола по времени начала (для list_overlapping)
+
+    Для поиска пересечений достаточно смотреть брони, начавшиеся не раньше
+    start - _max_duration: более ранние гарантированно закончились до start.
+
+    Один экземпляр может быть общим хранилищем для многих UoW (см. entrypoints.container),
+    поэтому все операции идут под локом.
+
+    claim (проверка пересечений + запись) идёт под локами своих столов из набора
+    полос (lock striping): брони на разные столы не ждут друг друга, на один стол —
+    строго по очереди. Бронь на сдвинутые столы лежит в _by_table каждого стола группы.
+    """
+
+    # Число полос блокировок claim; столов обычно меньше, коллизии редки
+    STRIPES = 64
+
+    def __init__(self, outbox: Optional[InMemoryOutbox] = None) -> None:
+        self.outbox = outbox if outbox is not None else InMemoryOutbox()
         self._items: dict[str, Reservation] = {}
+        self._by_start: List[_TimeKey] = []
+        self._by_table: dict[str, List[_TimeKey]] = {}
+        self._max_duration = timedelta(0)
+        self._lock = threading.RLock()
+        self._stripes = [threading.Lock() for _ in range(self.STRIPES)]
 
+    @metrics.repository_timed("memory", "get")
     def get(self, reservation_id: str) -> Optional[Reservation]:
-        return self._items.get(reservation_id)
+        with self._lock:
+            reservation = self._items.get(reservation_id)
+        # Копия, как из БД: изменения агрегата попадают в хранилище только через репозиторий
+        return _copy(reservation) if reservation is not None else None
 
+    @metrics.repository_timed("memory", "add")
     def add(self, reservation: Reservation) -> None:
-        self._items[reservation.reservation_id] = reservation
+        with self._lock:
+            self._put(reservation)
+
+    @metrics.repository_timed("memory", "add_many")
+    def add_many(self, reservations: Iterable[Reservation]) -> None:
+        with self._lock:
+            for reservation in reservations:
+                self._put(reservation)
+
+    @metrics.repository_timed("memory", "add_events")
+    def add_events(self, events: Iterable[object]) -> None:
+        self.outbox.append(events)
 
+    @metrics.repository_timed("memory", "list_for_slot")
     def list_for_slot(self, slot: TimeSlot) -> List[Reservation]:
-        return [r for r in self._items.values() if r.slot == slot]
+        with self._lock:
+            return [r for r in self._range(self._by_start, slot.start, slot.start, inclusive=True)
+                    if r.slot.end == slot.end]
+
+    @metrics.repository_timed("memory", "claim")
+    def claim(self, reservations: Sequence[Reservation]) -> None:
+        # Полосы берутся в порядке номера — без взаимных блокировок у сдвинутых столов
+        stripes = sorted({hash(key) % self.STRIPES for key in _claim_keys(reservations)})
+        for i in stripes:
+            self._stripes[i].acquire()
+        try:
+            for reservation in reservations:
+                _raise_on_conflict(reservation, self.list_overlapping(
+                    reservation.table_id, reservation.slot.start, reservation.slot.end))
+            # У in-memory хранилища нет транзакции: закрепить слот = сразу записать брони
+            with self._lock:
+                for reservation in reservations:
+                    self._put(reservation)
+        finally:
+            for i in reversed(stripes):
+                self._stripes[i].release()
+
+    def release(self, reservations: Sequence[Reservation]) -> None:
+        with self._lock:
+            for reservation in reservations:
+                # Только если бронь с тех пор не перезаписали
+                if self._items.get(reservation.reservation_id) is reservation:
+                    self._unindex(reservation)
+                    del self._items[reservation.reservation_id]
+
+    @metrics.repository_timed("memory", "list_overlapping")
+    def list_overlapping(self, table_id, start: datetime, end: datetime) -> List[Reservation]:
+        with self._lock:
+            found = {}
+            for key in part_keys(table_id):
+                keys = self._by_table.get(key)
+                if keys:
+                    for r in self._range(keys, start - self._max_duration, end):
+                        if r.slot.end > start:
+                            found[r.reservation_id] = r
+            return sorted(found.values(), key=lambda r: (r.slot.start, r.reservation_id))
+
+    @metrics.repository_timed("memory", "list_between")
+    def list_between(self, start: datetime, end: datetime) -> List[Reservation]:
+        with self._lock:
+            return self._range(self._by_start, start, end)
+
+    @metrics.repository_timed("memory", "transition_status")
+    def transition_status(self, transition: StatusTransition,
+                          reservation_ids: Optional[Sequence[str]] = None,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          limit: Optional[int] = None) -> List[Reservation]:
+        with self._lock:
+            if reservation_ids is not None:
+                candidates = [self._items[i] for i in dict.fromkeys(reservation_ids)
+                              if i in self._items]
+            else:
+                candidates = self._range(self._by_start, start, end)
+            changed = []
+            for reservation in candidates:
+                if limit is not None and len(changed) >= limit:
+                    break
+                if transition.allows(reservation):
+                    # Новый объект вместо правки на месте:
+                    # уже выданные списки не меняются под читателем
+                    updated = _copy(reservation)
+                    updated.status = transition.target
+                    self._items[updated.reservation_id] = updated
+                    changed.append(updated)
+            return changed
+
+    @metrics.repository_timed("memory", "list_page")
+    def list_page(self, start: datetime, end: datetime, table_ids: Optional[Sequence[str]] = None,
+                  status: Optional[ReservationStatus] = None, after: Optional[Keyset] = None,
+                  limit: int = 50) -> List[Reservation]:
+        lower = (start, "") if after is None or after < (start, "") else after
+        wanted = None if table_ids is None else {table_key(t) for t in table_ids}
+        with self._lock:
+            if wanted is None:
+                sources = [self._by_start]
+            else:
+                # Бронь на "T1+T3" лежит в индексах T1 и T3: сливаем, соседние дубли пропускаем
+                parts = {p for t in wanted for p in part_keys(t)}
+                sources = [self._by_table.get(k, []) for k in parts]
+            page, previous = [], None
+            # Ленивые итераторы от позиции lower: хвосты индексов не копируются, страница
+            # стоит O(log n + limit) независимо от того, где начинается
+            for key in heapq.merge(*(_walk(keys, bisect_right(keys, lower)) for keys in sources)):
+                if key[0] >= end or len(page) >= limit:
+                    break
+                if key == previous:
+                    continue
+                previous = key
+                r = self._items[key[1]]
+                if ((status is None or r.status == status)
+                        and (wanted is None or r.table_id.value in wanted)):
+                    page.append(r)
+            return page
+
+    def iter_reservations(self, start: datetime, end: datetime, batch_size: int = STREAM_BATCH_SIZE,
+                          after: Optional[Keyset] = None) -> Iterator[Reservation]:
+        # Под локом берётся только очередная пачка ключей; брони отдаются по одной
+        if after is None or after < (start, ""):
+            after = (start, "")
+        while True:
+            with self._lock:
+                seek = bisect_right if after[1] else bisect_left
+                i = seek(self._by_start, after)
+                keys = [k for k in self._by_start[i:i + batch_size] if k[0] < end]
+                batch = [self._items[k[1]] for k in keys]
+            yield from batch
+            if len(keys) < batch_size:
+                return
+            after = keys[-1]
+
+    # ---------- индексы ----------
+
+    def _put(self, reservation: Reservation) -> None:
+        previous = self._items.get(reservation.reservation_id)
+        if previous is not None:
+            self._unindex(previous)
+
+        self._items[reservation.reservation_id] = reservation
+        self._index(reservation)
+
+    def _range(self, keys: List[_TimeKey], start: datetime, end: datetime,
+               inclusive: bool = False) -> List[Reservation]:
+        # Проход по индексу от i без среза: срез копировал бы весь хвост индекса
+        i = bisect_left(keys, (start, ""))
+        result = []
+        while i < len(keys):
+            key = keys[i]
+            if key[0] > end or (key[0] == end and not inclusive):
+                break
+            result.append(self._items[key[1]])
+            i += 1
+        return result
+
+    def _index(self, reservation: Reservation) -> None:
+        key = (reservation.slot.start, reservation.reservation_id)
+        insort(self._by_start, key)
+        if reservation.table_id is not None:
+            for table in part_keys(reservation.table_id):
+                insort(self._by_table.setdefault(table, []), key)
+
+        duration = reservation.slot.end - reservation.slot.start
+        if duration > self._max_duration:
+            self._max_duration = duration
+
+    def _unindex(self, reservation: Reservation) -> None:
+        key = (reservation.slot.start, reservation.reservation_id)
+        _discard(self._by_start, key)
+        if reservation.table_id is not None:
+            for table in part_keys(reservation.table_id):
+                _discard(self._by_table.get(table, []), key)
+
+
+def _walk(keys: List[_TimeKey], i: int) -> Iterator[_TimeKey]:
+    # islice(keys, i, None) тоже перебрал бы первые i ключей — идём по индексу
+    while i < len(keys):
+        yield keys[i]
+        i += 1
+
+
+def _discard(keys: List[_TimeKey], key: _TimeKey) -> None:
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+class _IdentityMap:
+    """
+    Identity map одного UoW: id -> уже собранная бронь. Повторный get в той же
+    транзакции не ходит ни в кэш, ни в БД и отдаёт тот же объект.
+    Заодно помнит, какие брони UoW менял, — их записи в общем кэше сбрасываются после commit.
+    """
+
+    __slots__ = ("cache", "_items", "_changed")
+
+    def __init__(self, cache: Optional[ReservationCache]) -> None:
+        self.cache = cache
+        self._items: Dict[str, Reservation] = {}
+        self._changed: Set[str] = set()
+
+    def lookup(self, reservation_id: str) -> Optional[Reservation]:
+        reservation = self._items.get(reservation_id)
+        if reservation is not None:
+            metrics.RESERVATION_CACHE.labels("identity_map").inc()
+            return reservation
+        if self.cache is not None:
+            reservation = self.cache.get(reservation_id)
+            if reservation is not None:
+                metrics.RESERVATION_CACHE.labels("lru").inc()
+                self._items[reservation_id] = reservation
+                return reservation
+        metrics.RESERVATION_CACHE.labels("database").inc()
+        return None
+
+    def loaded(self, row, token: Optional[int] = None) -> Reservation:
+        reservation_id = row[0]
+        reservation = self._items.get(reservation_id)
+        if reservation is None:
+            reservation = self._items[reservation_id] = _to_domain(row)
+            if token is not None and reservation_id not in self._changed:
+                self.cache.put(reservation, token)
+        return reservation
+
+    def begin_load(self) -> Optional[int]:
+        return self.cache.begin_load() if self.cache is not None else None
+
+    def changed(self, reservations: Iterable[Reservation]) -> None:
+        for reservation in reservations:
+            self._items[reservation.reservation_id] = reservation
+            self._changed.add(reservation.reservation_id)
+
+    def committed(self) -> None:
+        if self.cache is not None and self._changed:
+            self.cache.invalidate(self._changed)
+        self._changed = set()
+
+    def rolled_back(self) -> None:
+        self._items.clear()
+        self._changed = set()
 
 
 class SqlAlchemyReservationRepository(ReservationRepository):
-    def __init__(self, session: Session) -> None:
+    """
+    get: identity map этого UoW -> общий LRU (cache, если передан) -> БД.
+    UoW вызывает committed()/rolled_back() после своей транзакции.
+
+    restaurant_id: репозиторий одного заведения — в шарде могут лежать брони нескольких,
+    все запросы и ключи блокировок столов ограничены своим. None — без ограничения.
+
+    combinations — группы сдвигаемых столов, как у TableCatalog (по умолчанию те же).
+    По ним list_overlapping ищет брони на группы со своим столом через table_id IN (...),
+    не выходя из индекса ix_reservations_table_slot. Брони на группы, которых
+    в конфигурации больше нет, в проверку пересечений не попадают.
+    """
+
+    def __init__(self, session: Session, cache: Optional[ReservationCache] = None,
+                 restaurant_id: Optional[str] = None,
+                 combinations: Optional[Sequence[Sequence[str]]] = None) -> None:
         self.session = session
+        self.restaurant_id = restaurant_id
+        self._related = _related_tables(combinations)
+        self._identity = _IdentityMap(cache)
 
+    @metrics.repository_timed("sqlalchemy", "get")
     def get(self, reservation_id: str) -> Optional[Reservation]:
-        model = self.session.query(ReservationModel).filter_by(reservation_id=reservation_id).first()
-        if model:
-            return Reservation(
-                reservation_id=model.reservation_id,
-                table_id=model.table_id,
-                status=model.status,
-                slot=TimeSlot(start=model.start_time, end=model.end_time)
-            )
+        reservation = self._identity.lookup(reservation_id)
+        if reservation is not None:
+            return reservation if _visible(reservation, self.restaurant_id) else None
+        token = self._identity.begin_load()
+        row = self.session.execute(_scoped(_get_query(reservation_id), self.restaurant_id)).first()
+        if row is not None:
+            return self._identity.loaded(row, token)
         return None
 
+    @metrics.repository_timed("sqlalchemy", "add")
     def add(self, reservation: Reservation) -> None:
-        model = ReservationModel(
-            reservation_id=reservation.reservation_id,
-            table_id=reservation.table_id.value if reservation.table_id else None,
-            status=reservation.status.value,
-            start_time=reservation.slot.start,
-            end_time=reservation.slot.end,
-            party_size=reservation.party_size.value,
-        )
+        _check_venue([reservation], self.restaurant_id)
+        model = ReservationModel(**_to_row(reservation))
         self.session.add(model)
+        self._identity.changed([reservation])
 
+    @metrics.repository_timed("sqlalchemy", "add_many")
+    def add_many(self, reservations: Iterable[Reservation]) -> None:
+        reservations = list(reservations)
+        _check_venue(reservations, self.restaurant_id)
+        rows = [_to_row(r) for r in reservations]
+        if rows:
+            # Core insert со списком параметров = один executemany без ORM unit-of-work
+            self.session.execute(insert(ReservationModel), rows)
+            self._identity.changed(reservations)
+
+    @metrics.repository_timed("sqlalchemy", "add_events")
+    def add_events(self, events: Iterable[object]) -> None:
+        write_outbox_rows(self.session, events)
+
+    @metrics.repository_timed("sqlalchemy", "list_for_slot")
     def list_for_slot(self, slot: TimeSlot) -> List[Reservation]:
-        models = (self.session.query(ReservationModel)
-                  .filter(ReservationModel.start_time == slot.start)
-                  .filter(ReservationModel.end_time == slot.end)
-                  .all())
-        return [
-            Reservation(
-                reservation_id=m.reservation_id,
-                table_id=m.table_id,
-                status=m.status,
-                slot=TimeSlot(start=m.start_time, end=m.end_time)
-            ) for m in models
-        ]
+        return _to_domain_list(self.session.execute(_scoped(_slot_query(slot), self.restaurant_id)))
+
+    @metrics.repository_timed("sqlalchemy", "claim")
+    def claim(self, reservations: Sequence[Reservation]) -> None:
+        # UPDATE строки версии стола держит её блокировку до конца транзакции:
+        # параллельный claim того же стола ждёт нашего commit и потом видит нашу бронь
+        try:
+            for key in _claim_keys(reservations, self.restaurant_id):
+                claimed = self.session.execute(_bump_claim(key)).rowcount
+                if not claimed:
+                    self.session.execute(insert(TableClaimModel).values(table_id=key, version=1))
+        except IntegrityError as e:
+            # Строку версии этого стола только что создал другой воркер
+            raise TableConflict() from e
+        for reservation in reservations:
+            _raise_on_conflict(reservation, self.list_overlapping(
+                reservation.table_id, reservation.slot.start, reservation.slot.end))
+
+    def release(self, reservations: Sequence[Reservation]) -> None:
+        # Строки броней и версий столов снимает откат транзакции
+        pass
+
+    @metrics.repository_timed("sqlalchemy", "list_overlapping")
+    def list_overlapping(self, table_id, start: datetime, end: datetime) -> List[Reservation]:
+        return _to_domain_list(self.session.execute(
+            _scoped(_overlapping_query(table_id, start, end, self._related), self.restaurant_id)))
+
+    @metrics.repository_timed("sqlalchemy", "list_between")
+    def list_between(self, start: datetime, end: datetime) -> List[Reservation]:
+        return _to_domain_list(self.session.execute(
+            _scoped(_between_query(start, end), self.restaurant_id)))
+
+    @metrics.repository_timed("sqlalchemy", "transition_status")
+    def transition_status(self, transition: StatusTransition,
+                          reservation_ids: Optional[Sequence[str]] = None,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          limit: Optional[int] = None) -> List[Reservation]:
+        changed = _to_domain_list(self.session.execute(
+            _transition_query(transition, reservation_ids, start, end, limit, self.restaurant_id)))
+        self._identity.changed(changed)
+        return changed
+
+    @metrics.repository_timed("sqlalchemy", "list_page")
+    def list_page(self, start: datetime, end: datetime, table_ids: Optional[Sequence[str]] = None,
+                  status: Optional[ReservationStatus] = None, after: Optional[Keyset] = None,
+                  limit: int = 50) -> List[Reservation]:
+        return _to_domain_list(self.session.execute(
+            _scoped(_page_query(start, end, table_ids, status, after, limit), self.restaurant_id)))
+
+    def iter_reservations(self, start: datetime, end: datetime, batch_size: int = STREAM_BATCH_SIZE,
+                          after: Optional[Keyset] = None) -> Iterator[Reservation]:
+        """
+        Как list_between, но потоком: курсор на сервере (yield_per), в памяти
+        не больше batch_size строк. Сессию не трогать, пока генератор не дочитан.
+        after — продолжить строго после брони с ключом (start_time, reservation_id).
+        """
+        query = _scoped(_between_query(start, end, after), self.restaurant_id).execution_options(
+            yield_per=batch_size)
+        result = self.session.execute(query)
+        for rows in result.partitions():
+            for row in rows:
+                yield _to_domain(row)
+
+    def committed(self) -> None:
+        self._identity.committed()
+
+    def rolled_back(self) -> None:
+        self._identity.rolled_back()
 
     def create_all_tables(self):
         """Создаёт таблицы (вызывать один раз при старте приложения)"""
-        Base.metadata.create_all(bind=self.session.bind)
\ No newline at end of file
+        Base.metadata.create_all(bind=self.session.bind)
+
+
+class AsyncSqlAlchemyReservationRepository:
+    """Тот же адаптер поверх AsyncSession: запросы общие, отличается только await."""
+
+    def __init__(self, session: AsyncSession, cache: Optional[ReservationCache] = None,
+                 restaurant_id: Optional[str] = None,
+                 combinations: Optional[Sequence[Sequence[str]]] = None) -> None:
+        self.session = session
+        self.restaurant_id = restaurant_id
+        self._related = _related_tables(combinations)
+        self._identity = _IdentityMap(cache)
+
+    @metrics.repository_timed("sqlalchemy_async", "get")
+    async def get(self, reservation_id: str) -> Optional[Reservation]:
+        reservation = self._identity.lookup(reservation_id)
+        if reservation is not None:
+            return reservation if _visible(reservation, self.restaurant_id) else None
+        token = self._identity.begin_load()
+        row = (await self.session.execute(
+            _scoped(_get_query(reservation_id), self.restaurant_id))).first()
+        if row is not None:
+            return self._identity.loaded(row, token)
+        return None
+
+    @metrics.repository_timed("sqlalchemy_async", "add")
+    async def add(self, reservation: Reservation) -> None:
+        _check_venue([reservation], self.restaurant_id)
+        self.session.add(ReservationModel(**_to_row(reservation)))
+        self._identity.changed([reservation])
+
+    @metrics.repository_timed("sqlalchemy_async", "add_many")
+    async def add_many(self, reservations: Iterable[Reservation]) -> None:
+        reservations = list(reservations)
+        _check_venue(reservations, self.restaurant_id)
+        rows = [_to_row(r) for r in reservations]
+        if rows:
+            await self.session.execute(insert(ReservationModel), rows)
+            self._identity.changed(reservations)
+
+    @metrics.repository_timed("sqlalchemy_async", "add_events")
+    async def add_events(self, events: Iterable[object]) -> None:
+        rows = [serialize_event(e) for e in events]
+        if rows:
+            await self.session.execute(insert(OutboxMessageModel), rows)
+
+    @metrics.repository_timed("sqlalchemy_async", "list_for_slot")
+    async def list_for_slot(self, slot: TimeSlot) -> List[Reservation]:
+        return _to_domain_list(await self.session.execute(
+            _scoped(_slot_query(slot), self.restaurant_id)))
+
+    @metrics.repository_timed("sqlalchemy_async", "claim")
+    async def claim(self, reservations: Sequence[Reservation]) -> None:
+        try:
+            for key in _claim_keys(reservations, self.restaurant_id):
+                claimed = (await self.session.execute(_bump_claim(key))).rowcount
+                if not claimed:
+                    await self.session.execute(
+                        insert(TableClaimModel).values(table_id=key, version=1))
+        except IntegrityError as e:
+            raise TableConflict() from e
+        for reservation in reservations:
+            _raise_on_conflict(reservation, await self.list_overlapping(
+                reservation.table_id, reservation.slot.start, reservation.slot.end))
+
+    @metrics.repository_timed("sqlalchemy_async", "list_overlapping")
+    async def list_overlapping(self, table_id, start: datetime, end: datetime) -> List[Reservation]:
+        return _to_domain_list(await self.session.execute(
+            _scoped(_overlapping_query(table_id, start, end, self._related), self.restaurant_id)))
+
+    @metrics.repository_timed("sqlalchemy_async", "list_between")
+    async def list_between(self, start: datetime, end: datetime) -> List[Reservation]:
+        return _to_domain_list(await self.session.execute(
+            _scoped(_between_query(start, end), self.restaurant_id)))
+
+    @metrics.repository_timed("sqlalchemy_async", "transition_status")
+    async def transition_status(self, transition: StatusTransition,
+                                reservation_ids: Optional[Sequence[str]] = None,
+                                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                limit: Optional[int] = None) -> List[Reservation]:
+        changed = _to_domain_list(await self.session.execute(
+            _transition_query(transition, reservation_ids, start, end, limit, self.restaurant_id)))
+        self._identity.changed(changed)
+        return changed
+
+    @metrics.repository_timed("sqlalchemy_async", "list_page")
+    async def list_page(self, start: datetime, end: datetime,
+                        table_ids: Optional[Sequence[str]] = None,
+                        status: Optional[ReservationStatus] = None, after: Optional[Keyset] = None,
+                        limit: int = 50) -> List[Reservation]:
+        return _to_domain_list(await self.session.execute(
+            _scoped(_page_query(start, end, table_ids, status, after, limit), self.restaurant_id)))
+
+    async def iter_reservations(self, start: datetime, end: datetime,
+                                batch_size: int = STREAM_BATCH_SIZE,
+                                after: Optional[Keyset] = None) -> AsyncIterator[Reservation]:
+        query = _scoped(_between_query(start, end, after), self.restaurant_id).execution_options(
+            yield_per=batch_size)
+        result = await self.session.stream(query)
+        async for rows in result.partitions():
+            for row in rows:
+                yield _to_domain(row)
+
+    def committed(self) -> None:
+        self._identity.committed()
+
+    def rolled_back(self) -> None:
+        self._identity.rolled_back()
+
+
+# ---------- запросы и маппинг, общие для sync/async адаптеров ----------
+# Чтение — Core-select нужных колонок: строки-кортежи сразу в доменные объекты,
+# без промежуточных ORM-экземпляров и identity map сессии
+
+# Порядок колонок = порядок полей в _to_domain
+_COLUMNS = (
+    ReservationModel.reservation_id,
+    ReservationModel.table_id,
+    ReservationModel.status,
+    ReservationModel.start_time,
+    ReservationModel.end_time,
+    ReservationModel.party_size,
+    ReservationModel.restaurant_id,
+)
+
+_STATUSES = {status.value: status for status in ReservationStatus}
+
+
+def _scoped(query: Select, restaurant_id: Optional[str]) -> Select:
+    # Условие на заведение добавляется к готовому запросу; в шарде обычно единицы
+    # заведений, поэтому существующие индексы по столу/времени остаются селективными
+    if restaurant_id is None:
+        return query
+    return query.where(ReservationModel.restaurant_id == restaurant_id)
+
+
+def _visible(reservation: Reservation, restaurant_id: Optional[str]) -> bool:
+    return restaurant_id is None or reservation.restaurant_id == restaurant_id
+
+
+def _check_venue(reservations: Iterable[Reservation], restaurant_id: Optional[str]) -> None:
+    for reservation in reservations:
+        if not _visible(reservation, restaurant_id):
+            raise ValueError(
+                f"Reservation of {reservation.restaurant_id!r} routed to {restaurant_id!r}")
+
+
+def _get_query(reservation_id: str) -> Select:
+    return select(*_COLUMNS).where(ReservationModel.reservation_id == reservation_id)
+
+
+def _slot_query(slot: TimeSlot) -> Select:
+    return (select(*_COLUMNS)
+            .where(ReservationModel.start_time == slot.start)
+            .where(ReservationModel.end_time == slot.end))
+
+
+def _related_tables(combinations: Optional[Sequence[Sequence[str]]]) -> Dict[str, Tuple[str, ...]]:
+    # стол -> id групп ("T1+T3"), в которые он входит
+    groups = combinations if combinations is not None else _table_combinations
+    related: Dict[str, List[str]] = {}
+    for group in groups:
+        if len(group) > 1:
+            combined = TableId.combined(group).value
+            for part in group:
+                related.setdefault(str(part), []).append(combined)
+    return {key: tuple(ids) for key, ids in related.items()}
+
+
+def _overlapping_query(table_id, start: datetime, end: datetime,
+                       related: Dict[str, Tuple[str, ...]]) -> Select:
+    # Только равенства по столу: IN по своим столам и их группам — поиск по индексу
+    # ix_reservations_table_slot (table_id, start_time, end_time), без LIKE с ведущим %
+    ids = {table_key(table_id)}
+    for key in part_keys(table_id):
+        ids.add(key)
+        ids.update(related.get(key, ()))
+    return (select(*_COLUMNS)
+            .where(ReservationModel.table_id.in_(sorted(ids)))
+            .where(ReservationModel.start_time < end)
+            .where(ReservationModel.end_time > start)
+            .order_by(ReservationModel.start_time))
+
+
+def _between_query(start: datetime, end: datetime, after: Optional[Keyset] = None) -> Select:
+    # Покрывается индексом ix_reservations_keyset (ведущая колонка — start_time)
+    query = (select(*_COLUMNS)
+             .where(ReservationModel.start_time >= start)
+             .where(ReservationModel.start_time < end)
+             .order_by(ReservationModel.start_time, ReservationModel.reservation_id))
+    if after is not None:
+        query = query.where(_after(after))
+    return query
+
+
+def _page_query(start: datetime, end: datetime, table_ids: Optional[Sequence[str]],
+                status: Optional[ReservationStatus], after: Optional[Keyset], limit: int) -> Select:
+    # Идёт по ix_reservations_keyset / ix_reservations_status_keyset / ix_reservations_table_slot
+    # от позиции after: глубокая страница стоит столько же, сколько первая (в отличие от OFFSET)
+    query = (select(*_COLUMNS)
+             .where(ReservationModel.start_time >= start)
+             .where(ReservationModel.start_time < end))
+    if table_ids is not None:
+        query = query.where(ReservationModel.table_id.in_([table_key(t) for t in table_ids]))
+    if status is not None:
+        query = query.where(ReservationModel.status == status.value)
+    if after is not None:
+        query = query.where(_after(after))
+    return query.order_by(ReservationModel.start_time, ReservationModel.reservation_id).limit(limit)
+
+
+def _transition_query(transition: StatusTransition, reservation_ids: Optional[Sequence[str]],
+                      start: Optional[datetime], end: Optional[datetime], limit: Optional[int],
+                      restaurant_id: Optional[str] = None):
+    """
+    Один UPDATE ... RETURNING на пакет: инварианты перехода — в WHERE, поэтому
+    бронь, которую параллельно перевели в другой статус, просто не попадёт в результат.
+    Без списка id — до limit броней с началом в [start, end) (подзапрос по ix_reservations_keyset).
+    """
+    allowed = [ReservationModel.status.in_([s.value for s in transition.allowed_from])]
+    if transition.requires_table:
+        allowed.append(ReservationModel.table_id.is_not(None))
+    if restaurant_id is not None:
+        allowed.append(ReservationModel.restaurant_id == restaurant_id)
+
+    if reservation_ids is not None:
+        targets = list(reservation_ids)
+    else:
+        targets = (select(ReservationModel.reservation_id)
+                   .where(*allowed)
+                   .where(ReservationModel.start_time >= start)
+                   .where(ReservationModel.start_time < end)
+                   .order_by(ReservationModel.start_time, ReservationModel.reservation_id)
+                   .limit(limit)
+                   .scalar_subquery())
+    return (update(ReservationModel)
+            .where(ReservationModel.reservation_id.in_(targets))
+            .where(*allowed)
+            .values(status=transition.target.value)
+            .returning(*_COLUMNS)
+            .execution_options(synchronize_session=False))
+
+
+def _after(after: Keyset):
+    # (start_time, reservation_id) > after без row values — переносимо между СУБД;
+    # отдельное start_time >= ... даёт планировщику границу диапазона по индексу
+    after_start, after_id = after
+    return and_(ReservationModel.start_time >= after_start,
+                or_(ReservationModel.start_time > after_start,
+                    ReservationModel.reservation_id > after_id))
+
+
+def _claim_keys(reservations: Sequence[Reservation],
+                restaurant_id: Optional[str] = None) -> List[str]:
+    keys = set()
+    for reservation in reservations:
+        if reservation.table_id is None:
+            raise ValueError("Invariant: cannot claim a reservation without table")
+        keys.update(part_keys(reservation.table_id))
+    if restaurant_id is not None and restaurant_id != DEFAULT_RESTAURANT:
+        # T1 одного заведения и T1 другого в общем шарде — разные строки версии
+        keys = {f"{restaurant_id}/{key}" for key in keys}
+    # Единый порядок блокировки строк — без дедлоков у сдвинутых столов и пакетов
+    return sorted(keys)
+
+
+def _bump_claim(key: str):
+    return (update(TableClaimModel)
+            .where(TableClaimModel.table_id == key)
+            .values(version=TableClaimModel.version + 1))
+
+
+def _raise_on_conflict(reservation: Reservation, overlapping: Iterable[Reservation]) -> None:
+    conflicts = [r for r in overlapping
+                 if r.reservation_id != reservation.reservation_id
+                 and r.status in OCCUPYING_STATUSES]
+    if conflicts:
+        raise TableConflict(conflicts)
+
+
+def _to_row(reservation: Reservation) -> dict:
+    return {
+        "reservation_id": reservation.reservation_id,
+        "table_id": reservation.table_id.value if reservation.table_id else None,
+        "status": reservation.status.value,
+        "start_time": reservation.slot.start,
+        "end_time": reservation.slot.end,
+        "party_size": reservation.party_size.value,
+        "restaurant_id": reservation.restaurant_id,
+    }
+
+
+def _to_domain(row) -> Reservation:
+    reservation_id, table_id, status, start_time, end_time, party_size, restaurant_id = row
+    return Reservation(
+        reservation_id=reservation_id,
+        table_id=TableId.of(table_id) if table_id is not None else None,
+        status=_STATUSES[status],
+        slot=TimeSlot(start=start_time, end=end_time),
+        party_size=PartySize.of(party_size),
+        restaurant_id=restaurant_id,
+    )
+
+
+def _to_domain_list(rows) -> List[Reservation]:
+    return [_to_domain(row) for row in rows]
+
+
+def _copy(reservation: Reservation) -> Reservation:
+    return Reservation(reservation.reservation_id, reservation.slot, reservation.party_size,
+                       reservation.table_id, reservation.status, reservation.restaurant_id)
+
+
+class InMemoryWaitlistRepository(WaitlistRepository):
+    """
+    Лист ожидания общего in-memory хранилища; как и брони, пишется сразу, без транзакции.
+
+    remove — всё или ничего: если части записей уже нет, не удаляется ни одна (как после
+    отката SQL-транзакции, которую повышение откатывает при недобранном DELETE).
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, WaitlistEntry] = {}
+        self._lock = threading.Lock()
+
+    def add(self, entry: WaitlistEntry) -> None:
+        with self._lock:
+            self._entries[entry.entry_id] = entry
+
+    def remove(self, entry_ids: Sequence[str]) -> List[str]:
+        with self._lock:
+            present = [i for i in entry_ids if i in self._entries]
+            if len(present) == len(entry_ids):
+                for entry_id in present:
+                    del self._entries[entry_id]
+            return present
+
+    def list_all(self) -> List[WaitlistEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def list_since(self, after: datetime) -> List[WaitlistEntry]:
+        with self._lock:
+            return [e for e in self._entries.values() if e.created_at > after]
+
+
+class SqlAlchemyWaitlistRepository(WaitlistRepository):
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def add(self, entry: WaitlistEntry) -> None:
+        self.session.execute(insert(WaitlistEntryModel).values(
+            entry_id=entry.entry_id, start_time=entry.slot.start, end_time=entry.slot.end,
+            party_size=entry.party_size, created_at=entry.created_at))
+
+    def remove(self, entry_ids: Sequence[str]) -> List[str]:
+        if not entry_ids:
+            return []
+        # DELETE ... RETURNING: строку, которую удалил другой воркер, мы не получим
+        return list(self.session.scalars(
+            delete(WaitlistEntryModel).where(WaitlistEntryModel.entry_id.in_(list(entry_ids)))
+            .returning(WaitlistEntryModel.entry_id)
+        ))
+
+    def list_all(self) -> List[WaitlistEntry]:
+        return self._entries(select(*self._columns()))
+
+    def list_since(self, after: datetime) -> List[WaitlistEntry]:
+        m = WaitlistEntryModel
+        query = select(*self._columns()).where(m.created_at > after).order_by(m.created_at)
+        return self._entries(query)
+
+    @staticmethod
+    def _columns():
+        m = WaitlistEntryModel
+        return m.entry_id, m.start_time, m.end_time, m.party_size, m.created_at
+
+    def _entries(self, query) -> List[WaitlistEntry]:
+        return [WaitlistEntry(entry_id, TimeSlot(start, end), party_size, created_at)
+                for entry_id, start, end, party_size, created_at in self.session.execute(query)]
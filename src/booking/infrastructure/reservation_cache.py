@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Tuple
+
+from ..domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+
+
+# Снимок брони из одних неизменяемых значений: Reservation изменяема, общий объект
+# между UoW отдавать нельзя — на каждый hit собирается новый
+_Snapshot = Tuple[str, TimeSlot, PartySize, Optional[TableId], ReservationStatus, str]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _Entry:
+    __slots__ = ("snapshot", "stored_at")
+
+    def __init__(self, snapshot: _Snapshot, stored_at: float) -> None:
+        self.snapshot = snapshot
+        self.stored_at = stored_at
+
+
+class ReservationCache:
+    """
+    Процессный LRU броней по id поверх SqlAlchemy-репозитория (get).
+
+    - commit изменённых броней сбрасывает их записи (invalidate);
+    - смену статуса в другом воркере этот кэш не видит: до ttl секунд get может
+      отдать прежний статус. Действовать по нему безопасно — смена статуса идёт
+      условным UPDATE (transition_status), и переход из устаревшего статуса просто
+      не применится (STATUS_CHANGED_CONCURRENTLY);
+    - гонка "прочитали из БД, а тем временем бронь закоммитили" закрыта токеном,
+      как в InMemoryAvailabilityCache: put с токеном до invalidate не сохраняется.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def begin_load(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        with self._lock:
+            entry = self._entries.get(reservation_id)
+            if entry is not None and self._clock() - entry.stored_at > self.ttl:
+                del self._entries[reservation_id]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(reservation_id)
+            self._hits += 1
+        reservation_id, slot, party_size, table_id, status, restaurant_id = entry.snapshot
+        return Reservation(reservation_id, slot, party_size, table_id, status, restaurant_id)
+
+    def put(self, reservation: Reservation, token: int) -> None:
+        snapshot = (reservation.reservation_id, reservation.slot, reservation.party_size,
+                    reservation.table_id, reservation.status, reservation.restaurant_id)
+        with self._lock:
+            if token != self._generation:
+                return
+            self._entries[reservation.reservation_id] = _Entry(snapshot, self._clock())
+            self._entries.move_to_end(reservation.reservation_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, reservation_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for reservation_id in reservation_ids:
+                self._entries.pop(reservation_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, size=len(self._entries))
@@ -0,0 +1,332 @@
+"""
+Read model "план зала на день" (CQRS, read side).
+
+Экраны хостес перерисовывают план каждые несколько секунд; вместо выборки и маппинга
+броней через репозиторий каждый раз они читают готовые документы: один на
+(день, физический стол) с упорядоченными занятыми слотами.
+
+Документы поддерживает DailyScheduleProjection из событий outbox'а (TableAssigned,
+ReservationCancelled); с нуля их собирает RebuildDailyScheduleHandler.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .db_models import DailyScheduleModel
+from .outbox import OutboxDispatcher
+from ..application.handlers import table_day_schedules
+from ..application.queries import DailyScheduleReadModel, ScheduledSlot, TableDaySchedule
+from ..domain.events import ReservationCancelled, TableAssigned
+from ..domain.model import DEFAULT_RESTAURANT, Reservation, ReservationStatus
+from ..domain.occupancy import part_keys
+
+
+logger = logging.getLogger(__name__)
+
+# Сколько документов пишет один INSERT пересборки
+REBUILD_BATCH_SIZE = 500
+
+# Попыток read-modify-write документа, если его одновременно поменял другой воркер
+MODIFY_ATTEMPTS = 5
+
+# Tombstones в памяти держатся для дней не раньше вчерашнего: повтор TableAssigned
+# из outbox'а приходит через секунды-минуты, а не через сутки
+TOMBSTONE_RETENTION = timedelta(days=1)
+
+Slots = Tuple[ScheduledSlot, ...]
+
+# Документ: слоты стола за день + id отменённых броней (tombstones). Отмена терминальна,
+# поэтому TableAssigned, доставленное после отмены (повтор из outbox'а), слот не возвращает
+Document = Tuple[Slots, FrozenSet[str]]
+
+# Брони с началом в [start, end) по порядку начала (ReservationRepository.iter_reservations)
+ReservationSource = Callable[[datetime, datetime], Iterable[Reservation]]
+
+
+def _with_slot(document: Document, slot: ScheduledSlot) -> Document:
+    slots, cancelled = document
+    if slot.reservation_id in cancelled:
+        return document
+    # Повторная доставка события заменяет слот, а не дублирует его
+    kept = [s for s in slots if s.reservation_id != slot.reservation_id]
+    kept.append(slot)
+    return tuple(sorted(kept, key=lambda s: (s.start_time, s.reservation_id))), cancelled
+
+
+def _without(document: Document, reservation_id: str) -> Document:
+    slots, cancelled = document
+    kept = tuple(s for s in slots if s.reservation_id != reservation_id)
+    return kept, cancelled | {reservation_id}
+
+
+def _in_range(day: date, start_day: Optional[date], end_day: Optional[date]) -> bool:
+    return (start_day is None or day >= start_day) and (end_day is None or day < end_day)
+
+
+class InMemoryDailySchedule:
+    """
+    Read model в памяти процесса (storage=memory); tombstones — на день, id брони уникален.
+    Tombstones прошедших дней (старше TOMBSTONE_RETENTION) отбрасываются, иначе они
+    копились бы с каждой отменой.
+
+    С source (storage=eventlog: брони уже восстановлены в памяти) день собирается из броней
+    при первом обращении — старт не пересобирает план за всю историю. День собирается под
+    локом: событие, закоммиченное позже, проекция применит уже к собранному дню.
+    """
+
+    def __init__(self, source: Optional[ReservationSource] = None) -> None:
+        self._lock = threading.Lock()
+        self._days: Dict[date, Dict[str, Slots]] = {}
+        self._cancelled: Dict[date, Set[str]] = {}
+        self._source = source
+        self._loaded: Set[date] = set()
+        self._horizon = date.min
+
+    def get_day(self, day: date, table_id: Optional[str] = None) -> List[TableDaySchedule]:
+        with self._lock:
+            self._load(day)
+            tables = dict(self._days.get(day, {}))
+        return [TableDaySchedule(day, t, tables[t]) for t in sorted(tables)
+                if table_id is None or t == table_id]
+
+    def place(self, day: date, table_ids: Sequence[str], slot: ScheduledSlot) -> None:
+        with self._lock:
+            self._load(day)
+            if slot.reservation_id in self._cancelled.get(day, ()):
+                return
+            tables = self._days.setdefault(day, {})
+            for table_id in table_ids:
+                tables[table_id], _ = _with_slot((tables.get(table_id, ()), frozenset()), slot)
+
+    def remove(self, day: date, table_ids: Sequence[str], reservation_id: str) -> None:
+        with self._lock:
+            self._load(day)
+            self._tombstone(day, [reservation_id])
+            tables = self._days.get(day, {})
+            for table_id in table_ids:
+                slots, _ = _without((tables.get(table_id, ()), frozenset()), reservation_id)
+                if slots:
+                    tables[table_id] = slots
+                else:
+                    tables.pop(table_id, None)
+
+    def rebuild(self, start_day: Optional[date], end_day: Optional[date],
+                schedules: Iterable[TableDaySchedule]) -> int:
+        # Новые документы собираются без блокировки, подменяются разом; tombstones остаются
+        rebuilt: Dict[date, Dict[str, Slots]] = {}
+        count = 0
+        for schedule in schedules:
+            rebuilt.setdefault(schedule.day, {})[schedule.table_id] = schedule.slots
+            count += 1
+        with self._lock:
+            for day in [d for d in self._days if _in_range(d, start_day, end_day)]:
+                del self._days[day]
+            self._days.update(rebuilt)
+            self._loaded.update(rebuilt)
+        return count
+
+    def _load(self, day: date) -> None:
+        if self._source is None or day in self._loaded:
+            return
+        self._loaded.add(day)
+        start = datetime.combine(day, time.min)
+        reservations = list(self._source(start, start + timedelta(days=1)))
+        for schedule in table_day_schedules(reservations):
+            self._days.setdefault(day, {})[schedule.table_id] = schedule.slots
+        # Отменённые до сборки: их запоздавшее TableAssigned на план не вернётся
+        self._tombstone(day, [r.reservation_id for r in reservations
+                              if r.status == ReservationStatus.CANCELLED])
+
+    def _tombstone(self, day: date, reservation_ids: Sequence[str]) -> None:
+        horizon = date.today() - TOMBSTONE_RETENTION
+        if horizon > self._horizon:
+            self._horizon = horizon
+            for expired in [d for d in self._cancelled if d < horizon]:
+                del self._cancelled[expired]
+        if reservation_ids and day >= horizon:
+            self._cancelled.setdefault(day, set()).update(reservation_ids)
+
+
+class _Stale(Exception):
+    """Документ поменяли между чтением и записью."""
+
+
+def _encode(document: Document) -> str:
+    slots, cancelled = document
+    encoded = [[s.start_time.isoformat(), s.end_time.isoformat(), s.reservation_id, s.party_size]
+               for s in slots]
+    # Без отмен — прежний формат (список слотов): старые строки читаются как есть
+    payload = {"slots": encoded, "cancelled": sorted(cancelled)} if cancelled else encoded
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def _decode(raw: str) -> Document:
+    payload = json.loads(raw)
+    if isinstance(payload, dict):
+        encoded, cancelled = payload["slots"], frozenset(payload["cancelled"])
+    else:
+        encoded, cancelled = payload, frozenset()
+    slots = tuple(ScheduledSlot(rid, datetime.fromisoformat(start), datetime.fromisoformat(end),
+                                party_size)
+                  for start, end, rid, party_size in encoded)
+    return slots, cancelled
+
+
+class SqlAlchemyDailySchedule:
+    """
+    Read model в БД (таблица daily_schedule): общий для всех воркеров.
+
+    Каждое изменение — короткая транзакция read-modify-write документов с проверкой
+    version; при гонке двух воркеров (at-least-once доставка из общего outbox'а)
+    изменение повторяется на свежем документе.
+
+    Tombstones отмен лежат в документах своих столов; документ из одних tombstones
+    читателям не отдаётся.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session],
+                 attempts: int = MODIFY_ATTEMPTS) -> None:
+        self.session_factory = session_factory
+        self.attempts = attempts
+
+    def get_day(self, day: date, table_id: Optional[str] = None) -> List[TableDaySchedule]:
+        query = (select(DailyScheduleModel.table_id, DailyScheduleModel.slots)
+                 .where(DailyScheduleModel.day == day))
+        if table_id is not None:
+            query = query.where(DailyScheduleModel.table_id == table_id)
+        with self.session_factory() as session:
+            rows = session.execute(query.order_by(DailyScheduleModel.table_id)).all()
+        documents = [(t, _decode(raw)[0]) for t, raw in rows]
+        return [TableDaySchedule(day, t, slots) for t, slots in documents if slots]
+
+    def place(self, day: date, table_ids: Sequence[str], slot: ScheduledSlot) -> None:
+        self._modify(day, table_ids, lambda document: _with_slot(document, slot))
+
+    def remove(self, day: date, table_ids: Sequence[str], reservation_id: str) -> None:
+        self._modify(day, table_ids, lambda document: _without(document, reservation_id))
+
+    def rebuild(self, start_day: Optional[date], end_day: Optional[date],
+                schedules: Iterable[TableDaySchedule]) -> int:
+        model = DailyScheduleModel
+        count = 0
+        with self.session_factory() as session:
+            # Одна транзакция: читатели видят либо старый план, либо новый целиком
+            in_range = []
+            if start_day is not None:
+                in_range.append(model.day >= start_day)
+            if end_day is not None:
+                in_range.append(model.day < end_day)
+            # Tombstones переживают пересборку: опоздавшее TableAssigned не вернёт отменённую бронь
+            tombstones = {}
+            for day, table_id, raw in session.execute(select(model.day, model.table_id, model.slots)
+                                                      .where(*in_range)):
+                cancelled = _decode(raw)[1]
+                if cancelled:
+                    tombstones[(day, table_id)] = cancelled
+            session.execute(delete(model).where(*in_range))
+            rows = []
+            for schedule in schedules:
+                cancelled = tombstones.pop((schedule.day, schedule.table_id), frozenset())
+                rows.append({"day": schedule.day, "table_id": schedule.table_id,
+                             "slots": _encode((schedule.slots, cancelled)), "version": 0})
+                count += 1
+                if len(rows) >= REBUILD_BATCH_SIZE:
+                    session.execute(insert(model), rows)
+                    rows = []
+            rows += [{"day": day, "table_id": table_id, "slots": _encode(((), cancelled)),
+                      "version": 0}
+                     for (day, table_id), cancelled in tombstones.items()]
+            if rows:
+                session.execute(insert(model), rows)
+            session.commit()
+        return count
+
+    def _modify(self, day: date, table_ids: Sequence[str],
+                change: Callable[[Document], Document]) -> None:
+        for _ in range(self.attempts):
+            with self.session_factory() as session:
+                try:
+                    self._apply(session, day, table_ids, change)
+                    session.commit()
+                    return
+                except (_Stale, IntegrityError):
+                    session.rollback()
+        # Событие останется в outbox'е и будет доставлено повторно
+        raise RuntimeError(f"Daily schedule {day} {list(table_ids)} keeps changing concurrently")
+
+    @staticmethod
+    def _apply(session: Session, day: date, table_ids: Sequence[str],
+               change: Callable[[Document], Document]) -> None:
+        model = DailyScheduleModel
+        current = {r.table_id: r for r in session.execute(
+            select(model.table_id, model.slots, model.version)
+            .where(model.day == day, model.table_id.in_(list(table_ids)))
+        )}
+        for table_id in table_ids:
+            row = current.get(table_id)
+            document = change(_decode(row.slots) if row is not None else ((), frozenset()))
+            keep = bool(document[0] or document[1])
+            if row is None:
+                if keep:
+                    session.execute(insert(model).values(day=day, table_id=table_id,
+                                                         slots=_encode(document), version=0))
+                continue
+            guard = (model.day == day, model.table_id == table_id, model.version == row.version)
+            if keep:
+                result = session.execute(update(model).where(*guard)
+                                         .values(slots=_encode(document), version=row.version + 1))
+            else:
+                result = session.execute(delete(model).where(*guard))
+            if result.rowcount != 1:
+                raise _Stale()
+
+
+class DailyScheduleProjection:
+    """
+    Проекция событий в read model. Обработчики идемпотентны (доставка at-least-once):
+    повторное TableAssigned заменяет слот, повторная отмена ничего не меняет.
+    Порядок доставки не гарантирован (dispatcher идёт дальше мимо упавшего сообщения),
+    поэтому отмена оставляет tombstone, и TableAssigned после неё игнорируется.
+
+    ReservationCreated в план не попадает: у брони ещё нет стола, а TableAssigned
+    несёт и стол, и слот. Сдвинутые столы "T1+T3" попадают в документы T1 и T3.
+
+    План ведётся для заведения по умолчанию: события других заведений пропускаются.
+    """
+
+    def __init__(self, read_model: DailyScheduleReadModel) -> None:
+        self.read_model = read_model
+
+    def subscribe(self, dispatcher: OutboxDispatcher) -> None:
+        dispatcher.subscribe(TableAssigned, self.table_assigned)
+        dispatcher.subscribe(ReservationCancelled, self.reservation_cancelled)
+
+    def table_assigned(self, event: TableAssigned) -> None:
+        if not _default_venue(event):
+            return
+        if event.slot_start is None:
+            # Запись outbox'а до появления слота в событиях — её подберёт пересборка
+            logger.warning("TableAssigned %s without slot, schedule needs rebuild",
+                           event.reservation_id)
+            return
+        slot = ScheduledSlot(event.reservation_id, event.slot_start, event.slot_end,
+                             event.party_size)
+        self.read_model.place(event.slot_start.date(), part_keys(event.table_id), slot)
+
+    def reservation_cancelled(self, event: ReservationCancelled) -> None:
+        if not _default_venue(event) or event.slot_start is None or event.table_id is None:
+            return
+        self.read_model.remove(event.slot_start.date(), part_keys(event.table_id),
+                               event.reservation_id)
+
+
+def _default_venue(event) -> bool:
+    return event.restaurant_id in (None, DEFAULT_RESTAURANT)
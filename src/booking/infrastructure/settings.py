@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Mapping, Optional, Tuple
+
+
+def _bool(value: str) -> bool:
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+# Настройки БД. В проме задаются переменными окружения BOOKING_DB_*.
+@dataclass(frozen=True)
+class DatabaseSettings:
+    url: str = "sqlite:///bookings.db"
+    async_url: str = "sqlite+aiosqlite:///bookings.db"
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = True
+    # Только для SQLite
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_busy_timeout_ms: int = 5000
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "DatabaseSettings":
+        defaults = cls()
+        return cls(
+            url=environ.get("BOOKING_DB_URL", defaults.url),
+            async_url=environ.get("BOOKING_DB_ASYNC_URL", defaults.async_url),
+            echo=_bool(environ.get("BOOKING_DB_ECHO", str(defaults.echo))),
+            pool_size=int(environ.get("BOOKING_DB_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(environ.get("BOOKING_DB_MAX_OVERFLOW", defaults.max_overflow)),
+            pool_timeout=float(environ.get("BOOKING_DB_POOL_TIMEOUT", defaults.pool_timeout)),
+            pool_pre_ping=_bool(
+                environ.get("BOOKING_DB_POOL_PRE_PING", str(defaults.pool_pre_ping))),
+            sqlite_mmap_size=int(
+                environ.get("BOOKING_DB_SQLITE_MMAP_SIZE", defaults.sqlite_mmap_size)),
+            sqlite_busy_timeout_ms=int(
+                environ.get("BOOKING_DB_SQLITE_BUSY_TIMEOUT_MS", defaults.sqlite_busy_timeout_ms)
+            ),
+        )
+
+
+def _combinations(value: str) -> Tuple[Tuple[str, ...], ...]:
+    # "T1+T3,T4+T5" -> (("T1", "T3"), ("T4", "T5"))
+    return tuple(tuple(group.strip().split("+")) for group in value.split(",") if group.strip())
+
+
+def _names(value: str) -> Tuple[str, ...]:
+    # "bistro,cafe" -> ("bistro", "cafe")
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _pairs(value: str) -> Tuple[Tuple[str, str], ...]:
+    # "east=sqlite:///east.db,west=sqlite:///west.db" -> (("east", "sqlite:///east.db"), ...)
+    return tuple(tuple(item.strip().split("=", 1)) for item in value.split(",") if item.strip())
+
+
+STORAGE_MEMORY = "memory"
+STORAGE_SQLALCHEMY = "sqlalchemy"
+# То же, плюс AsyncSession (BOOKING_DB_ASYNC_URL — та же БД) для async-эндпоинтов
+STORAGE_SQLALCHEMY_ASYNC = "sqlalchemy-async"
+STORAGE_EVENTLOG = "eventlog"
+
+
+# Настройки приложения: где храним брони (BOOKING_STORAGE) + настройки БД
+@dataclass(frozen=True)
+class AppSettings:
+    storage: str = STORAGE_MEMORY
+    database: DatabaseSettings = field(default_factory=DatabaseSettings)
+    # Фоновый разбор outbox'а
+    outbox_interval: float = 0.5
+    outbox_batch_size: int = 100
+    # Сдвигаемые столы; None — группы по умолчанию из каталога
+    table_combinations: Optional[Tuple[Tuple[str, ...], ...]] = None
+    # Через сколько секунд каталог столов перечитывает план зала из БД (изменения других воркеров)
+    catalog_ttl: float = 30.0
+    # Предел времени пакетного распределения столов на одно окно броней, секунды
+    allocation_time_budget: float = 0.02
+    # Сколько раз выбирать стол заново, если при commit его занял другой воркер
+    booking_max_attempts: int = 3
+    # Поиск свободного времени (GET /availability): часы работы зала, шаг сетки стартов
+    opens_at: time = time(10, 0)
+    closes_at: time = time(23, 0)
+    availability_granularity_min: int = 15
+    # Кэш доступности: сколько дней держать и сколько секунд доверять без перечитывания
+    availability_cache_days: int = 64
+    availability_cache_ttl: float = 30.0
+    # LRU броней по id поверх БД (get): размер (0 — выключен) и срок доверия, секунды
+    reservation_cache_size: int = 10_000
+    reservation_cache_ttl: float = 5.0
+    # storage=eventlog: каталог журнала и снапшотов, снапшот — после стольких событий
+    event_log_dir: str = "bookings-eventlog"
+    event_log_snapshot_every: int = 100_000
+    # storage=sqlalchemy: дополнительные шарды (имя, URL); основная БД — шард "main"
+    shards: Tuple[Tuple[str, str], ...] = ()
+    # Закреплённые за шардами заведения (заведение, шард); остальные — по хешу
+    shard_map: Tuple[Tuple[str, str], ...] = ()
+    # Обслуживаемые заведения кроме заведения по умолчанию (и закреплённых в shard_map);
+    # на остальные restaurant_id — 404
+    venues: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "AppSettings":
+        storage = environ.get("BOOKING_STORAGE", STORAGE_MEMORY)
+        if storage not in (STORAGE_MEMORY, STORAGE_SQLALCHEMY, STORAGE_SQLALCHEMY_ASYNC,
+                           STORAGE_EVENTLOG):
+            raise ValueError(f"Unknown BOOKING_STORAGE: {storage!r}")
+        defaults = cls()
+        return cls(
+            storage=storage,
+            database=DatabaseSettings.from_env(environ),
+            outbox_interval=float(environ.get("BOOKING_OUTBOX_INTERVAL", defaults.outbox_interval)),
+            outbox_batch_size=int(
+                environ.get("BOOKING_OUTBOX_BATCH_SIZE", defaults.outbox_batch_size)),
+            table_combinations=(_combinations(environ["BOOKING_TABLE_COMBINATIONS"])
+                                if "BOOKING_TABLE_COMBINATIONS" in environ
+                                else defaults.table_combinations),
+            catalog_ttl=float(environ.get("BOOKING_CATALOG_TTL", defaults.catalog_ttl)),
+            allocation_time_budget=float(
+                environ.get("BOOKING_ALLOCATION_TIME_BUDGET", defaults.allocation_time_budget)
+            ),
+            booking_max_attempts=int(
+                environ.get("BOOKING_MAX_ATTEMPTS", defaults.booking_max_attempts)),
+            opens_at=time.fromisoformat(
+                environ.get("BOOKING_OPENS_AT", defaults.opens_at.isoformat())),
+            closes_at=time.fromisoformat(
+                environ.get("BOOKING_CLOSES_AT", defaults.closes_at.isoformat())),
+            availability_granularity_min=int(
+                environ.get("BOOKING_AVAILABILITY_GRANULARITY_MIN",
+                            defaults.availability_granularity_min)
+            ),
+            availability_cache_days=int(
+                environ.get("BOOKING_AVAILABILITY_CACHE_DAYS", defaults.availability_cache_days)
+            ),
+            availability_cache_ttl=float(
+                environ.get("BOOKING_AVAILABILITY_CACHE_TTL", defaults.availability_cache_ttl)
+            ),
+            reservation_cache_size=int(
+                environ.get("BOOKING_RESERVATION_CACHE_SIZE", defaults.reservation_cache_size)
+            ),
+            reservation_cache_ttl=float(
+                environ.get("BOOKING_RESERVATION_CACHE_TTL", defaults.reservation_cache_ttl)
+            ),
+            event_log_dir=environ.get("BOOKING_EVENT_LOG_DIR", defaults.event_log_dir),
+            event_log_snapshot_every=int(
+                environ.get("BOOKING_EVENT_LOG_SNAPSHOT_EVERY", defaults.event_log_snapshot_every)
+            ),
+            shards=_pairs(environ.get("BOOKING_SHARDS", "")),
+            shard_map=_pairs(environ.get("BOOKING_SHARD_MAP", "")),
+            venues=_names(environ.get("BOOKING_VENUES", "")),
+        )
@@ -0,0 +1,115 @@
+"""
+Шардирование по заведениям (restaurant_id).
+
+Брони, каталог столов и строки версий столов одного заведения лежат в одной БД-шарде;
+записи разных заведений в разных шардах не делят блокировку БД (у SQLite — один
+писатель на файл). Какой шард у заведения, решает ShardRouter:
+
+- HashShardRouter — rendezvous hashing: при добавлении шарда переезжает только
+  ~1/N заведений (а не почти все, как у hash % N);
+- DirectoryShardRouter — явная карта заведение -> шард (крупное заведение на своём
+  шарде, переезд без смены хеша), остальных отдаёт запасному роутеру.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import replace
+from typing import Callable, Dict, Mapping, Optional, Protocol, Sequence, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .database import create_db_engine
+from .db_models import Base
+from .settings import DatabaseSettings
+
+
+# Основная БД приложения (настройки database): в ней же лист ожидания и план зала
+MAIN_SHARD = "main"
+
+
+class ShardRouter(Protocol):
+    def shard_for(self, restaurant_id: str) -> str: ...
+
+
+class HashShardRouter:
+    """Шард с наибольшим весом hash(шард, заведение); hash стабилен между процессами."""
+
+    def __init__(self, shards: Sequence[str]) -> None:
+        if not shards:
+            raise ValueError("HashShardRouter needs at least one shard")
+        self.shards = tuple(shards)
+
+    def shard_for(self, restaurant_id: str) -> str:
+        return max(self.shards, key=lambda shard: _weight(shard, restaurant_id))
+
+
+def _weight(shard: str, restaurant_id: str) -> int:
+    digest = hashlib.blake2b(f"{shard}\0{restaurant_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class DirectoryShardRouter:
+    """Карта заведение -> шард; без fallback неизвестное заведение — LookupError."""
+
+    def __init__(self, directory: Mapping[str, str],
+                 fallback: Optional[ShardRouter] = None) -> None:
+        self.directory = dict(directory)
+        self.fallback = fallback
+
+    def shard_for(self, restaurant_id: str) -> str:
+        shard = self.directory.get(restaurant_id)
+        if shard is not None:
+            return shard
+        if self.fallback is None:
+            raise LookupError(f"Unknown restaurant {restaurant_id!r}")
+        return self.fallback.shard_for(restaurant_id)
+
+
+class ShardedDatabase:
+    """
+    Движки шардов по именам. Движок шарда создаётся при первом обращении к нему
+    (схема — create_all), дальше переиспользуется: пул соединений — свой у каждого шарда.
+
+    main — фабрика сессий основной БД, её движком управляет контейнер (init_engine).
+    """
+
+    def __init__(self, router: ShardRouter, urls: Mapping[str, str], settings: DatabaseSettings,
+                 main: Optional[Callable[[], Session]] = None) -> None:
+        self.router = router
+        self.settings = settings
+        self._urls = dict(urls)
+        self._factories: Dict[str, Callable[[], Session]] = {}
+        if main is not None:
+            self._factories[MAIN_SHARD] = main
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shards(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys([*self._factories, *self._urls]))
+
+    def session_factory(self, restaurant_id: str) -> Callable[[], Session]:
+        return self.shard(self.router.shard_for(restaurant_id))
+
+    def shard(self, name: str) -> Callable[[], Session]:
+        factory = self._factories.get(name)
+        if factory is not None:
+            return factory
+        with self._lock:
+            if name not in self._factories:
+                if name not in self._urls:
+                    raise LookupError(f"Unknown shard {name!r}")
+                engine = create_db_engine(replace(self.settings, url=self._urls[name]))
+                Base.metadata.create_all(engine)
+                self._engines[name] = engine
+                self._factories[name] = sessionmaker(bind=engine)
+            return self._factories[name]
+
+    def dispose(self) -> None:
+        with self._lock:
+            for name, engine in self._engines.items():
+                engine.dispose()
+                del self._factories[name]
+            self._engines.clear()
@@ -1,16 +1,38 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING, Optional, Sequence
+
 from sqlalchemy.orm import Session
 
+from .. import metrics
 from ..application.unit_of_work import UnitOfWork
-from ..infrastructure.repositories import InMemoryReservationRepository, SqlAlchemyReservationRepository
+from ..infrastructure.event_log import EventLogReservationRepository, EventLogStore
+from ..infrastructure.repositories import (
+    InMemoryReservationRepository,
+    InMemoryWaitlistRepository,
+    SqlAlchemyReservationRepository,
+    SqlAlchemyWaitlistRepository,
+    AsyncSqlAlchemyReservationRepository,
+)
+from ..infrastructure.reservation_cache import ReservationCache
+from ..infrastructure.sharding import ShardedDatabase
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class InMemoryUnitOfWork(UnitOfWork):
-    """UoW для тестов/демо без БД."""
+    """
+    UoW для тестов/демо без БД.
+
+    reservations, waitlist: общие хранилища (одни на приложение); по умолчанию — свои, пустые.
+    """
 
-    def __init__(self) -> None:
-        self.reservations = InMemoryReservationRepository()
+    def __init__(self, reservations: Optional[InMemoryReservationRepository] = None,
+                 waitlist: Optional[InMemoryWaitlistRepository] = None) -> None:
+        self.reservations = (reservations if reservations is not None
+                             else InMemoryReservationRepository())
+        self.waitlist = waitlist if waitlist is not None else InMemoryWaitlistRepository()
         self.committed = False
 
     def __enter__(self):
@@ -18,10 +40,11 @@ class InMemoryUnitOfWork(UnitOfWork):
 
     def __exit__(self, exc_type, exc, tb):
         if exc_type is not None:
-            self.session.rollback()
+            self.rollback()
         else:
-            self.session.commit()
+            self.commit()
 
+    @metrics.timed(metrics.UOW_COMMIT_SECONDS.labels("memory"))
     def commit(self) -> None:
         self.committed = True
 
@@ -29,23 +52,116 @@ class InMemoryUnitOfWork(UnitOfWork):
         self.committed = False
 
 
+class EventLogUnitOfWork(UnitOfWork):
+    """
+    UoW хранилища на журнале событий: изменения копятся в репозитории UoW, commit
+    применяет их к общему состоянию вместе с постановкой событий в журнал и
+    возвращается после fsync (групповой — вместе с параллельными commit'ами).
+    rollback просто отбрасывает накопленное.
+    """
+
+    def __init__(self, store: EventLogStore) -> None:
+        self.store = store
+        self.reservations = EventLogReservationRepository(store)
+        self.waitlist = store.waitlist
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.rollback()
+        else:
+            self.commit()
+
+    @metrics.timed(metrics.UOW_COMMIT_SECONDS.labels("eventlog"))
+    def commit(self) -> None:
+        try:
+            self.reservations.commit(self.store)
+        finally:
+            self.reservations.clear()
+
+    def rollback(self) -> None:
+        self.reservations.clear()
+
+
 # Заготовка под SQLAlchemy UoW (для лекции / дальнейшего расширения)
 class SqlAlchemyUnitOfWork:
-    def __init__(self, session: Session):  # ← Должен принимать session
+    """
+    cache — общий на процесс LRU броней (get); после commit изменённые брони из него сбрасываются.
+    restaurant_id — брони только этого заведения (см. SqlAlchemyReservationRepository).
+    combinations — группы сдвигаемых столов для проверки пересечений (как у каталога).
+    """
+
+    def __init__(self, session: Session,  # ← Должен принимать session
+                 cache: Optional[ReservationCache] = None,
+                 restaurant_id: Optional[str] = None,
+                 combinations: Optional[Sequence[Sequence[str]]] = None):
         self.session = session
-        self.reservations = SqlAlchemyReservationRepository(session)
+        self.reservations = SqlAlchemyReservationRepository(session, cache, restaurant_id,
+                                                            combinations)
+        self.waitlist = SqlAlchemyWaitlistRepository(session)
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type is not None:
-            self.session.rollback()
+            self.rollback()
         else:
             self.session.commit()
+            self.reservations.committed()
 
+    @metrics.timed(metrics.UOW_COMMIT_SECONDS.labels("sqlalchemy"))
     def commit(self):
         self.session.commit()
+        self.reservations.committed()
 
     def rollback(self):
-        self.session.rollback()
\ No newline at end of file
+        self.session.rollback()
+        self.reservations.rolled_back()
+
+
+class ShardedUnitOfWork(SqlAlchemyUnitOfWork):
+    """
+    UoW одного заведения: сессия открывается на шарде, который роутер ShardedDatabase
+    выбрал для restaurant_id. Транзакции разных шардов не пересекаются — UoW не бывает
+    на два заведения сразу.
+    """
+
+    def __init__(self, shards: ShardedDatabase, restaurant_id: str,
+                 cache: Optional[ReservationCache] = None,
+                 combinations: Optional[Sequence[Sequence[str]]] = None):
+        session = shards.session_factory(restaurant_id)()
+        super().__init__(session, cache, restaurant_id, combinations)
+        self.restaurant_id = restaurant_id
+
+
+class AsyncSqlAlchemyUnitOfWork:
+    """UoW поверх AsyncSession: поток не блокируется на время обращения к БД."""
+
+    def __init__(self, session: AsyncSession, cache: Optional[ReservationCache] = None,
+                 combinations: Optional[Sequence[Sequence[str]]] = None,
+                 restaurant_id: Optional[str] = None):
+        self.session = session
+        self.reservations = AsyncSqlAlchemyReservationRepository(
+            session, cache, restaurant_id=restaurant_id, combinations=combinations)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            await self.rollback()
+        else:
+            await self.session.commit()
+            self.reservations.committed()
+
+    @metrics.timed(metrics.UOW_COMMIT_SECONDS.labels("sqlalchemy_async"))
+    async def commit(self):
+        await self.session.commit()
+        self.reservations.committed()
+
+    async def rollback(self):
+        await self.session.rollback()
+        self.reservations.rolled_back()
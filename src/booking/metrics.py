@@ -0,0 +1,279 @@
+"""
+Метрики горячих путей: счётчики и гистограммы в памяти процесса + рендер
+в текстовый формат Prometheus (GET /metrics).
+
+Сквозной модуль без зависимостей: его используют application и infrastructure,
+домен о метриках не знает. Проба — два perf_counter и bisect по границам
+бакетов в счётчики своего потока, без локов; рендер происходит только при скрейпе.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+
+# Секунды: от 50 µs (in-memory) до 5 s (БД под нагрузкой)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class Counter:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """
+    Без общего лока на горячем пути: у каждого потока свой шард счётчиков
+    (threading.local), снимок суммирует шарды. Лок берётся только при создании
+    шарда (раз на поток) и при скрейпе.
+    """
+
+    __slots__ = ("buckets", "_local", "_shards", "_lock")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[list] = []
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        # le-семантика Prometheus: значение попадает в первый бакет с границей >= value
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def _new_shard(self) -> list:
+        # len(buckets) бакетов + +Inf + сумма последним элементом
+        shard = [0] * (len(self.buckets) + 1) + [0.0]
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """(кумулятивные счётчики по бакетам включая +Inf, сумма, количество)"""
+        with self._lock:
+            shards = [list(s) for s in self._shards]
+        totals = [sum(column) for column in zip(*shards)] or [0] * (len(self.buckets) + 2)
+        cumulative, running = [], 0
+        for c in totals[:-1]:
+            running += c
+            cumulative.append(running)
+        return cumulative, totals[-1], running
+
+    @property
+    def count(self) -> int:
+        return self.snapshot()[2]
+
+
+class _Family(ABC):
+    """Метрика с метками: дочерний Counter/Histogram на каждый набор значений меток."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Новый дочерний Counter/Histogram для очередного набора значений меток."""
+
+    def _label_str(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    @abstractmethod
+    def _render_child(self, values, child) -> List[str]:
+        """Строки текстового формата Prometheus для одного дочернего значения."""
+
+
+class CounterFamily(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> Counter:
+        return Counter()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child: Counter) -> List[str]:
+        return [f"{self.name}{self._label_str(values)} {_number(child.value)}"]
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self, values, child: Histogram) -> List[str]:
+        cumulative, total, count = child.snapshot()
+        bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+        lines = [f"{self.name}_bucket{self._label_str(values, _le(le))} {c}"
+                 for le, c in zip(bounds, cumulative)]
+        lines.append(f"{self.name}_sum{self._label_str(values)} {_number(total)}")
+        lines.append(f"{self.name}_count{self._label_str(values)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._families: Dict[str, _Family] = {}
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> CounterFamily:
+        return self._register(CounterFamily(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> HistogramFamily:
+        return self._register(HistogramFamily(name, documentation, labelnames, buckets))
+
+    def _register(self, family: _Family):
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} is already registered")
+        self._families[family.name] = family
+        return family
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._families):
+            lines.extend(self._families[name].render())
+        return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram) -> Callable:
+    """Декоратор: время вызова (sync или async) — в гистограмму, включая вызовы с исключением."""
+
+    def decorate(func):
+        perf_counter = time.perf_counter
+        observe = histogram.observe
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    observe(perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(perf_counter() - started)
+        return wrapper
+
+    return decorate
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _le(bound: str) -> str:
+    return 'le="' + bound + '"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ---------- метрики сервиса ----------
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    "booking_handler_seconds", "Use case latency, factory to commit.", ("handler",))
+FACTORY_SECONDS = REGISTRY.histogram(
+    "booking_factory_seconds", "ReservationFactory.create latency.")
+ALLOCATION_SECONDS = REGISTRY.histogram(
+    "booking_allocation_seconds",
+    "Table allocation latency (allocate + hold under the allocator lock).")
+ALLOCATION_FAILURES = REGISTRY.counter(
+    "booking_allocation_failures_total", "Requests rejected with 'No suitable table available'.")
+BOOKING_CONFLICTS = REGISTRY.counter(
+    "booking_table_conflicts_total",
+    "Commits that found the table taken by another worker (retried).")
+RESERVATIONS_CREATED = REGISTRY.counter(
+    "booking_reservations_created_total", "Reservations committed.")
+STATUS_TRANSITIONS = REGISTRY.counter(
+    "booking_status_transitions_total", "Reservations moved to a new status.", ("transition",))
+WAITLIST_PROMOTIONS = REGISTRY.counter(
+    "booking_waitlist_promotions_total", "Waitlisted guests who got a table.")
+UOW_COMMIT_SECONDS = REGISTRY.histogram(
+    "booking_uow_commit_seconds", "Unit of Work commit latency.", ("uow",))
+RESERVATION_CACHE = REGISTRY.counter(
+    "booking_reservation_lookups_total", "Reservation get() by where it was found.", ("source",))
+REPOSITORY_SECONDS = REGISTRY.histogram(
+    "booking_repository_seconds", "Repository call latency.", ("repository", "method"))
+
+
+def repository_timed(repository: str, method: str) -> Callable:
+    return timed(REPOSITORY_SECONDS.labels(repository, method))
@@ -1,5 +1,6 @@
 import pytest
-from httpx import AsyncClient
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
 
 # Импортируем app после настройки пути
 import sys
@@ -7,15 +8,24 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from src.booking.entrypoints.container import close_container
 from src.booking.entrypoints.fastapi_app import app
 
 
+@pytest.fixture(autouse=True)
+def fresh_container():
+    # Контейнер живёт на процесс; между тестами состояние (брони, занятость столов) не делим
+    close_container()
+    yield
+    close_container()
+
+
 @pytest.fixture
 def anyio_backend():
     return "asyncio"
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def client() -> AsyncClient:
-    async with AsyncClient(base_url="http://test") as ac:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
\ No newline at end of file
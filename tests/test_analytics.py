@@ -0,0 +1,79 @@
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.domain.factory import ReservationFactory
+from src.booking.domain.model import ReservationStatus, TableId
+from src.booking.infrastructure.analytics import occupancy_matrix
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.repositories import SqlAlchemyReservationRepository
+
+
+DAY = datetime(2030, 1, 1)
+TABLES = [("T1", 4), ("T2", 2), ("T3", 8)]
+
+
+def _reservation(hour, duration_min, party_size, table_id, status=ReservationStatus.CONFIRMED):
+    reservation = ReservationFactory.create(DAY + timedelta(hours=hour), duration_min, party_size)
+    reservation.table_id = TableId(table_id)
+    reservation.status = status
+    return reservation
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        SqlAlchemyReservationRepository(session).add_many([
+            _reservation(18, 120, 3, "T1"),
+            _reservation(20, 60, 2, "T1"),
+            _reservation(19, 60, 6, "T1+T3"),
+            _reservation(19, 60, 2, "T2", status=ReservationStatus.CANCELLED),
+        ])
+        session.commit()
+        yield session
+
+
+def test_matrix_counts_seats_turnover_and_waste(session):
+    matrix = occupancy_matrix(session, TABLES, DAY, DAY + timedelta(days=1),
+                              bucket=timedelta(hours=1))
+
+    t1, t2, t3 = 0, 1, 2
+    assert matrix.seats.shape == (3, 24)
+    # 19:00 — своя бронь (3) + доля сдвинутых T1+T3: 6 * 4/12 = 2
+    assert matrix.seats[t1, 18] == 3
+    assert matrix.seats[t1, 19] == pytest.approx(5)
+    assert matrix.seats[t3, 19] == pytest.approx(4)
+    assert matrix.seats[t1, 20] == 2
+    assert not matrix.occupied[t2].any()  # отменённые не считаются
+
+    assert matrix.utilization()[t1] == pytest.approx(3 / 24)
+    assert matrix.turnover()[t1] == pytest.approx(3)
+    assert matrix.seat_waste()[t1, 18] == 1
+    assert matrix.seat_waste()[t3, 19] == pytest.approx(4)
+
+
+def test_heatmap_peak_and_exports(session):
+    matrix = occupancy_matrix(session, TABLES, DAY, DAY + timedelta(days=2),
+                              bucket=timedelta(hours=1))
+
+    heatmap = matrix.heatmap()
+    assert heatmap.shape == (2, 24)
+    assert matrix.peak_bucket_of_day() == timedelta(hours=19)
+    assert matrix.seat_occupancy(no_show_rate=0.5)[19] == pytest.approx(heatmap[0, 19] / 2)
+
+    summary = io.StringIO()
+    matrix.write_summary_csv(summary)
+    assert summary.getvalue().splitlines()[0].startswith("table_id,capacity,utilization")
+
+    arrays = io.BytesIO()
+    matrix.save_npz(arrays)
+    arrays.seek(0)
+    assert np.load(arrays)["seats"].shape == (3, 48)
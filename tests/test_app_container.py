@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from src.booking.domain.model import TableId, TimeSlot
+from src.booking.entrypoints.container import close_container, get_container, init_container
+from src.booking.infrastructure.settings import AppSettings, DatabaseSettings
+
+
+SLOT_START = datetime(2030, 1, 1, 19, 0)
+DTO = {"slot_start": SLOT_START.isoformat(), "duration_min": 90, "party_size": 6}
+
+
+@pytest.mark.asyncio
+async def test_reservations_survive_the_request_and_block_the_table(client):
+    first = (await client.post("/reservations", json=DTO)).json()["reservation_id"]
+    second = (await client.post("/reservations", json=DTO)).json()["reservation_id"]
+
+    container = get_container()
+    assert container.reservations.get(first).table_id == TableId("T4")
+    assert container.reservations.get(second).table_id == TableId("T3")
+
+
+def test_container_is_built_once_per_process():
+    assert get_container() is get_container()
+    assert get_container().uow().reservations is get_container().uow().reservations
+
+
+@pytest.mark.asyncio
+async def test_sqlalchemy_storage_is_durable_across_restarts(client, tmp_path):
+    settings = AppSettings(storage="sqlalchemy",
+                           database=DatabaseSettings(url=f"sqlite:///{tmp_path / 'bookings.db'}"))
+    init_container(settings)
+    response = await client.post("/reservations", json=DTO)
+    assert response.status_code == 200
+
+    # "Рестарт": новый контейнер поднимает занятость столов из БД
+    close_container()
+    container = init_container(settings)
+    uow = container.uow()
+    saved = uow.reservations.get(response.json()["reservation_id"])
+    uow.session.close()
+
+    assert saved.table_id == TableId("T4")
+    slot = TimeSlot(SLOT_START, SLOT_START.replace(hour=20))
+    assert not container.allocator.occupancy.is_free("T4", slot)
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import fastapi.dependencies.utils
+import fastapi.routing
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from src.booking.application.commands import CreateReservation
+from src.booking.application.handlers import AsyncCreateReservationHandler
+from src.booking.domain.model import TableId, TimeSlot
+from src.booking.domain.services import TableAllocationService
+from src.booking.entrypoints import fastapi_app
+from src.booking.entrypoints.container import init_container
+from src.booking.entrypoints.fastapi_app import app, get_uow
+from src.booking.infrastructure.database import create_async_session_factory
+from src.booking.infrastructure.db_models import Base, ReservationModel
+from src.booking.infrastructure.settings import AppSettings, DatabaseSettings
+from src.booking.infrastructure.uow import AsyncSqlAlchemyUnitOfWork
+
+
+TABLES = [{"id": "T1", "capacity": 4}]
+SLOT_START = datetime(2030, 1, 1, 19, 0)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine, factory = create_async_session_factory(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_handler_persists_reservation(session_factory):
+    cmd = CreateReservation(slot_start=SLOT_START, duration_min=90, party_size=2)
+
+    async with session_factory() as session:
+        handler = AsyncCreateReservationHandler(AsyncSqlAlchemyUnitOfWork(session),
+                                                TableAllocationService())
+        reservation_id = await handler(cmd, available_tables=TABLES)
+
+    async with session_factory() as session:
+        repo = AsyncSqlAlchemyUnitOfWork(session).reservations
+        saved = await repo.get(reservation_id)
+        overlapping = await repo.list_overlapping("T1", SLOT_START, SLOT_START.replace(hour=20))
+        by_slot = await repo.list_for_slot(
+            TimeSlot(start=SLOT_START, end=SLOT_START.replace(hour=20, minute=30)))
+        streamed = [r async for r in repo.iter_reservations(
+            SLOT_START, SLOT_START.replace(hour=23), batch_size=1)]
+
+    assert saved.table_id == TableId("T1")
+    assert saved.party_size.value == 2
+    assert [r.reservation_id for r in overlapping] == [reservation_id]
+    assert [r.reservation_id for r in by_slot] == [reservation_id]
+    assert [(r.reservation_id, r.party_size.value) for r in streamed] == [(reservation_id, 2)]
+
+
+@pytest.mark.asyncio
+async def test_endpoint_awaits_async_uow(session_factory, client):
+    async def override_get_uow():
+        async with session_factory() as session:
+            yield AsyncSqlAlchemyUnitOfWork(session)
+
+    app.dependency_overrides[get_uow] = override_get_uow
+    try:
+        response = await client.post("/reservations", json={
+            "slot_start": SLOT_START.isoformat(), "duration_min": 60, "party_size": 2,
+        })
+    finally:
+        app.dependency_overrides.pop(get_uow)
+
+    assert response.status_code == 200
+    async with session_factory() as session:
+        saved = await session.scalar(select(ReservationModel))
+    assert saved.reservation_id == response.json()["reservation_id"]
+
+
+@pytest.mark.asyncio
+async def test_async_storage_serves_requests_without_threadpool(client, tmp_path, monkeypatch):
+    path = tmp_path / "bookings.db"
+    container = init_container(AppSettings(storage="sqlalchemy-async", database=DatabaseSettings(
+        url=f"sqlite:///{path}", async_url=f"sqlite+aiosqlite:///{path}")))
+
+    def no_threadpool(*args, **kwargs):
+        raise AssertionError("threadpool is not expected with storage=sqlalchemy-async")
+
+    for module in (fastapi_app, fastapi.dependencies.utils, fastapi.routing):
+        monkeypatch.setattr(module, "run_in_threadpool", no_threadpool)
+    try:
+        created = await client.post("/reservations", json={
+            "slot_start": SLOT_START.isoformat(), "duration_min": 60, "party_size": 2})
+        listed = await client.get("/reservations", params={"day": SLOT_START.date().isoformat()})
+        available = await client.get("/availability", params={
+            "date": SLOT_START.date().isoformat(), "party_size": 2, "duration_min": 60})
+    finally:
+        await container.close_async()
+
+    assert (created.status_code, listed.status_code, available.status_code) == (200, 200, 200)
+    listed_ids = [i["reservation_id"] for i in listed.json()["items"]]
+    assert listed_ids == [created.json()["reservation_id"]]
@@ -0,0 +1,117 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.booking.application.commands import CreateReservation
+from src.booking.application.handlers import CreateReservationHandler, GetAvailabilityHandler
+from src.booking.application.queries import GetAvailability
+from src.booking.domain.availability import DaySchedule
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.factory import ReservationFactory
+from src.booking.domain.model import TableId
+from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.availability_cache import InMemoryAvailabilityCache
+from src.booking.infrastructure.repositories import InMemoryReservationRepository
+from src.booking.infrastructure.uow import InMemoryUnitOfWork
+
+
+DAY = date(2030, 1, 1)
+OPENS, CLOSES = time(10, 0), time(15, 0)
+
+
+def _booked(hour, minute, duration_min, table_id):
+    reservation = ReservationFactory.create(datetime(2030, 1, 1, hour, minute), duration_min, 2)
+    reservation.table_id = TableId(table_id)
+    return reservation
+
+
+def _at(*hhmm):
+    return [datetime(2030, 1, 1, h, m) for h, m in hhmm]
+
+
+def test_sweep_returns_grid_starts_between_bookings():
+    schedule = DaySchedule.from_reservations(DAY, OPENS, CLOSES, [_booked(12, 0, 90, "T1")])
+
+    starts = schedule.bookable_starts(TableId("T1"), timedelta(minutes=60), timedelta(minutes=30))
+
+    assert starts == _at((10, 0), (10, 30), (11, 0), (13, 30), (14, 0))
+
+
+def test_joined_tables_are_busy_when_any_member_is():
+    schedule = DaySchedule.from_reservations(DAY, OPENS, CLOSES, [
+        _booked(10, 0, 120, "T1"),
+        _booked(13, 0, 60, "T3"),
+    ])
+
+    starts = schedule.bookable_starts(TableId("T1+T3"), timedelta(minutes=60),
+                                      timedelta(minutes=60))
+
+    assert starts == _at((12, 0), (14, 0))
+
+
+class CountingRepository(InMemoryReservationRepository):
+    def __init__(self):
+        super().__init__()
+        self.scans = 0
+
+    def list_between(self, start, end):
+        self.scans += 1
+        return super().list_between(start, end)
+
+
+def test_handler_caches_day_and_applies_commits_incrementally():
+    repo = CountingRepository()
+    cache = InMemoryAvailabilityCache()
+    snapshot = CatalogSnapshot([("T1", 4)])
+    query = GetAvailability(day=DAY, party_size=2, duration_min=60, granularity_min=60)
+    handler = GetAvailabilityHandler(InMemoryUnitOfWork(repo), cache, OPENS, CLOSES)
+
+    first = handler(query, snapshot)
+    assert first[0].starts == tuple(_at((10, 0), (11, 0), (12, 0), (13, 0), (14, 0)))
+    assert handler(query, snapshot) is first
+
+    create = CreateReservationHandler(InMemoryUnitOfWork(repo), TableAllocationService(),
+                                      on_commit=cache.reservations_committed)
+    create(CreateReservation(slot_start=datetime(2030, 1, 1, 12, 0), duration_min=60,
+                             party_size=2), snapshot)
+
+    assert handler(query, snapshot)[0].starts == tuple(_at((10, 0), (11, 0), (13, 0), (14, 0)))
+    assert repo.scans == 1
+
+    # Новая версия каталога — новый ключ, день перечитывается
+    handler(query, CatalogSnapshot([("T1", 4)], version=2))
+    assert repo.scans == 2
+
+
+def test_cache_does_not_store_a_day_that_changed_while_loading():
+    cache = InMemoryAvailabilityCache()
+    token = cache.begin_load(DAY)
+    cache.reservations_committed([_booked(12, 0, 60, "T1")])
+
+    cache.put_schedule(DaySchedule(DAY, OPENS, CLOSES), version=1, token=token)
+
+    assert cache.get_schedule(DAY, 1) is None
+
+
+@pytest.mark.asyncio
+async def test_availability_endpoint_reflects_new_reservations(client):
+    params = {"date": "2030-01-01", "party_size": 8, "duration_min": 60, "granularity_min": 60}
+
+    before = (await client.get("/availability", params=params)).json()
+    t3 = next(t for t in before["tables"] if t["table_id"] == "T3")
+    assert "2030-01-01T19:00:00" in t3["starts"]
+
+    await client.post("/reservations", json={"slot_start": "2030-01-01T19:00:00",
+                                             "duration_min": 60, "party_size": 8})
+
+    after = (await client.get("/availability", params=params)).json()
+    t3 = next(t for t in after["tables"] if t["table_id"] == "T3")
+    assert "2030-01-01T19:00:00" not in t3["starts"]
+    assert "2030-01-01T20:00:00" in t3["starts"]
+
+
+@pytest.mark.asyncio
+async def test_availability_endpoint_validates_query(client):
+    response = await client.get("/availability", params={"date": "2030-01-01", "party_size": 0,
+                                                         "duration_min": 60})
+    assert response.status_code == 422
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.booking.domain.allocation import BatchAllocationSolver
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.factory import ReservationFactory
+from src.booking.domain.model import ReservationAggregate, TableId, TimeSlot
+from src.booking.domain.occupancy import OccupancyIndex
+from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.available_tables import InMemoryTableSource, TableCatalog
+
+
+START = datetime(2030, 1, 1, 19, 0)
+
+
+def _aggregate(party_size, start=START, duration_min=90):
+    return ReservationAggregate.new(ReservationFactory.create(start, duration_min, party_size))
+
+
+def test_party_larger_than_any_table_gets_joined_tables():
+    allocator = TableAllocationService()
+    snapshot = TableCatalog(InMemoryTableSource()).snapshot()
+
+    assert allocator.hold(_aggregate(10), snapshot) == TableId("T4+T5")
+    assert allocator.hold(_aggregate(12), snapshot) == TableId("T1+T3")
+
+    # Сдвинутые столы заняты все: на этот слот их больше не выдают
+    slot = TimeSlot(START, START + timedelta(minutes=30))
+    assert allocator.occupancy.is_free(TableId("T5"), slot) is False
+    with pytest.raises(ValueError, match="No suitable table available"):
+        allocator.hold(_aggregate(4), snapshot)
+
+
+def test_batch_solver_beats_greedy_order():
+    snapshot = CatalogSnapshot([("T1", 2), ("T2", 2), ("T3", 3)], combinations=[("T1", "T2")])
+
+    greedy = TableAllocationService()
+    greedy.hold(_aggregate(2), snapshot)  # самый маленький стол — T1, и T1+T2 уже не сдвинуть
+    slot = TimeSlot(START, START + timedelta(minutes=90))
+    assert greedy.occupancy.is_free(TableId("T1+T2"), slot) is False
+
+    batch = [_aggregate(2), _aggregate(4)]
+    tables = TableAllocationService().hold_batch(batch, snapshot)
+
+    assert tables == [TableId("T3"), TableId("T1+T2")]
+    assert [a.root.table_id for a in batch] == tables
+
+
+def test_solver_minimises_wasted_seats_after_rejections():
+    snapshot = CatalogSnapshot([("A", 4), ("B", 6), ("C", 2)])
+    reservations = [_aggregate(p).root for p in (2, 4, 5, 6)]
+
+    plan = BatchAllocationSolver().solve(reservations, snapshot, OccupancyIndex())
+
+    assert len(plan.rejected) == 1
+    assert plan.wasted_seats == 0
+    assert plan.optimal is True
+
+
+def test_solver_respects_time_budget_and_keeps_greedy_plan():
+    tables = [(f"T{i}", 2 + i % 5) for i in range(30)]
+    snapshot = CatalogSnapshot(tables,
+                               combinations=[(f"T{i}", f"T{i + 1}") for i in range(0, 30, 2)])
+    reservations = [_aggregate(1 + i % 9, START + timedelta(minutes=15 * (i % 8))).root
+                    for i in range(80)]
+
+    plan = BatchAllocationSolver(time_budget=0.0).solve(reservations, snapshot, OccupancyIndex())
+
+    assert plan.optimal is False
+    assert len(plan.assignments) + len(plan.rejected) == 80
+    # План выполним: ни один стол не занят дважды
+    placed = []
+    for reservation in reservations:
+        reservation.table_id = plan.assignments.get(reservation.reservation_id)
+        placed.append(reservation)
+    OccupancyIndex.from_reservations(placed)
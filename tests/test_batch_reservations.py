@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import CreateReservation, CreateReservationsBatch
+from src.booking.application.handlers import CreateReservationsBatchHandler
+from src.booking.domain.model import TimeSlot
+from src.booking.domain.services import TableAllocationService
+from src.booking.entrypoints.fastapi_app import app, get_sync_uow
+from src.booking.infrastructure.db_models import Base, ReservationModel
+from src.booking.infrastructure.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+
+
+TABLES = [
+    {"id": "T1", "capacity": 4},
+    {"id": "T2", "capacity": 2},
+]
+SLOT_START = datetime(2030, 1, 1, 19, 0)
+
+
+def _batch(*party_sizes):
+    return CreateReservationsBatch(items=tuple(
+        CreateReservation(slot_start=SLOT_START, duration_min=90, party_size=p) for p in party_sizes
+    ))
+
+
+def test_batch_allocates_against_one_occupancy_view():
+    uow = InMemoryUnitOfWork()
+    handler = CreateReservationsBatchHandler(uow, TableAllocationService())
+
+    results = handler(_batch(2, 2, 2), available_tables=TABLES)
+
+    assert [r.table_id for r in results] == ["T2", "T1", None]
+    assert results[2].error == "No suitable table available"
+    assert uow.committed is True
+    assert uow.reservations.get(results[0].reservation_id) is not None
+
+
+def test_batch_reports_invalid_items_without_failing_the_batch():
+    uow = InMemoryUnitOfWork()
+    handler = CreateReservationsBatchHandler(uow, TableAllocationService())
+
+    results = handler(_batch(0, 3), available_tables=TABLES)
+
+    assert results[0].reservation_id is None
+    assert "PartySize" in results[0].error
+    assert results[1].table_id == "T1"
+
+
+def test_batch_is_persisted_in_one_transaction():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    handler = CreateReservationsBatchHandler(SqlAlchemyUnitOfWork(session),
+                                             TableAllocationService())
+
+    results = handler(_batch(1, 4), available_tables=TABLES)
+
+    assert session.scalar(select(func.count()).select_from(ReservationModel)) == 2
+    saved = session.get(ReservationModel, results[1].reservation_id)
+    assert saved.table_id == "T1"
+    assert saved.party_size == 4
+    session.close()
+
+
+def test_failed_commit_releases_tables():
+    class FailingUoW(InMemoryUnitOfWork):
+        def commit(self) -> None:
+            raise RuntimeError("db is down")
+
+    allocator = TableAllocationService()
+    uow = FailingUoW()
+    handler = CreateReservationsBatchHandler(uow, allocator)
+
+    with pytest.raises(RuntimeError):
+        handler(_batch(2, 2), available_tables=TABLES)
+
+    assert len(allocator.occupancy) == 0
+    # claim in-memory хранилища пишет брони сразу: откат должен их снять
+    slot = TimeSlot(SLOT_START, SLOT_START + timedelta(minutes=90))
+    assert uow.reservations.list_for_slot(slot) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_returns_per_item_results(client):
+    app.dependency_overrides[get_sync_uow] = lambda: InMemoryUnitOfWork()
+    try:
+        response = await client.post("/reservations:batch", json={"items": [
+            {"slot_start": SLOT_START.isoformat(), "duration_min": 60, "party_size": 2},
+            {"slot_start": SLOT_START.isoformat(), "duration_min": 60, "party_size": 50},
+        ]})
+    finally:
+        app.dependency_overrides.pop(get_sync_uow)
+
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first["reservation_id"] and first["error"] is None
+    assert second == {"reservation_id": None, "table_id": None,
+                      "error": "No suitable table available"}
@@ -0,0 +1,140 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import CreateReservation, CreateReservationsBatch
+from src.booking.application.handlers import (
+    CreateReservationHandler,
+    CreateReservationsBatchHandler,
+)
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.model import TableId
+from src.booking.domain.occupancy import part_keys
+from src.booking.domain.repository import TableConflict
+from src.booking.domain.services import NO_TABLE, TableAllocationService
+from src.booking.infrastructure.database import create_db_engine
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.repositories import (
+    InMemoryReservationRepository,
+    SqlAlchemyReservationRepository,
+)
+from src.booking.infrastructure.settings import DatabaseSettings
+from src.booking.infrastructure.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+
+
+DAY = datetime(2030, 1, 1, 12, 0)
+COMBINATIONS = [("T1", "T2"), ("T5", "T6"), ("T9", "T10")]
+SNAPSHOT = CatalogSnapshot([(f"T{i}", 2 + i % 4) for i in range(1, 13)], combinations=COMBINATIONS)
+
+
+def _commands(n, seed=7):
+    rng = random.Random(seed)
+    return [CreateReservation(slot_start=DAY + timedelta(minutes=15 * rng.randrange(40)),
+                              duration_min=rng.choice((60, 90, 120)), party_size=rng.randint(1, 8))
+            for _ in range(n)]
+
+
+def _assert_no_double_booking(reservations):
+    by_table = {}
+    for r in reservations:
+        for key in part_keys(r.table_id):
+            by_table.setdefault(key, []).append((r.slot.start, r.slot.end))
+    for key, intervals in by_table.items():
+        intervals.sort()
+        for (_, prev_end), (start, _) in zip(intervals, intervals[1:]):
+            assert start >= prev_end, f"{key} is double-booked at {start}"
+
+
+def _run(create, commands, threads):
+    booked, rejected = [], 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(create, i, cmd) for i, cmd in enumerate(commands)]
+        for future in futures:
+            try:
+                booked.append(future.result())
+            except TableConflict:
+                rejected += 1
+            except ValueError as e:
+                assert str(e) == NO_TABLE
+                rejected += 1
+    return booked, rejected, len(commands) / (time.perf_counter() - started)
+
+
+def test_parallel_workers_never_double_book_in_memory(record_property):
+    # Четыре "воркера": у каждого свой аллокатор (свой индекс занятости), хранилище общее
+    repository = InMemoryReservationRepository()
+    allocators = [TableAllocationService() for _ in range(4)]
+
+    def create(i, cmd):
+        handler = CreateReservationHandler(InMemoryUnitOfWork(repository), allocators[i % 4])
+        return handler(cmd, SNAPSHOT)
+
+    booked, rejected, throughput = _run(create, _commands(3000), threads=16)
+    record_property("creates_per_second", round(throughput))
+
+    assert booked and len(booked) + rejected == 3000
+    saved = repository.list_between(DAY - timedelta(days=1), DAY + timedelta(days=1))
+    assert sorted(r.reservation_id for r in saved) == sorted(booked)
+    _assert_no_double_booking(saved)
+
+
+def test_parallel_workers_never_double_book_in_sqlite(tmp_path, record_property):
+    engine = create_db_engine(DatabaseSettings(url=f"sqlite:///{tmp_path / 'bookings.db'}",
+                                               sqlite_busy_timeout_ms=30000))
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    allocators = [TableAllocationService() for _ in range(4)]
+
+    def create(i, cmd):
+        with session_factory() as session:
+            # Группы столов у репозитория те же, что у каталога (как в Container)
+            uow = SqlAlchemyUnitOfWork(session, combinations=COMBINATIONS)
+            return CreateReservationHandler(uow, allocators[i % 4],
+                                            max_attempts=5)(cmd, SNAPSHOT)
+
+    booked, rejected, throughput = _run(create, _commands(400), threads=8)
+    record_property("creates_per_second", round(throughput))
+
+    with session_factory() as session:
+        saved = SqlAlchemyReservationRepository(session).list_between(DAY - timedelta(days=1),
+                                                                      DAY + timedelta(days=1))
+    engine.dispose()
+
+    assert booked and len(booked) + rejected == 400
+    assert sorted(r.reservation_id for r in saved) == sorted(booked)
+    _assert_no_double_booking(saved)
+
+
+def test_conflict_is_retried_on_another_table():
+    repository = InMemoryReservationRepository()
+    first, second = TableAllocationService(), TableAllocationService()
+    snapshot = CatalogSnapshot([("T1", 4), ("T2", 4)])
+    cmd = CreateReservation(slot_start=DAY, duration_min=90, party_size=2)
+
+    CreateReservationHandler(InMemoryUnitOfWork(repository), first)(cmd, snapshot)
+    # Второй воркер не знает о брони первого и сначала выбирает тот же T1
+    reservation_id = CreateReservationHandler(InMemoryUnitOfWork(repository), second)(cmd, snapshot)
+
+    assert repository.get(reservation_id).table_id == TableId("T2")
+    with pytest.raises(TableConflict):
+        CreateReservationHandler(InMemoryUnitOfWork(repository), TableAllocationService(),
+                                 max_attempts=1)(cmd, snapshot)
+
+
+def test_batch_is_reallocated_after_conflict():
+    repository = InMemoryReservationRepository()
+    snapshot = CatalogSnapshot([("T1", 4), ("T2", 4), ("T3", 4)])
+    cmd = CreateReservation(slot_start=DAY, duration_min=90, party_size=2)
+    CreateReservationHandler(InMemoryUnitOfWork(repository), TableAllocationService())(
+        cmd, snapshot)
+
+    batch = CreateReservationsBatchHandler(InMemoryUnitOfWork(repository), TableAllocationService())
+    results = batch(CreateReservationsBatch(items=(cmd, cmd, cmd)), snapshot)
+
+    assert sorted(r.table_id or r.error for r in results) == [NO_TABLE, "T2", "T3"]
+    _assert_no_double_booking(repository.list_between(DAY, DAY + timedelta(hours=1)))
@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta
 
+import pytest
+
 from src.booking.application.commands import CreateReservation
 from src.booking.application.handlers import CreateReservationHandler
 from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.repositories import InMemoryReservationRepository
 from src.booking.infrastructure.uow import InMemoryUnitOfWork
 
 
@@ -46,3 +49,21 @@ def test_timeslot_invariant_enforced():
         assert False, "Expected ValueError"
     except ValueError:
         assert True
+
+
+def test_failure_after_claim_leaves_no_booking_behind():
+    class FailingEvents(InMemoryReservationRepository):
+        def add_events(self, events) -> None:
+            raise RuntimeError("outbox is down")
+
+    uow = InMemoryUnitOfWork(FailingEvents())
+    allocator = TableAllocationService()
+    start = datetime(2030, 1, 1, 19, 0, 0)
+    cmd = CreateReservation(slot_start=start, duration_min=90, party_size=2)
+
+    with pytest.raises(RuntimeError):
+        CreateReservationHandler(uow, allocator)(
+            cmd, available_tables=[{"id": "T1", "capacity": 4}])
+
+    assert uow.reservations.list_between(start, start + timedelta(minutes=90)) == []
+    assert len(allocator.occupancy) == 0
@@ -0,0 +1,173 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import RebuildDailySchedule
+from src.booking.application.handlers import RebuildDailyScheduleHandler
+from src.booking.domain.events import ReservationCancelled, TableAssigned
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from src.booking.entrypoints.container import get_container
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.outbox import deserialize_event, serialize_event
+from src.booking.infrastructure.repositories import InMemoryReservationRepository
+from src.booking.infrastructure.schedule import (
+    DailyScheduleProjection,
+    InMemoryDailySchedule,
+    SqlAlchemyDailySchedule,
+)
+from src.booking.infrastructure.uow import InMemoryUnitOfWork
+
+
+DAY = date(2030, 1, 1)
+EVENING = datetime(2030, 1, 1, 19, 0)
+
+
+def _assigned(rid, table, hour, party=2):
+    start = EVENING.replace(hour=hour)
+    return TableAssigned(rid, table, start, start, start + timedelta(minutes=90), party)
+
+
+@pytest.fixture
+def sql_schedule():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield SqlAlchemyDailySchedule(sessionmaker(bind=engine))
+    engine.dispose()
+
+
+def _slots(read_model, day=DAY):
+    return {t.table_id: [s.reservation_id for s in t.slots] for t in read_model.get_day(day)}
+
+
+@pytest.mark.parametrize("store", ["memory", "sqlalchemy"])
+def test_projection_is_idempotent_and_splits_combined_tables(store, sql_schedule):
+    read_model = InMemoryDailySchedule() if store == "memory" else sql_schedule
+    projection = DailyScheduleProjection(read_model)
+
+    for event in (_assigned("r2", "T1", 21), _assigned("r1", "T1", 18),
+                  _assigned("r3", "T1+T3", 15, party=7), _assigned("r1", "T1", 18)):
+        projection.table_assigned(event)
+
+    assert _slots(read_model) == {"T1": ["r3", "r1", "r2"], "T3": ["r3"]}
+    assert read_model.get_day(DAY, "T3")[0].slots[0].party_size == 7
+
+    cancel = ReservationCancelled("r3", EVENING, "T1+T3", EVENING.replace(hour=15))
+    projection.reservation_cancelled(cancel)
+    projection.reservation_cancelled(cancel)
+
+    assert _slots(read_model) == {"T1": ["r1", "r2"]}
+    assert read_model.get_day(DAY + timedelta(days=1)) == []
+
+
+@pytest.mark.parametrize("store", ["memory", "sqlalchemy"])
+def test_assignment_retried_after_cancel_stays_off_the_plan(store, sql_schedule):
+    read_model = InMemoryDailySchedule() if store == "memory" else sql_schedule
+    projection = DailyScheduleProjection(read_model)
+    projection.table_assigned(_assigned("r1", "T1", 18))
+
+    # TableAssigned r2 упало и доставляется повторно уже после отмены
+    projection.reservation_cancelled(
+        ReservationCancelled("r2", EVENING, "T1+T3", EVENING.replace(hour=20)))
+    projection.table_assigned(_assigned("r2", "T1+T3", 20))
+    assert _slots(read_model) == {"T1": ["r1"]}
+
+    read_model.rebuild(DAY, DAY + timedelta(days=1), [])
+    projection.table_assigned(_assigned("r2", "T1+T3", 20))
+    assert _slots(read_model) == {}
+
+
+@pytest.mark.parametrize("store", ["memory", "sqlalchemy"])
+def test_rebuild_matches_projection_and_keeps_other_days(store, sql_schedule):
+    read_model = InMemoryDailySchedule() if store == "memory" else sql_schedule
+    repository = InMemoryReservationRepository()
+    reservations = []
+    for i in range(40):
+        start = EVENING + timedelta(days=i % 4, minutes=15 * i)
+        reservation = Reservation(f"r{i:02d}", TimeSlot(start, start + timedelta(minutes=60)),
+                                  PartySize.of(2),
+                                  TableId.of("T1+T2" if i == 5 else f"T{1 + i % 6}"))
+        if i % 7 == 0:
+            reservation.status = ReservationStatus.CANCELLED
+        reservations.append(reservation)
+    repository.add_many(reservations)
+    projection = DailyScheduleProjection(InMemoryDailySchedule())
+    for r in reservations:
+        if r.status != ReservationStatus.CANCELLED:
+            projection.table_assigned(TableAssigned(r.reservation_id, r.table_id.value, EVENING,
+                                                    r.slot.start, r.slot.end, r.party_size.value))
+    # день вне диапазона пересборки
+    outside = projection.read_model.get_day(DAY)[0].slots[0]
+    read_model.place(DAY + timedelta(days=10), ["T9"], outside)
+
+    documents = RebuildDailyScheduleHandler(InMemoryUnitOfWork(repository), read_model)(
+        RebuildDailySchedule(start_day=DAY, end_day=DAY + timedelta(days=4)))
+
+    for offset in range(4):
+        day = DAY + timedelta(days=offset)
+        assert read_model.get_day(day) == projection.read_model.get_day(day)
+    assert documents == sum(len(read_model.get_day(DAY + timedelta(days=d))) for d in range(4))
+    assert read_model.get_day(DAY + timedelta(days=10))[0].slots == (outside,)
+
+
+def test_source_builds_only_the_days_that_are_read():
+    repository = InMemoryReservationRepository()
+    kept, cancelled, other_day = (
+        Reservation(rid, TimeSlot(start, start + timedelta(minutes=90)), PartySize.of(2),
+                    TableId.of("T1"))
+        for rid, start in (("r1", EVENING), ("r2", EVENING.replace(hour=21)),
+                           ("r3", EVENING + timedelta(days=1))))
+    cancelled.status = ReservationStatus.CANCELLED
+    repository.add_many([kept, cancelled, other_day])
+    reads = []
+
+    def source(start, end):
+        reads.append(start.date())
+        return repository.iter_reservations(start, end)
+
+    read_model = InMemoryDailySchedule(source)
+    assert reads == []
+    # Запоздавшее TableAssigned отменённой до сборки брони на план не попадает
+    DailyScheduleProjection(read_model).table_assigned(_assigned("r2", "T1", 21))
+
+    assert _slots(read_model) == {"T1": ["r1"]}
+    assert reads == [DAY]
+
+
+def test_tombstones_of_past_days_are_dropped():
+    read_model = InMemoryDailySchedule()
+    today = date.today()
+    for offset in (-5, -1, 3):
+        read_model.remove(today + timedelta(days=offset), ["T1"], f"r{offset}")
+
+    assert sorted(read_model._cancelled) == [today - timedelta(days=1), today + timedelta(days=3)]
+
+
+def test_enriched_events_survive_outbox_roundtrip():
+    event = _assigned("r1", "T1", 19)
+    row = serialize_event(event)
+
+    assert deserialize_event(row["event_type"], row["payload"]) == event
+    legacy = deserialize_event("ReservationCancelled",
+                               '{"reservation_id":"r1","occurred_at":"2030-01-01T19:00:00"}')
+    assert legacy.table_id is None and legacy.slot_start is None
+
+
+@pytest.mark.asyncio
+async def test_schedule_endpoint_follows_bookings_through_outbox(client):
+    body = {"slot_start": EVENING.isoformat(), "duration_min": 90, "party_size": 2}
+    first = (await client.post("/reservations", json=body)).json()["reservation_id"]
+    second = (await client.post("/reservations", json=body)).json()["reservation_id"]
+    get_container().outbox_dispatcher.drain()
+
+    schedule = (await client.get("/schedule", params={"day": DAY.isoformat()})).json()
+    booked = {s["reservation_id"] for t in schedule["tables"] for s in t["slots"]}
+    assert booked == {first, second}
+
+    await client.post(f"/reservations/{first}/cancel")
+    get_container().outbox_dispatcher.drain()
+
+    schedule = (await client.get("/schedule", params={"day": DAY.isoformat()})).json()
+    assert [s["reservation_id"] for t in schedule["tables"] for s in t["slots"]] == [second]
+    assert schedule["tables"][0]["slots"][0]["start_time"] == EVENING.isoformat()
@@ -0,0 +1,55 @@
+from sqlalchemy import text
+
+from src.booking.infrastructure.database import TimedQueuePool, create_db_engine
+from src.booking.infrastructure.settings import DatabaseSettings
+
+
+def test_settings_are_read_from_env():
+    settings = DatabaseSettings.from_env({
+        "BOOKING_DB_URL": "postgresql://db/booking",
+        "BOOKING_DB_POOL_SIZE": "20",
+        "BOOKING_DB_ECHO": "true",
+        "BOOKING_DB_POOL_PRE_PING": "0",
+    })
+
+    assert settings.url == "postgresql://db/booking"
+    assert settings.pool_size == 20
+    assert settings.echo is True
+    assert settings.pool_pre_ping is False
+    assert settings.max_overflow == DatabaseSettings().max_overflow
+
+
+def test_sqlite_engine_applies_pragmas_and_pool_settings(tmp_path):
+    settings = DatabaseSettings(url=f"sqlite:///{tmp_path / 'bookings.db'}", pool_size=3,
+                                sqlite_busy_timeout_ms=1234)
+    engine = create_db_engine(settings)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+
+    assert engine.echo is False
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert engine.pool.size() == 3
+    engine.dispose()
+
+
+def test_pool_checkout_wait_is_recorded_and_survives_dispose(tmp_path):
+    engine = create_db_engine(DatabaseSettings(url=f"sqlite:///{tmp_path / 'bookings.db'}"))
+    for _ in range(3):
+        with engine.connect():
+            pass
+    stats = engine.pool.wait_stats
+
+    engine.dispose()
+
+    assert engine.pool.wait_stats is stats
+    assert stats.snapshot()["count"] == 3
+    assert stats.snapshot()["max_seconds"] >= 0
+
+
+def test_in_memory_sqlite_keeps_default_pool():
+    engine = create_db_engine(DatabaseSettings(url="sqlite://"))
+    assert not isinstance(engine.pool, TimedQueuePool)
+    engine.dispose()
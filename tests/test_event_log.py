@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.booking.application.commands import (
+    BulkChangeReservationStatus,
+    ChangeReservationStatus,
+    CreateReservation,
+)
+from src.booking.application.handlers import (
+    BulkChangeReservationStatusHandler,
+    ChangeReservationStatusHandler,
+    CreateReservationHandler,
+)
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.events import (
+    ReservationCancelled,
+    ReservationCreated,
+    TableAssigned,
+    WaitlistPromoted,
+)
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from src.booking.domain.services import TableAllocationService
+from src.booking.domain.transitions import TRANSITIONS
+from src.booking.entrypoints.container import close_container, init_container
+from src.booking.infrastructure.event_log import LOG_FILE, EventLogStore, encode_event, read_events
+from src.booking.infrastructure.settings import AppSettings
+from src.booking.infrastructure.uow import EventLogUnitOfWork
+
+
+EVENING = datetime(2030, 1, 1, 18, 0)
+SNAPSHOT = CatalogSnapshot([(f"T{i}", 4) for i in range(1, 9)])
+
+
+def _book(store, n, first=0, allocator=None):
+    # по брони в день: не упираемся в число столов
+    allocator = allocator or TableAllocationService()
+    return [CreateReservationHandler(EventLogUnitOfWork(store), allocator)(
+        CreateReservation(slot_start=EVENING + timedelta(days=first + i), duration_min=60,
+                          party_size=2),
+        SNAPSHOT) for i in range(n)]
+
+
+def _state(store):
+    return sorted((r.reservation_id, r.table_id, r.status, r.slot, r.party_size)
+                  for r in store.state.list_between(datetime.min, datetime.max))
+
+
+def test_codec_roundtrip():
+    events = [ReservationCreated("r1", EVENING, EVENING, EVENING + timedelta(hours=1), 4),
+              ReservationCreated("r2", EVENING),
+              TableAssigned("r1", "T1+T3", EVENING),
+              ReservationCancelled("r1", EVENING, "T1+T3", EVENING),
+              WaitlistPromoted("w1", "r3", EVENING)]
+    log = b"".join(encode_event(e) for e in events)
+
+    assert [e for e, _ in read_events(log)] == events
+    assert [e for e, _ in read_events(log + log[:7])] == events
+
+
+def test_state_survives_restart(tmp_path):
+    store = EventLogStore(str(tmp_path), fsync=False)
+    ids = _book(store, 20)
+    ChangeReservationStatusHandler(EventLogUnitOfWork(store), TableAllocationService())(
+        ChangeReservationStatus(ids[0], "cancel"))
+    BulkChangeReservationStatusHandler(EventLogUnitOfWork(store), TableAllocationService())(
+        BulkChangeReservationStatus("confirm", reservation_ids=tuple(ids[1:5])))
+    # Бронь без событий (импорт): события пишет сам репозиторий
+    imported = Reservation("imported", TimeSlot(EVENING, EVENING + timedelta(hours=2)),
+                           PartySize.of(6), TableId.of("T8"), ReservationStatus.CONFIRMED)
+    with EventLogUnitOfWork(store) as uow:
+        uow.reservations.add_many([imported])
+    before = _state(store)
+    store.close()
+
+    reopened = EventLogStore(str(tmp_path), fsync=False)
+
+    assert _state(reopened) == before
+    assert reopened.state.get(ids[0]).status == ReservationStatus.CANCELLED
+    assert reopened.state.get("imported").status == ReservationStatus.CONFIRMED
+    reopened.close()
+
+
+def test_log_order_matches_state_changes(tmp_path):
+    store = EventLogStore(str(tmp_path), fsync=False)
+    cancelled, raced = _book(store, 2)
+
+    # Бронь закреплена, но не закоммичена: массовая отмена её не видит
+    pending = Reservation("pending", TimeSlot(EVENING, EVENING + timedelta(hours=1)),
+                          PartySize.of(2), TableId.of("T5"))
+    slow = EventLogUnitOfWork(store)
+    slow.reservations.claim([pending])
+    handler = BulkChangeReservationStatusHandler(EventLogUnitOfWork(store),
+                                                 TableAllocationService())
+    result = handler(
+        BulkChangeReservationStatus("cancel", start=EVENING, end=EVENING + timedelta(hours=2)))
+    assert result.changed == 1
+    slow.commit()
+
+    # Параллельные cancel и confirm: commit подтверждения видит, что бронь уже отменили
+    first, second = EventLogUnitOfWork(store), EventLogUnitOfWork(store)
+    first.reservations.transition_status(TRANSITIONS["cancel"], [raced])
+    second.reservations.transition_status(TRANSITIONS["confirm"], [raced])
+    first.commit()
+    with pytest.raises(ValueError):
+        second.commit()
+
+    # Откаченный claim не попадает ни в состояние, ни в снапшот
+    rolled_back = EventLogUnitOfWork(store)
+    ghost = Reservation("ghost", TimeSlot(EVENING, EVENING + timedelta(hours=1)), PartySize.of(2),
+                        TableId.of("T6"))
+    rolled_back.reservations.claim([ghost])
+    store.snapshot()
+    rolled_back.rollback()
+    before = _state(store)
+    store.close()
+
+    reopened = EventLogStore(str(tmp_path), fsync=False)
+    assert _state(reopened) == before
+    assert reopened.state.get("pending").status == ReservationStatus.CREATED
+    assert reopened.state.get(raced).status == ReservationStatus.CANCELLED
+    assert reopened.state.get(cancelled).status == ReservationStatus.CANCELLED
+    assert reopened.state.get("ghost") is None
+
+
+def test_restart_replays_only_tail_after_snapshot(tmp_path):
+    store = EventLogStore(str(tmp_path), fsync=False)
+    _book(store, 30)
+    store.snapshot()
+    _book(store, 5, first=30)
+    before = _state(store)
+    store.close()
+
+    reopened = EventLogStore(str(tmp_path), fsync=False)
+
+    # 5 броней после снапшота = 5 x (ReservationCreated + TableAssigned)
+    assert reopened.replayed == 10
+    assert _state(reopened) == before
+    reopened.close()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    store = EventLogStore(str(tmp_path), fsync=False)
+    _book(store, 3)
+    store.close()
+    path = tmp_path / LOG_FILE
+    good_size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(encode_event(ReservationCancelled("x", EVENING))[:-3])
+
+    reopened = EventLogStore(str(tmp_path), fsync=False)
+
+    assert len(_state(reopened)) == 3
+    assert path.stat().st_size == good_size
+    reopened.close()
+
+
+def test_parallel_commits_share_fsyncs(tmp_path, monkeypatch):
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        time.sleep(0.005)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    store = EventLogStore(str(tmp_path))
+    allocator = TableAllocationService()
+    threads = [threading.Thread(target=_book, args=(store, 16, 16 * k, allocator))
+               for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(_state(store)) == 128
+    assert store.log.fsyncs < 128
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_eventlog_storage_through_api(client, tmp_path):
+    init_container(AppSettings(storage="eventlog", event_log_dir=str(tmp_path)))
+    body = {"slot_start": EVENING.isoformat(), "duration_min": 90, "party_size": 2}
+    reservation_id = (await client.post("/reservations", json=body)).json()["reservation_id"]
+    close_container()
+    init_container(AppSettings(storage="eventlog", event_log_dir=str(tmp_path)))
+    page = (await client.get("/reservations", params={"day": EVENING.date().isoformat()})).json()
+
+    assert [item["reservation_id"] for item in page["items"]] == [reservation_id]
+    schedule = (await client.get("/schedule", params={"day": EVENING.date().isoformat()})).json()
+    assert schedule["tables"][0]["slots"][0]["reservation_id"] == reservation_id
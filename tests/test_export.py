@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.booking.domain.model import PartySize, Reservation, TableId, TimeSlot
+from src.booking.entrypoints.container import get_container, init_container
+from src.booking.entrypoints.export import ndjson_chunks
+from src.booking.infrastructure.settings import AppSettings, DatabaseSettings
+
+
+START = datetime(2030, 1, 1, 12, 0)
+RANGE = {"from": START.isoformat(), "to": (START + timedelta(days=30)).isoformat()}
+
+
+def _reservations(n):
+    # по две брони на каждый старт: порядок внутри старта — по reservation_id
+    return [Reservation(f"r{i:04d}", TimeSlot(START + timedelta(minutes=15 * (i // 2)),
+                                              START + timedelta(minutes=15 * (i // 2) + 60)),
+                        PartySize.of(2 + i % 3), TableId.of(f"T{1 + i % 5}"))
+            for i in reversed(range(n))]
+
+
+def _fill(n):
+    get_container().uow().reservations.add_many(_reservations(n))
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_streams_range_in_keyset_order(client):
+    _fill(30)
+
+    response = await client.get("/reservations/export", params=RANGE)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = _lines(response)
+    assert [r["reservation_id"] for r in rows] == [f"r{i:04d}" for i in range(30)]
+    assert rows[1] == {"reservation_id": "r0001", "table_id": "T2", "status": "CREATED",
+                       "start_time": "2030-01-01T12:00:00", "end_time": "2030-01-01T13:00:00",
+                       "party_size": 3, "cursor": rows[1]["cursor"]}
+
+
+@pytest.mark.asyncio
+async def test_export_resumes_after_cursor(client):
+    _fill(30)
+    rows = _lines(await client.get("/reservations/export", params=RANGE))
+
+    resumed = _lines(await client.get("/reservations/export",
+                                      params={**RANGE, "cursor": rows[10]["cursor"]}))
+
+    assert resumed == rows[11:]
+    bad = await client.get("/reservations/export", params={**RANGE, "cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_csv_export_with_gzip(client):
+    _fill(5)
+
+    response = await client.get("/reservations/export", params={**RANGE, "format": "csv"},
+                                headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    rows = list(csv.reader(io.StringIO(response.text)))  # httpx распаковывает сам
+    assert rows[0][:6] == ["reservation_id", "table_id", "status", "start_time", "end_time",
+                           "party_size"]
+    assert [r[0] for r in rows[1:]] == ["r0000", "r0001", "r0002", "r0003", "r0004"]
+
+
+@pytest.mark.asyncio
+async def test_sql_export_streams_from_database(client, tmp_path):
+    url = f"sqlite:///{tmp_path / 'bookings.db'}"
+    init_container(AppSettings(storage="sqlalchemy", database=DatabaseSettings(url=url)))
+    uow = get_container().uow()
+    with uow:
+        uow.reservations.add_many(_reservations(2500))
+    uow.session.close()
+
+    rows = _lines(await client.get("/reservations/export", params=RANGE))
+    resumed = _lines(await client.get("/reservations/export",
+                                      params={**RANGE, "cursor": rows[1999]["cursor"]}))
+
+    assert len(rows) == 2500
+    assert [r["reservation_id"] for r in resumed] == [f"r{i:04d}" for i in range(2000, 2500)]
+
+
+def test_serializer_is_lazy_and_chunked():
+    consumed = []
+
+    def source():
+        for r in _reservations(25):
+            consumed.append(r)
+            yield r
+
+    chunks = ndjson_chunks(source(), chunk_rows=10)
+    first = next(chunks)
+
+    assert first.count(b"\n") == 10 and len(consumed) == 10
+    assert [c.count(b"\n") for c in chunks] == [10, 5]
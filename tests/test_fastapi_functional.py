@@ -21,4 +21,23 @@ async def test_create_reservation(client):
     data = response.json()
     assert "reservation_id" in data
     assert isinstance(data["reservation_id"], str)
-    assert len(data["reservation_id"]) > 0
\ No newline at end of file
+    assert len(data["reservation_id"]) > 0
+
+@pytest.mark.asyncio
+async def test_refusals_are_409_not_500(client, monkeypatch):
+    from src.booking.domain.repository import TableConflict
+    from src.booking.infrastructure.repositories import InMemoryReservationRepository
+
+    dto = {"slot_start": (datetime.now() + timedelta(days=1)).isoformat(), "duration_min": 60,
+           "party_size": 50}
+    full_house = await client.post("/reservations", json=dto)
+
+    # Стол на каждой попытке успевает занять другой воркер
+    def lost_race(self, reservations):
+        raise TableConflict()
+
+    monkeypatch.setattr(InMemoryReservationRepository, "claim", lost_race)
+    exhausted = await client.post("/reservations", json={**dto, "party_size": 2})
+
+    assert (full_house.status_code, exhausted.status_code) == (409, 409)
+    assert full_house.json()["detail"] == "No suitable table available"
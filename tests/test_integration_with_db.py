@@ -76,6 +76,7 @@ async def client(uow):
     app.dependency_overrides[get_uow] = override_get_uow
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
+    app.dependency_overrides.pop(get_uow, None)
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from src.booking.entrypoints.container import get_container
+
+
+DAY = datetime(2030, 1, 1, 12, 0)
+
+
+def _fill():
+    reservations = []
+    for i in range(25):
+        start = DAY + timedelta(minutes=30 * (i // 5))
+        table = "T1+T3" if i == 7 else f"T{1 + i % 5}"
+        reservation = Reservation(f"r{i:02d}", TimeSlot(start, start + timedelta(minutes=60)),
+                                  PartySize.of(2), TableId.of(table))
+        if i % 4 == 0:
+            reservation.status = ReservationStatus.CANCELLED
+        reservations.append(reservation)
+    get_container().uow().reservations.add_many(reservations)
+
+
+async def _all_pages(client, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page_params = {**params, **({"cursor": cursor} if cursor else {})}
+        body = (await client.get("/reservations", params=page_params)).json()
+        ids += [item["reservation_id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.asyncio
+async def test_pages_follow_keyset_order_without_gaps(client):
+    _fill()
+
+    ids, pages = await _all_pages(client, day="2030-01-01", limit=4)
+
+    assert ids == [f"r{i:02d}" for i in range(25)]
+    assert pages == 7
+
+
+@pytest.mark.asyncio
+async def test_filters_by_table_including_joined_tables_and_status(client):
+    _fill()
+
+    by_table, _ = await _all_pages(client, table_id="T3", limit=2)
+    created, _ = await _all_pages(client, status="CREATED", day="2030-01-01")
+
+    assert by_table == ["r02", "r07", "r12", "r17", "r22"]
+    assert created == [f"r{i:02d}" for i in range(25) if i % 4]
+    other_day = (await client.get("/reservations", params={"day": "2030-01-02"})).json()
+    assert other_day == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_rejects_broken_cursor_and_unknown_status(client):
+    assert (await client.get("/reservations", params={"cursor": "???"})).status_code == 400
+    assert (await client.get("/reservations", params={"status": "LOST"})).status_code == 422
@@ -0,0 +1,85 @@
+import json
+import statistics
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from src.booking.entrypoints.container import init_container
+from src.booking.entrypoints.loadgen import (
+    TrafficProfile,
+    duration_for,
+    generate,
+    load_test,
+    main,
+    utilization,
+)
+from src.booking.infrastructure.settings import AppSettings
+
+
+PROFILE = TrafficProfile(rate=50, start_day=date(2030, 1, 1), days=3)
+
+
+def test_generated_traffic_follows_profile():
+    arrivals = generate(PROFILE, 4000, seed=7)
+
+    gaps = [b.at - a.at for a, b in zip(arrivals, arrivals[1:])]
+    assert statistics.mean(gaps) == pytest.approx(1 / PROFILE.rate, rel=0.1)
+    starts = [a.command.slot_start for a in arrivals]
+    assert all(s.minute % 15 == 0 for s in starts)
+    assert all(time(10, 0) <= s.time()
+               and (s + timedelta(minutes=a.command.duration_min)).time() <= time(23, 0)
+               for s, a in zip(starts, arrivals))
+    assert {s.date() for s in starts} == {date(2030, 1, d) for d in (1, 2, 3)}
+    # пик ужина: вечерних броней больше, чем обеденных
+    assert sum(s.hour >= 18 for s in starts) > 2 * sum(s.hour < 15 for s in starts)
+    sizes = Counter(a.command.party_size for a in arrivals)
+    assert sizes.most_common(1)[0][0] == 2
+    assert all(a.command.duration_min == duration_for(a.command.party_size) for a in arrivals)
+    assert generate(PROFILE, 50, seed=7) == arrivals[:50]
+
+
+def test_utilization_counts_combined_tables_and_skips_cancelled():
+    catalog = CatalogSnapshot([("T1", 4), ("T2", 4)])
+    profile = TrafficProfile(start_day=date(2030, 1, 1), days=1, opens_at=time(18),
+                             closes_at=time(22))
+    evening = datetime(2030, 1, 1, 18, 0)
+    reservations = [
+        Reservation("a", TimeSlot(evening, evening.replace(hour=20)), PartySize.of(8),
+                    TableId.of("T1+T2")),
+        Reservation("b", TimeSlot(evening, evening.replace(hour=22)), PartySize.of(4),
+                    TableId.of("T1"),
+                    ReservationStatus.CANCELLED),
+    ]
+
+    tables, seats = utilization(reservations, catalog, profile)
+
+    assert tables == pytest.approx(0.5)
+    assert seats == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("target", ["inprocess", "asgi"])
+def test_load_test_reports_outcomes(target):
+    container = init_container(AppSettings())
+    profile = TrafficProfile(rate=0, start_day=date(2030, 1, 1), days=1)
+
+    report = load_test(target, profile, requests=200, concurrency=8, container=container)
+
+    assert report.requests == 200 and report.errors == 0
+    assert report.ok + report.rejected == 200
+    assert report.rejected > 0  # 5 столов по умолчанию на 200 гостей в день не хватит
+    assert 0 < report.table_utilization <= 1 and 0 < report.seat_utilization <= 1
+    assert report.p50_ms <= report.p99_ms <= report.max_ms
+
+
+def test_cli_writes_json_report(tmp_path, capsys):
+    out = tmp_path / "run.json"
+
+    assert main(["--requests", "50", "--rate", "0", "--start-day", "2030-01-01", "--days", "1",
+                 "--json", str(out)]) == 0
+
+    data = json.loads(out.read_text())
+    assert data["target"] == "inprocess" and data["requests"] == 50
+    assert "throughput" in capsys.readouterr().out
@@ -0,0 +1,119 @@
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import CreateReservation
+from src.booking.application.handlers import CreateReservationHandler
+from src.booking.domain.events import ReservationCreated, TableAssigned
+from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.db_models import Base, OutboxMessageModel
+from src.booking.infrastructure.outbox import (
+    InMemoryOutbox,
+    OutboxDispatcher,
+    SqlAlchemyOutbox,
+    deserialize_event,
+    serialize_event,
+)
+from src.booking.infrastructure.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+
+
+TABLES = [{"id": "T1", "capacity": 4}]
+CMD = CreateReservation(slot_start=datetime(2030, 1, 1, 19, 0), duration_min=90, party_size=2)
+
+
+def _session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_event_roundtrip():
+    event = TableAssigned("r1", "T1", datetime(2030, 1, 1, 19, 0))
+    row = serialize_event(event)
+    assert deserialize_event(row["event_type"], row["payload"]) == event
+
+
+def test_handler_writes_events_in_the_reservation_transaction():
+    session_factory = _session_factory()
+    session = session_factory()
+    handler = CreateReservationHandler(SqlAlchemyUnitOfWork(session), TableAllocationService())
+    reservation_id = handler(CMD, TABLES)
+    session.close()
+
+    with session_factory() as check:
+        rows = check.scalars(select(OutboxMessageModel).order_by(OutboxMessageModel.id)).all()
+    assert [r.event_type for r in rows] == ["ReservationCreated", "TableAssigned"]
+    assert all(reservation_id in r.payload for r in rows)
+    assert all(r.dispatched_at is None for r in rows)
+
+
+def test_dispatcher_delivers_in_batches_and_marks_dispatched():
+    session_factory = _session_factory()
+    for hour in (17, 19, 21):
+        session = session_factory()
+        CreateReservationHandler(SqlAlchemyUnitOfWork(session), TableAllocationService())(
+            CreateReservation(slot_start=datetime(2030, 1, 1, hour, 0), duration_min=60,
+                              party_size=1), TABLES)
+        session.close()
+
+    received = []
+    dispatcher = OutboxDispatcher(SqlAlchemyOutbox(session_factory), batch_size=4)
+    dispatcher.subscribe(ReservationCreated, received.append)
+
+    assert dispatcher.drain() == 6
+    assert len(received) == 3
+    assert dispatcher.drain() == 0
+
+
+def test_failed_handler_is_retried_at_least_once():
+    uow = InMemoryUnitOfWork()
+    CreateReservationHandler(uow, TableAllocationService())(CMD, TABLES)
+
+    calls = []
+
+    def flaky(event):
+        calls.append(event)
+        if len(calls) == 1:
+            raise RuntimeError("smtp is down")
+
+    dispatcher = OutboxDispatcher(uow.reservations.outbox)
+    dispatcher.subscribe(TableAssigned, flaky)
+
+    assert dispatcher.dispatch_pending() == 1  # ReservationCreated без подписчиков
+    assert dispatcher.dispatch_pending() == 1  # повтор TableAssigned
+    assert len(calls) == 2
+    assert dispatcher.dispatch_pending() == 0
+
+
+def test_background_dispatcher_drains_outbox():
+    outbox = InMemoryOutbox()
+    received = []
+    dispatcher = OutboxDispatcher(outbox)
+    dispatcher.subscribe(ReservationCreated, received.append)
+
+    dispatcher.start(interval=0.01)
+    outbox.append([ReservationCreated("r1", datetime(2030, 1, 1))])
+    deadline = time.monotonic() + 2
+    while not received and time.monotonic() < deadline:
+        time.sleep(0.01)
+    dispatcher.stop()
+
+    assert [e.reservation_id for e in received] == ["r1"]
+
+
+def test_exhausted_messages_move_to_bounded_dead_letters():
+    outbox = InMemoryOutbox(max_attempts=2, dead_letter_limit=1)
+    dispatcher = OutboxDispatcher(outbox)
+    dispatcher.subscribe(ReservationCreated, lambda event: 1 / 0)
+    outbox.append([ReservationCreated("r1", datetime(2030, 1, 1)),
+                   ReservationCreated("r2", datetime(2030, 1, 1)),
+                   TableAssigned("r1", "T1", datetime(2030, 1, 1))])
+
+    for _ in range(3):
+        dispatcher.dispatch_pending()
+
+    assert outbox.fetch_pending(10) == []
+    assert outbox.dispatched_count == 1
+    assert [(m.event.reservation_id, m.attempts) for m in outbox.dead_letters] == [("r2", 2)]
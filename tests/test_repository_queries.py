@@ -0,0 +1,176 @@
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.domain.model import Reservation, ReservationStatus, TimeSlot, PartySize, TableId
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.repositories import (
+    InMemoryReservationRepository,
+    SqlAlchemyReservationRepository,
+    _overlapping_query,
+    _related_tables,
+)
+
+
+EVENING = datetime(2030, 1, 1, 18, 0)
+
+
+def _reservation(rid, table_id, start_offset_min, duration_min):
+    start = EVENING + timedelta(minutes=start_offset_min)
+    return Reservation(
+        reservation_id=rid,
+        slot=TimeSlot(start=start, end=start + timedelta(minutes=duration_min)),
+        party_size=PartySize(2),
+        table_id=TableId(table_id),
+    )
+
+
+@pytest.fixture(params=["memory", "sqlalchemy"])
+def repo(request):
+    if request.param == "memory":
+        yield InMemoryReservationRepository()
+        return
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield SqlAlchemyReservationRepository(session)
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def filled(repo):
+    for r in [
+        _reservation("a", "T1", 0, 180),     # 18:00–21:00, длинная
+        _reservation("b", "T1", 200, 60),    # 21:20–22:20
+        _reservation("c", "T2", 60, 90),     # 19:00–20:30
+        _reservation("d", "T2", 90, 30),     # 19:30–20:00
+    ]:
+        repo.add(r)
+    return repo
+
+
+def _ids(reservations):
+    return [r.reservation_id for r in reservations]
+
+
+def test_list_overlapping_finds_long_reservation_started_earlier(filled):
+    found = filled.list_overlapping("T1", EVENING + timedelta(hours=2),
+                                    EVENING + timedelta(hours=3))
+    assert _ids(found) == ["a"]
+
+
+def test_list_overlapping_is_half_open(filled):
+    assert filled.list_overlapping("T1", EVENING + timedelta(hours=3),
+                                   EVENING + timedelta(minutes=200)) == []
+    assert _ids(filled.list_overlapping("T2", EVENING, EVENING + timedelta(hours=4))) == ["c", "d"]
+    assert filled.list_overlapping("T9", EVENING, EVENING + timedelta(hours=4)) == []
+
+
+def test_list_overlapping_sees_combined_tables(repo):
+    repo.add(_reservation("g", "T1+T3", 0, 120))
+    repo.add(_reservation("h", "T3", 60, 120))
+
+    assert _ids(repo.list_overlapping("T1", EVENING, EVENING + timedelta(hours=1))) == ["g"]
+    assert _ids(repo.list_overlapping("T1+T3", EVENING + timedelta(hours=2),
+                                      EVENING + timedelta(hours=3))) == ["h"]
+
+
+def test_overlapping_query_seeks_table_slot_index():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        query = _overlapping_query("T1", EVENING, EVENING + timedelta(hours=1),
+                                   _related_tables(None))
+        plan = " ".join(str(row[-1]) for row in conn.execute(text("EXPLAIN QUERY PLAN " + str(
+            query.compile(engine, compile_kwargs={"literal_binds": True})))))
+    engine.dispose()
+
+    assert "ix_reservations_table_slot" in plan
+
+
+def test_list_between_filters_by_start_time(filled):
+    found = filled.list_between(EVENING + timedelta(minutes=60), EVENING + timedelta(minutes=200))
+    assert _ids(found) == ["c", "d"]
+
+
+def test_list_for_slot_uses_exact_bounds(filled):
+    slot = TimeSlot(start=EVENING + timedelta(minutes=60), end=EVENING + timedelta(minutes=150))
+    found = filled.list_for_slot(slot)
+    assert _ids(found) == ["c"]
+    assert found[0].party_size == PartySize(2)
+    assert found[0].table_id == TableId("T2")
+
+
+def test_iter_reservations_streams_list_between_in_batches(filled):
+    start, end = EVENING, EVENING + timedelta(hours=4)
+    expected = _ids(filled.list_between(start, end))
+
+    assert _ids(filled.iter_reservations(start, end, batch_size=1)) == expected
+    assert _ids(filled.iter_reservations(start, end, batch_size=3)) == expected
+    assert _ids(filled.iter_reservations(EVENING + timedelta(minutes=60),
+                                         EVENING + timedelta(minutes=200))) == ["c", "d"]
+
+
+def test_list_page_walks_keyset_with_filters(repo):
+    cancelled = _reservation("b", "T2", 0, 60)
+    cancelled.status = ReservationStatus.CANCELLED
+    for r in [
+        _reservation("a", "T1", 0, 60),
+        cancelled,
+        _reservation("c", "T1+T3", 30, 60),
+        _reservation("d", "T3", 60, 60),
+        _reservation("e", "T1", 24 * 60, 60),  # следующий день
+    ]:
+        repo.add(r)
+    day_end = EVENING + timedelta(hours=6)
+
+    first = repo.list_page(EVENING, day_end, limit=2)
+    after = (first[-1].slot.start, first[-1].reservation_id)
+    assert _ids(first) == ["a", "b"]
+    assert _ids(repo.list_page(EVENING, day_end, after=after, limit=2)) == ["c", "d"]
+    assert _ids(repo.list_page(EVENING, day_end, table_ids=["T1", "T1+T3"])) == ["a", "c"]
+    assert _ids(repo.list_page(EVENING, day_end, table_ids=["T3"])) == ["d"]
+    assert _ids(repo.list_page(EVENING, day_end, status=ReservationStatus.CREATED,
+                               after=after)) == ["c", "d"]
+    assert _ids(repo.list_page(EVENING, day_end, status=ReservationStatus.CANCELLED)) == ["b"]
+
+
+def test_streaming_read_keeps_memory_flat():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    repo = SqlAlchemyReservationRepository(session)
+    repo.add_many(_reservation(f"r{i:05d}", f"T{i % 20}", i, 60) for i in range(5_000))
+    end = EVENING + timedelta(days=30)
+
+    def peak(read):
+        tracemalloc.start()
+        try:
+            read()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    listed = peak(lambda: len(repo.list_between(EVENING, end)))
+    streamed = peak(lambda: sum(1 for _ in repo.iter_reservations(EVENING, end, batch_size=100)))
+    session.close()
+    engine.dispose()
+
+    assert streamed * 4 < listed
+
+
+def test_reservation_indexes_are_created():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    indexes = {i["name"]: i["column_names"] for i in inspect(engine).get_indexes("reservations")}
+
+    assert indexes["ix_reservations_table_slot"] == ["table_id", "start_time", "end_time"]
+    # Диапазон по start_time покрывает ix_reservations_keyset: лишний индекс на вставку не нужен
+    assert "ix_reservations_start_time" not in indexes
+    assert indexes["ix_reservations_keyset"] == ["start_time", "reservation_id"]
+    assert indexes["ix_reservations_status_keyset"] == ["status", "start_time", "reservation_id"]
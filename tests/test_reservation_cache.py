@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.reservation_cache import ReservationCache
+from src.booking.infrastructure.uow import SqlAlchemyUnitOfWork
+
+
+START = datetime(2030, 1, 1, 19, 0)
+
+
+def _reservation(rid):
+    return Reservation(rid, TimeSlot(START, START + timedelta(minutes=90)), PartySize.of(2),
+                       TableId.of("T1"))
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    yield sessionmaker(bind=engine), statements
+    engine.dispose()
+
+
+def _selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def test_hot_reservation_is_read_from_database_once(db):
+    session_factory, statements = db
+    cache = ReservationCache()
+    with SqlAlchemyUnitOfWork(session_factory(), cache) as uow:
+        uow.reservations.add(_reservation("r1"))
+
+    with SqlAlchemyUnitOfWork(session_factory(), cache) as uow:
+        first = uow.reservations.get("r1")
+        # identity map: тот же объект в пределах UoW
+        assert uow.reservations.get("r1") is first
+    with SqlAlchemyUnitOfWork(session_factory(), cache) as uow:
+        second = uow.reservations.get("r1")
+
+    assert len(_selects(statements)) == 1
+    # из общего кэша — копия, а не общий изменяемый объект
+    assert second is not first
+    assert (second.table_id, second.status, second.slot) == (
+        TableId("T1"), ReservationStatus.CREATED, first.slot)
+    assert cache.stats().hits == 1 and cache.stats().hit_rate == pytest.approx(0.5)
+
+
+def test_read_started_before_commit_is_not_cached(db):
+    session_factory, _ = db
+    cache = ReservationCache()
+    token = cache.begin_load()
+
+    with SqlAlchemyUnitOfWork(session_factory(), cache) as uow:
+        uow.reservations.add(_reservation("r1"))
+    cache.put(_reservation("r1"), token)
+
+    assert cache.get("r1") is None
+
+
+def test_rollback_forgets_uncommitted_reservations(db):
+    session_factory, _ = db
+    uow = SqlAlchemyUnitOfWork(session_factory(), ReservationCache())
+    uow.reservations.add(_reservation("r1"))
+    uow.rollback()
+
+    assert uow.reservations.get("r1") is None
+
+
+def test_lru_evicts_oldest_and_expires_by_ttl():
+    now = [0.0]
+    cache = ReservationCache(max_size=2, ttl=10.0, clock=lambda: now[0])
+    for rid in ("a", "b"):
+        cache.put(_reservation(rid), cache.begin_load())
+    cache.get("a")
+    cache.put(_reservation("c"), cache.begin_load())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    now[0] = 11.0
+    assert cache.get("c") is None
+    assert cache.stats().size == 1
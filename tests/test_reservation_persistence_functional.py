@@ -18,7 +18,7 @@ from src.booking.infrastructure.uow import SqlAlchemyUnitOfWork
 
 
 # Тестовая БД
-TEST_DB_URL = "sqlite:///./test_reservations.db"
+TEST_DB_URL = "sqlite:///./test_reservation_persistence.db"
 
 
 @pytest.fixture(scope="session")
@@ -28,8 +28,8 @@ def test_engine():
     yield engine
     engine.dispose()
     # Удаляем файл после всех тестов
-    if os.path.exists("./test_reservations.db"):
-        os.remove("./test_reservations.db")
+    if os.path.exists("./test_reservation_persistence.db"):
+        os.remove("./test_reservation_persistence.db")
 
 
 @pytest.fixture
@@ -57,6 +57,7 @@ async def client(uow):
     app.dependency_overrides[get_uow] = override_get_uow
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
+    app.dependency_overrides.pop(get_uow, None)
 
 
 @pytest.mark.asyncio
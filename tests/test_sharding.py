@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import CreateReservation
+from src.booking.application.handlers import CreateReservationHandler
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.factory import ReservationFactory
+from src.booking.domain.services import TableAllocationService
+from src.booking.entrypoints.container import init_container
+from src.booking.infrastructure.db_models import Base, ReservationModel
+from src.booking.infrastructure.settings import AppSettings, DatabaseSettings
+from src.booking.infrastructure.sharding import DirectoryShardRouter, HashShardRouter
+from src.booking.infrastructure.uow import SqlAlchemyUnitOfWork
+
+
+EVENING = datetime(2030, 1, 1, 19, 0)
+BODY = {"slot_start": EVENING.isoformat(), "duration_min": 90, "party_size": 4}
+
+
+def test_hash_router_moves_only_venues_of_new_shard():
+    venues = [f"venue-{i}" for i in range(1000)]
+    before = HashShardRouter(["a", "b", "c"])
+    after = HashShardRouter(["a", "b", "c", "d"])
+
+    moved = [v for v in venues if before.shard_for(v) != after.shard_for(v)]
+
+    assert {after.shard_for(v) for v in moved} == {"d"}
+    assert 150 < len(moved) < 350
+    assert {before.shard_for(v) for v in venues} == {"a", "b", "c"}
+
+
+def test_directory_router_pins_venues():
+    router = DirectoryShardRouter({"bistro": "east"}, fallback=HashShardRouter(["main"]))
+
+    assert router.shard_for("bistro") == "east"
+    assert router.shard_for("cafe") == "main"
+    with pytest.raises(LookupError):
+        DirectoryShardRouter({"bistro": "east"}).shard_for("cafe")
+
+
+def test_venues_sharing_a_database_do_not_see_each_other():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    snapshot = CatalogSnapshot([("T1", 4)])
+
+    for venue in ("bistro", "cafe"):
+        uow = SqlAlchemyUnitOfWork(session_factory(), restaurant_id=venue)
+        CreateReservationHandler(uow, TableAllocationService())(
+            CreateReservation(EVENING, 90, 4, restaurant_id=venue), snapshot)
+
+    with SqlAlchemyUnitOfWork(session_factory(), restaurant_id="bistro") as uow:
+        overlapping = uow.reservations.list_overlapping("T1", EVENING, EVENING.replace(hour=22))
+        assert [r.restaurant_id for r in overlapping] == ["bistro"]
+        with pytest.raises(ValueError):
+            uow.reservations.add(ReservationFactory.create(EVENING, 90, 4, restaurant_id="cafe"))
+    with SqlAlchemyUnitOfWork(session_factory()) as uow:
+        assert len(uow.reservations.list_between(EVENING, EVENING.replace(hour=22))) == 2
+
+
+@pytest.mark.asyncio
+async def test_venue_is_routed_to_its_shard(client, tmp_path):
+    main_url, east_url = f"sqlite:///{tmp_path / 'main.db'}", f"sqlite:///{tmp_path / 'east.db'}"
+    init_container(AppSettings(storage="sqlalchemy", database=DatabaseSettings(url=main_url),
+                               shards=(("east", east_url),), shard_map=(("bistro", "east"),)))
+
+    bistro = (await client.post("/reservations", params={"restaurant_id": "bistro"},
+                                json=BODY)).json()
+    default = (await client.post("/reservations", json=BODY)).json()
+
+    counts = {}
+    for name, url in (("main", main_url), ("east", east_url)):
+        engine = create_engine(url)
+        with engine.connect() as connection:
+            counts[name] = connection.execute(
+                select(ReservationModel.restaurant_id, func.count())
+                .group_by(ReservationModel.restaurant_id)).all()
+        engine.dispose()
+    assert counts == {"main": [("default", 1)], "east": [("bistro", 1)]}
+
+    # Каталоги и занятость раздельные: T1 в том же слоте достался обоим заведениям
+    for params, reservation in (({"restaurant_id": "bistro"}, bistro), ({}, default)):
+        page = (await client.get("/reservations", params={**params, "day": "2030-01-01"})).json()
+        listed = [(i["reservation_id"], i["table_id"]) for i in page["items"]]
+        assert listed == [(reservation["reservation_id"], "T1")]
+    wrong_venue = await client.post(f"/reservations/{bistro['reservation_id']}/confirm")
+    assert wrong_venue.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_memory_storage_keeps_venues_apart(client):
+    init_container(AppSettings(venues=("bistro", "cafe")))
+    first = await client.post("/reservations", params={"restaurant_id": "bistro"}, json=BODY)
+    second = await client.post("/reservations", params={"restaurant_id": "cafe"}, json=BODY)
+    waitlisted = await client.post("/reservations", params={"restaurant_id": "cafe"},
+                                   json={**BODY, "waitlist": True})
+
+    assert first.status_code == second.status_code == 200
+    assert waitlisted.status_code == 400
+    cafe = (await client.get("/reservations",
+                             params={"restaurant_id": "cafe", "day": "2030-01-01"})).json()
+    assert [i["reservation_id"] for i in cafe["items"]] == [second.json()["reservation_id"]]
+    default = (await client.get("/reservations", params={"day": "2030-01-01"})).json()
+    assert default["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_unknown_venue_is_not_created(client):
+    container = init_container(AppSettings(venues=("cafe",), shard_map=(("bistro", "main"),)))
+
+    served = [await client.get("/reservations", params={"restaurant_id": venue})
+              for venue in ("cafe", "bistro")]
+    unknown = await client.post("/reservations", params={"restaurant_id": "typo"}, json=BODY)
+
+    assert [r.status_code for r in served] == [200, 200]
+    assert unknown.status_code == 404
+    assert "typo" not in container._venues
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import BulkChangeReservationStatus, ChangeReservationStatus
+from src.booking.application.handlers import (
+    BulkChangeReservationStatusHandler,
+    ChangeReservationStatusHandler,
+)
+from src.booking.domain.model import PartySize, Reservation, ReservationStatus, TableId, TimeSlot
+from src.booking.domain.repository import ReservationNotFound
+from src.booking.domain.services import TableAllocationService
+from src.booking.domain.transitions import CANCEL, COMPLETE, CONFIRM
+from src.booking.entrypoints.container import get_container
+from src.booking.infrastructure.db_models import Base, OutboxMessageModel
+from src.booking.infrastructure.repositories import InMemoryReservationRepository
+from src.booking.infrastructure.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+
+
+DAY = datetime(2030, 1, 1, 12, 0)
+
+
+def _reservations(n, status=ReservationStatus.CREATED):
+    reservations = []
+    for i in range(n):
+        start = DAY + timedelta(minutes=30 * i)
+        reservation = Reservation(f"r{i:03d}", TimeSlot(start, start + timedelta(minutes=60)),
+                                  PartySize.of(2), TableId.of(f"T{1 + i % 5}"))
+        reservation.status = status
+        reservations.append(reservation)
+    return reservations
+
+
+@pytest.fixture
+def sql():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    yield sessionmaker(bind=engine), statements
+    engine.dispose()
+
+
+def test_in_memory_transition_applies_guard_and_limit():
+    repository = InMemoryReservationRepository()
+    reservations = _reservations(6)
+    reservations[0].status = ReservationStatus.COMPLETED
+    repository.add_many(reservations)
+
+    changed = repository.transition_status(CANCEL, start=DAY, end=DAY + timedelta(days=1), limit=3)
+
+    assert [r.reservation_id for r in changed] == ["r001", "r002", "r003"]
+    assert repository.get("r000").status == ReservationStatus.COMPLETED
+    assert repository.get("r004").status == ReservationStatus.CREATED
+    assert repository.transition_status(COMPLETE, ["r001"]) == []
+
+
+def test_sql_transition_is_one_update_per_batch(sql):
+    session_factory, statements = sql
+    with SqlAlchemyUnitOfWork(session_factory()) as uow:
+        uow.reservations.add_many(_reservations(50, ReservationStatus.CONFIRMED))
+
+    statements.clear()
+    result = BulkChangeReservationStatusHandler(SqlAlchemyUnitOfWork(session_factory()),
+                                                TableAllocationService(), batch_size=20)(
+        BulkChangeReservationStatus(action="complete", start=DAY, end=DAY + timedelta(days=2)))
+
+    assert result.changed == 50
+    updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == 3
+    assert not [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    with session_factory() as session:
+        rows = session.scalars(select(OutboxMessageModel)).all()
+    assert len(rows) == 50 and {r.event_type for r in rows} == {"ReservationCompleted"}
+
+
+def test_bulk_by_ids_skips_reservations_the_transition_does_not_allow(sql):
+    session_factory, _ = sql
+    reservations = _reservations(4)
+    reservations[1].status = ReservationStatus.COMPLETED
+    reservations[2].status = ReservationStatus.CANCELLED
+    with SqlAlchemyUnitOfWork(session_factory()) as uow:
+        uow.reservations.add_many(reservations)
+
+    handler = BulkChangeReservationStatusHandler(SqlAlchemyUnitOfWork(session_factory()),
+                                                 TableAllocationService())
+    result = handler(BulkChangeReservationStatus(
+        action="confirm", reservation_ids=("r000", "r001", "r002", "r003", "missing")))
+
+    assert result.changed == 2
+    assert result.skipped == ("r001", "r002", "missing")
+    with SqlAlchemyUnitOfWork(session_factory()) as uow:
+        assert uow.reservations.get("r001").status == ReservationStatus.COMPLETED
+        assert uow.reservations.get("r003").status == ReservationStatus.CONFIRMED
+
+
+def test_single_transition_keeps_aggregate_invariants():
+    repository = InMemoryReservationRepository()
+    repository.add_many(_reservations(1))
+    handler = ChangeReservationStatusHandler(InMemoryUnitOfWork(repository),
+                                             TableAllocationService())
+
+    assert handler(ChangeReservationStatus("r000", "confirm")) == "CONFIRMED"
+    assert handler(ChangeReservationStatus("r000", "complete")) == "COMPLETED"
+    with pytest.raises(ValueError):
+        handler(ChangeReservationStatus("r000", "cancel"))
+    with pytest.raises(ReservationNotFound):
+        handler(ChangeReservationStatus("nope", "cancel"))
+    assert repository.get("r000").status == ReservationStatus.COMPLETED
+
+
+def test_concurrent_change_between_read_and_update_is_rejected():
+    repository = InMemoryReservationRepository()
+    repository.add_many(_reservations(1))
+    uow = InMemoryUnitOfWork(repository)
+    original_get = repository.get
+
+    def get_then_cancel_elsewhere(reservation_id):
+        reservation = original_get(reservation_id)
+        repository.transition_status(CANCEL, [reservation_id])
+        return reservation
+
+    repository.get = get_then_cancel_elsewhere
+    with pytest.raises(ValueError):
+        ChangeReservationStatusHandler(uow, TableAllocationService())(
+            ChangeReservationStatus("r000", "confirm"))
+    assert original_get("r000").status == ReservationStatus.CANCELLED
+    assert repository.transition_status(CONFIRM, ["r000"]) == []
+
+
+@pytest.mark.asyncio
+async def test_status_endpoints(client):
+    get_container().uow().reservations.add_many(_reservations(3))
+
+    confirmed = await client.post("/reservations/r000/confirm")
+    cancelled = await client.post("/reservations/bulk/cancel",
+                                  json={"from": DAY.isoformat(),
+                                        "to": (DAY + timedelta(days=1)).isoformat()})
+
+    assert confirmed.json() == {"reservation_id": "r000", "status": "CONFIRMED"}
+    assert cancelled.json() == {"changed": 3, "skipped": []}
+    assert (await client.post("/reservations/r000/complete")).status_code == 409
+    assert (await client.post("/reservations/nope/cancel")).status_code == 404
+    assert (await client.post("/reservations/r000/archive")).status_code == 404
+    assert (await client.post("/reservations/bulk/cancel", json={})).status_code == 400
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.booking.application.commands import CreateReservation
+from src.booking.application.handlers import CreateReservationHandler
+from src.booking.domain.factory import ReservationFactory
+from src.booking.domain.model import TableId
+from src.booking.domain.occupancy import OccupancyIndex
+from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.uow import InMemoryUnitOfWork
+
+
+TABLES = [
+    {"id": "T1", "capacity": 4},
+    {"id": "T2", "capacity": 2},
+    {"id": "T3", "capacity": 4},
+]
+
+
+def _booked(start, duration_min, party_size, table_id):
+    reservation = ReservationFactory.create(start, duration_min, party_size)
+    reservation.table_id = TableId(table_id)
+    return reservation
+
+
+def test_allocate_skips_table_booked_for_overlapping_slot():
+    start = datetime(2030, 1, 1, 19, 0)
+    occupancy = OccupancyIndex.from_reservations([_booked(start, 90, 2, "T2")])
+    allocator = TableAllocationService(occupancy)
+
+    reservation = ReservationFactory.create(start + timedelta(minutes=30), 60, 2)
+
+    assert allocator.allocate(reservation, TABLES) == TableId("T1")
+
+
+def test_allocate_reuses_table_for_adjacent_slot():
+    start = datetime(2030, 1, 1, 19, 0)
+    occupancy = OccupancyIndex.from_reservations([_booked(start, 90, 2, "T2")])
+    allocator = TableAllocationService(occupancy)
+
+    # [start, end) — бронь, начинающаяся ровно в момент окончания, не пересекается
+    reservation = ReservationFactory.create(start + timedelta(minutes=90), 60, 2)
+
+    assert allocator.allocate(reservation, TABLES) == TableId("T2")
+
+
+def test_allocate_fails_when_all_suitable_tables_are_busy():
+    start = datetime(2030, 1, 1, 19, 0)
+    occupancy = OccupancyIndex.from_reservations([
+        _booked(start, 120, 4, "T1"),
+        _booked(start, 120, 3, "T3"),
+    ])
+    allocator = TableAllocationService(occupancy)
+
+    with pytest.raises(ValueError, match="No suitable table available"):
+        allocator.allocate(ReservationFactory.create(start, 60, 3), TABLES)
+
+
+def test_occupancy_index_rejects_overlapping_booking_on_same_table():
+    start = datetime(2030, 1, 1, 19, 0)
+    occupancy = OccupancyIndex.from_reservations([_booked(start, 90, 2, "T1")])
+
+    with pytest.raises(ValueError):
+        occupancy.add(_booked(start + timedelta(minutes=89), 30, 2, "T1"))
+
+
+def test_handler_spreads_overlapping_requests_across_tables():
+    uow = InMemoryUnitOfWork()
+    handler = CreateReservationHandler(uow, TableAllocationService())
+    cmd = CreateReservation(slot_start=datetime(2030, 1, 1, 19, 0), duration_min=90, party_size=2)
+
+    tables = [uow.reservations.get(handler(cmd, available_tables=TABLES)).table_id
+              for _ in range(3)]
+
+    assert tables == [TableId("T2"), TableId("T1"), TableId("T3")]
+    with pytest.raises(ValueError, match="No suitable table available"):
+        handler(cmd, available_tables=TABLES)
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.factory import ReservationFactory
+from src.booking.domain.model import TableId
+from src.booking.domain.services import TableAllocationService
+from src.booking.infrastructure.available_tables import (
+    InMemoryTableSource,
+    SqlAlchemyTableSource,
+    TableCatalog,
+)
+from src.booking.infrastructure.db_models import Base
+
+
+def test_snapshot_candidates_are_sorted_by_capacity():
+    snapshot = CatalogSnapshot([("T1", 4), ("T2", 1), ("T3", 8), ("T4", 6)])
+
+    assert snapshot.candidates(5) == (TableId("T4"), TableId("T3"))
+    assert snapshot.candidates(9) == ()
+    assert snapshot.capacity_of(TableId("T4")) == 6
+
+
+def test_allocator_accepts_snapshot():
+    snapshot = CatalogSnapshot([("T1", 4), ("T2", 2)])
+    reservation = ReservationFactory.create(datetime(2030, 1, 1, 19, 0), 60, 2)
+
+    assert TableAllocationService().allocate(reservation, snapshot) == TableId("T2")
+
+
+def test_catalog_caches_snapshot_until_floor_plan_changes():
+    loads = []
+
+    class CountingSource(InMemoryTableSource):
+        def load(self):
+            loads.append(1)
+            return super().load()
+
+    catalog = TableCatalog(CountingSource())
+    first = catalog.snapshot()
+    assert catalog.snapshot() is first
+    assert len(loads) == 1
+
+    catalog.upsert_table("T9", 12)
+
+    second = catalog.snapshot()
+    assert second is not first
+    assert second.version > first.version
+    assert second.candidates(10) == (TableId("T9"),)
+    assert len(loads) == 2
+
+
+def test_sqlalchemy_source_seeds_default_floor_plan_and_persists_changes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    source = SqlAlchemyTableSource(sessionmaker(bind=engine))
+
+    catalog = TableCatalog(source)
+    assert len(catalog.snapshot()) == 5
+
+    catalog.upsert_table("B1", 20)
+    catalog.remove_table("T2")
+
+    reloaded = TableCatalog(SqlAlchemyTableSource(sessionmaker(bind=engine))).snapshot()
+    assert reloaded.candidates(1)[0] == TableId("T1")
+    assert reloaded.candidates(20) == (TableId("B1"),)
+
+
+def test_catalog_sees_other_workers_changes_after_ttl():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = [0.0]
+    catalog = TableCatalog(SqlAlchemyTableSource(sessionmaker(bind=engine)), ttl=30,
+                           clock=lambda: now[0])
+    other_worker = TableCatalog(SqlAlchemyTableSource(sessionmaker(bind=engine)))
+    first = catalog.snapshot()
+
+    now[0] = 31
+    assert catalog.snapshot() is first  # план не менялся: версия та же
+
+    other_worker.upsert_table("B1", 20)
+    now[0] = 45
+    assert catalog.snapshot() is first
+    now[0] = 62
+    assert catalog.snapshot().candidates(20) == (TableId("B1"),)
+    assert catalog.version > first.version
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.booking.domain.events import TableAssigned
+from src.booking.domain.factory import ReservationFactory
+from src.booking.domain.model import MAX_INTERNED_PARTY_SIZE, PartySize, TableId, TimeSlot
+
+
+def test_small_party_sizes_and_table_ids_are_interned():
+    assert PartySize.of(4) is PartySize.of(4)
+    assert PartySize.of(MAX_INTERNED_PARTY_SIZE + 1) == PartySize(MAX_INTERNED_PARTY_SIZE + 1)
+    assert TableId.of("T1") is TableId.of("T1")
+    assert TableId.of("T1") == TableId("T1")
+
+
+def test_interning_keeps_invariants():
+    with pytest.raises(ValueError):
+        PartySize.of(0)
+
+
+def test_domain_objects_have_no_instance_dict():
+    start = datetime(2030, 1, 1, 19, 0)
+    reservation = ReservationFactory.create(start, 60, 2)
+
+    for obj in (reservation, reservation.slot, reservation.party_size, TableId.of("T1"),
+                TableAssigned("r1", "T1", start), TimeSlot(start, start + timedelta(hours=1))):
+        assert not hasattr(obj, "__dict__")
+
+    with pytest.raises(AttributeError):
+        reservation.comment = "window seat"
@@ -0,0 +1,164 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.booking.application.commands import ChangeReservationStatus, CreateReservation
+from src.booking.application.handlers import (
+    ChangeReservationStatusHandler,
+    CreateReservationHandler,
+    JoinWaitlistHandler,
+    PromoteWaitlistHandler,
+)
+from src.booking.domain.catalog import CatalogSnapshot
+from src.booking.domain.events import WaitlistPromoted
+from src.booking.domain.model import TimeSlot
+from src.booking.domain.services import TableAllocationService
+from src.booking.domain.waitlist import WaitlistEntry, WaitlistIndex
+from src.booking.entrypoints.container import get_container, init_container
+from src.booking.infrastructure.db_models import Base
+from src.booking.infrastructure.settings import AppSettings, DatabaseSettings
+from src.booking.infrastructure.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+
+
+EVENING = datetime(2030, 1, 5, 19, 0)
+SNAPSHOT = CatalogSnapshot([("T1", 4)])
+CMD = CreateReservation(slot_start=EVENING, duration_min=90, party_size=2)
+CMD_SLOT = TimeSlot(EVENING, EVENING + timedelta(minutes=90))
+
+
+def _entry(i, start, minutes=90, party=2):
+    return WaitlistEntry(f"w{i:05d}", TimeSlot(start, start + timedelta(minutes=minutes)), party,
+                         EVENING - timedelta(days=1) + timedelta(seconds=i))
+
+
+def test_index_finds_only_fitting_entries_in_queue_order():
+    rng = random.Random(3)
+    entries = [_entry(i, EVENING + timedelta(minutes=15 * rng.randrange(-20, 20)),
+                      rng.choice((60, 90, 150)), rng.randint(1, 10)) for i in range(5000)]
+    index = WaitlistIndex(reversed(entries))
+    freed = TimeSlot(EVENING, EVENING + timedelta(minutes=90))
+
+    taken = index.take([(freed, 4)])
+
+    expected = [e for e in entries
+                if e.party_size <= 4 and e.slot.start < freed.end and e.slot.end > freed.start]
+    assert taken == expected
+    assert len(index) == 5000 - len(expected)
+    index.put_back(taken[:3])
+    assert index.take([(freed, 4)], limit=2) == expected[:2]
+
+
+def _booked_evening():
+    uow = InMemoryUnitOfWork()
+    allocator = TableAllocationService()
+    reservation_id = CreateReservationHandler(uow, allocator)(CMD, SNAPSHOT)
+    return uow, allocator, reservation_id
+
+
+def test_cancellation_promotes_first_waitlisted_guest():
+    uow, allocator, reservation_id = _booked_evening()
+    waitlist = WaitlistIndex()
+    first, second = (JoinWaitlistHandler(uow, waitlist)(CMD) for _ in range(2))
+    promote = PromoteWaitlistHandler(uow, allocator, waitlist)
+
+    def freed(reservations):
+        promoted.extend(promote(reservations, SNAPSHOT))
+
+    promoted = []
+    ChangeReservationStatusHandler(uow, allocator, on_commit=freed)(
+        ChangeReservationStatus(reservation_id, "cancel"))
+
+    assert len(promoted) == 1 and promoted[0].table_id.value == "T1"
+    assert [e.entry_id for e in uow.waitlist.list_all()] == [second] and second in waitlist
+    events = [m.event for m in uow.reservations.outbox.fetch_pending(100)]
+    assert WaitlistPromoted(first, promoted[0].reservation_id, events[-1].occurred_at) == events[-1]
+
+
+def test_entry_promoted_by_another_worker_is_skipped():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    waitlist = WaitlistIndex()
+    snapshot = CatalogSnapshot([("T1", 4), ("T2", 4)])
+    ids = [JoinWaitlistHandler(SqlAlchemyUnitOfWork(session_factory()), waitlist)(CMD)
+           for _ in range(2)]
+    # Первую запись уже повысил другой воркер: в БД её нет, в индексе этого процесса — есть
+    with SqlAlchemyUnitOfWork(session_factory()) as uow:
+        uow.waitlist.remove([ids[0]])
+
+    handler = PromoteWaitlistHandler(SqlAlchemyUnitOfWork(session_factory()),
+                                     TableAllocationService(), waitlist)
+    promoted = handler(None, snapshot)
+
+    assert len(promoted) == 1 and len(waitlist) == 0
+    with SqlAlchemyUnitOfWork(session_factory()) as uow:
+        assert uow.waitlist.list_all() == []
+        assert uow.reservations.get(promoted[0].reservation_id).table_id.value == "T1"
+    engine.dispose()
+
+
+def test_in_memory_promotion_leaves_no_phantom_bookings():
+    uow = InMemoryUnitOfWork()
+    waitlist = WaitlistIndex()
+    snapshot = CatalogSnapshot([("T1", 4), ("T2", 4)])
+    ids = [JoinWaitlistHandler(uow, waitlist)(CMD) for _ in range(2)]
+    uow.waitlist.remove([ids[0]])
+
+    promoted = PromoteWaitlistHandler(uow, TableAllocationService(), waitlist)(None, snapshot)
+
+    assert len(promoted) == 1 and len(waitlist) == 0
+    assert uow.waitlist.list_all() == []
+    saved = uow.reservations.list_between(EVENING, EVENING + timedelta(hours=2))
+    assert [r.reservation_id for r in saved] == [promoted[0].reservation_id]
+
+
+def test_container_loads_only_new_entries_of_other_workers(tmp_path):
+    url = f"sqlite:///{tmp_path / 'w.db'}"
+    container = init_container(AppSettings(storage="sqlalchemy",
+                                           database=DatabaseSettings(url=url)))
+    for table_id in [t.value for t, _ in container.catalog.snapshot()]:
+        container.catalog.remove_table(table_id)
+    mine = JoinWaitlistHandler(container.uow(), container.waitlist)(CMD)
+    # Гостя ставит в лист другой воркер: индекс этого процесса о нём не знает
+    with SqlAlchemyUnitOfWork(container.session_factory()) as uow:
+        uow.waitlist.add(WaitlistEntry("other", CMD_SLOT, 2, datetime.utcnow()))
+        uow.commit()
+    statements = []
+    event.listen(container.engine, "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+
+    container.catalog.upsert_table("T1", 4)
+
+    reads = [s for s in statements if s.lstrip().startswith("SELECT") and "FROM waitlist" in s]
+    assert reads and all("waitlist.created_at >" in s for s in reads)
+    # Стол один: достался первому в очереди, запись другого воркера — в индексе
+    assert "other" in container.waitlist and mine not in container.waitlist
+    with SqlAlchemyUnitOfWork(container.session_factory()) as uow:
+        assert [e.entry_id for e in uow.waitlist.list_all()] == ["other"]
+
+
+@pytest.mark.asyncio
+async def test_full_house_waitlist_is_served_by_cancellation_and_new_table(client):
+    container = get_container()
+    for table_id in [t.value for t, _ in container.catalog.snapshot()]:
+        container.catalog.remove_table(table_id)
+    container.catalog.upsert_table("T1", 4)
+    body = {"slot_start": EVENING.isoformat(), "duration_min": 90, "party_size": 3}
+
+    booked = (await client.post("/reservations", json=body)).json()["reservation_id"]
+    parked = [await client.post("/reservations", json={**body, "waitlist": True}) for _ in range(2)]
+
+    assert [r.status_code for r in parked] == [202, 202]
+    assert len(container.waitlist) == 2
+
+    await client.post(f"/reservations/{booked}/cancel")
+    assert len(container.waitlist) == 1
+
+    container.catalog.upsert_table("T9", 6)
+    assert len(container.waitlist) == 0
+    evening = container.reservations.list_between(EVENING, EVENING + timedelta(hours=1))
+    booked_tables = {r.table_id.value for r in evening if r.reservation_id != booked}
+    assert booked_tables == {"T1", "T9"}